@@ -1,47 +1,99 @@
 import logging
-import traceback
+from concurrent.futures import ThreadPoolExecutor
 from boto3 import client
+from cache_handler.cache_handler import CacheHandler
+from log_handler.log_handler import LazyDump
+
+# Alternate contact types checked by default, as required by the FTR check `ACOM-001: Configure AWS account contacts`.
+DEFAULT_ALTERNATE_CONTACT_TYPES = ['BILLING', 'OPERATIONS', 'SECURITY']
 
 class Account:
 
     # Account Constructor
     # logger: Logger object
+    # cache: Optional CacheHandler object used to memoize lookups
+    # contact_types: Alternate contact types retrieved when none are given to a lookup, defaults to `DEFAULT_ALTERNATE_CONTACT_TYPES`
     #
     # Returns: Account object
     # Raises: None
-    def __init__(self, logger: logging.Logger, account_client: client):
+    def __init__(self, logger: logging.Logger, account_client: client, cache: CacheHandler = None, contact_types: list = None):
         
         self.logger = logger
         self.account_client = account_client
+        self.cache = cache
+        self.contact_types = list(contact_types) if contact_types else DEFAULT_ALTERNATE_CONTACT_TYPES
 
-    # get_aws_account_information: Retrieves email address(es) mentioned in the AWS Account Settings as alternate contacts. Alternatively, it works double time as an FTR check, `ACOM-001: Configure AWS account contacts`. Returns a tuple of (bool, list), True if the request was successful and the list contains the unique email address(es) retrieved from the AWS Account.
-    def get_aws_account_information(self) -> tuple[bool, list]:
+    # __get_alternate_contact: Retrieves a single alternate contact. Returns a tuple of (str, dict), the lookup status (`Found`, `Missing` or `Failed`) and the alternate contact.
+    def __get_alternate_contact(self, contact_type: str) -> tuple[str, dict]:
 
         try:
+            alternate_contact_response = self.account_client.get_alternate_contact(
+                AlternateContactType=contact_type
+            )
 
-            alternate_contact_type = ['BILLING', 'OPERATIONS', 'SECURITY']
-            email_domains = []
+            if 'AlternateContact' not in alternate_contact_response.keys():
+                return 'Missing', {}
 
-            for contact_type in alternate_contact_type:
+            if 'EmailAddress' not in alternate_contact_response['AlternateContact'].keys():
+                return 'Missing', alternate_contact_response['AlternateContact']
 
-                alternate_contact_response = self.account_client.get_alternate_contact(
-                    AlternateContactType=contact_type
-                )
+            return 'Found', alternate_contact_response['AlternateContact']
 
-                if 'AlternateContact' not in alternate_contact_response.keys():
-                    return False, []
+        except self.account_client.exceptions.ResourceNotFoundException as ResourceNotFoundException:
+            self.logger.exception('Resource Not Found Exception for ' + contact_type + ' contact')
+            return 'Missing', {}
 
-                if 'EmailAddress' not in alternate_contact_response['AlternateContact'].keys():
-                    return False, []
+        except self.account_client.exceptions.AccessDeniedException as AccessDeniedException:
+            self.logger.exception('Access Denied Exception for ' + contact_type + ' contact')
+            return 'Failed', {}
 
-                email_domains.append(alternate_contact_response['AlternateContact']['EmailAddress'].split('@')[1])
+    # __get_alternate_contacts: Uncached, concurrent alternate contact lookup behind `get_alternate_contacts`.
+    def __get_alternate_contacts(self, contact_types: list) -> dict:
 
-            return True, list(set(email_domains))
-        
-        except self.account_client.exceptions.ResourceNotFoundException as ResourceNotFoundException:
-            self.logger.error('Resource Not Found Exception - ' + str(traceback.print_tb(ResourceNotFoundException.__traceback__)))
-            return False, []
-        
-        except self.account_client.exceptions.AccessDeniedException as AccessDeniedException:
-            self.logger.error('Access Denied Exception - ' + str(traceback.print_tb(AccessDeniedException.__traceback__)))
-            return False, []
\ No newline at end of file
+        alternate_contacts = {
+            'Contacts': {},
+            'MissingContactTypes': [],
+            'FailedContactTypes': []
+        }
+
+        with ThreadPoolExecutor(max_workers=len(contact_types)) as executor:
+
+            for contact_type, (lookup_status, alternate_contact) in zip(contact_types, executor.map(self.__get_alternate_contact, contact_types)):
+
+                if lookup_status == 'Found':
+                    alternate_contacts['Contacts'].update({ contact_type: alternate_contact })
+                elif lookup_status == 'Missing':
+                    alternate_contacts['MissingContactTypes'].append(contact_type)
+                else:
+                    alternate_contacts['FailedContactTypes'].append(contact_type)
+
+        self.logger.debug('Alternate Contacts - %s', LazyDump(alternate_contacts))
+
+        return alternate_contacts
+
+    # get_alternate_contacts: Retrieves the alternate contacts of `contact_types` (defaults to the types given to the constructor) in parallel. Returns a `dict` with `Contacts`, the alternate contact per type found, `MissingContactTypes`, the types not configured on the account, and `FailedContactTypes`, the types that could not be read.
+    def get_alternate_contacts(self, contact_types: list = None) -> dict:
+
+        contact_types = list(contact_types) if contact_types else self.contact_types
+
+        if not contact_types:
+            return { 'Contacts': {}, 'MissingContactTypes': [], 'FailedContactTypes': [] }
+
+        if self.cache:
+            return self.cache.get_or_load(('account.get_alternate_contact', tuple(contact_types)), lambda: self.__get_alternate_contacts(contact_types=contact_types))
+
+        return self.__get_alternate_contacts(contact_types=contact_types)
+
+    # get_aws_account_information: Retrieves email address(es) mentioned in the AWS Account Settings as alternate contacts. Alternatively, it works double time as an FTR check, `ACOM-001: Configure AWS account contacts`. Returns a tuple of (bool, list), True if every contact type was configured and the list contains the unique email domain(s) of the alternate contacts that were found.
+    def get_aws_account_information(self, contact_types: list = None) -> tuple[bool, list]:
+
+        alternate_contacts = self.get_alternate_contacts(contact_types=contact_types)
+
+        email_domains = []
+
+        for alternate_contact in alternate_contacts['Contacts'].values():
+
+            if '@' in alternate_contact['EmailAddress'] and alternate_contact['EmailAddress'].split('@')[1] not in email_domains:
+                email_domains.append(alternate_contact['EmailAddress'].split('@')[1])
+
+        return not alternate_contacts['MissingContactTypes'] and not alternate_contacts['FailedContactTypes'], email_domains
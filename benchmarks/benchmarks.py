@@ -0,0 +1,479 @@
+import argparse
+import contextlib
+import importlib
+import io
+import itertools
+import json
+import os
+import re
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+BENCHMARK_ACCOUNT_ID = '123456789012'
+BENCHMARK_REGION = 'us-east-1'
+
+# Benchmark scenarios, as the RequestType of the custom resource event, the size of the nested stack tree, and the number of services and regions with spend. A `retried` scenario sends the same RequestId on every invocation, as CloudFormation and Lambda retries do.
+BENCHMARK_SCENARIOS = [
+    { 'name': 'create-1-stack', 'request_type': 'Create', 'nested_stacks': 1, 'services': 20, 'regions': 4 },
+    { 'name': 'create-10-stacks', 'request_type': 'Create', 'nested_stacks': 10, 'services': 20, 'regions': 4 },
+    { 'name': 'create-100-stacks', 'request_type': 'Create', 'nested_stacks': 100, 'services': 20, 'regions': 4 },
+    { 'name': 'update-10-stacks', 'request_type': 'Update', 'nested_stacks': 10, 'services': 20, 'regions': 4 },
+    { 'name': 'update-100-stacks', 'request_type': 'Update', 'nested_stacks': 100, 'services': 20, 'regions': 4 },
+    { 'name': 'delete', 'request_type': 'Delete', 'nested_stacks': 10, 'services': 20, 'regions': 4 },
+    { 'name': 'create-many-services', 'request_type': 'Create', 'nested_stacks': 10, 'services': 300, 'regions': 16 },
+    { 'name': 'create-10-stacks-organizations', 'request_type': 'Create', 'nested_stacks': 10, 'services': 20, 'regions': 4, 'is_organizations_account': True },
+    { 'name': 'create-10-stacks-retry', 'request_type': 'Create', 'nested_stacks': 10, 'services': 20, 'regions': 4, 'retried': True },
+]
+
+# FakeAws - serves CloudFormation, Organizations, Account and Cost Explorer calls of real boto3 clients from memory, through botocore `before-call` hooks like `Stubber`, and counts them per operation
+class FakeAws:
+
+    # FakeAws Constructor
+    # nested_stacks: Number of nested stacks below the root stack, ten children of the root and the remainder as their grandchildren
+    # services: Number of services with spend in every month
+    # regions: Number of regions with spend in every month
+    # is_organizations_account: True to report the account as an AWS Organizations member, skipping the alternate contact lookups
+    #
+    # Returns: FakeAws object
+    # Raises: None
+    def __init__(self, nested_stacks: int, services: int, regions: int, is_organizations_account: bool = False):
+
+        self.services = ['Service ' + str(index) for index in range(services)]
+        self.regions = ['us-east-1', 'us-east-2', 'us-west-1', 'us-west-2', 'eu-west-1', 'eu-west-2', 'eu-west-3', 'eu-central-1', 'eu-north-1', 'ap-south-1', 'ap-northeast-1', 'ap-northeast-2', 'ap-southeast-1', 'ap-southeast-2', 'ca-central-1', 'sa-east-1'][:regions]
+        self.is_organizations_account = is_organizations_account
+        self.api_calls = {}
+        self.lock = threading.Lock()
+
+        self.root_stack_id = self.get_stack_id(stack_name='BenchmarkStack')
+        self.children = { self.root_stack_id: [] }
+        self.stack_ids = []
+
+        for index in range(nested_stacks):
+            parent_stack_id = self.root_stack_id if index < 10 else self.stack_ids[index % 10]
+            stack_id = self.get_stack_id(stack_name='BenchmarkStack-Nested' + str(index))
+            self.children[parent_stack_id].append(stack_id)
+            self.children.update({ stack_id: [] })
+            self.stack_ids.append(stack_id)
+
+    # get_stack_id: Returns the StackId of `stack_name`.
+    def get_stack_id(self, stack_name: str) -> str:
+        return 'arn:aws:cloudformation:' + BENCHMARK_REGION + ':' + BENCHMARK_ACCOUNT_ID + ':stack/' + stack_name + '/00000000-0000-0000-0000-' + str(abs(hash(stack_name)) % 10 ** 12).zfill(12)
+
+    # install: Hooks every client of `client_factory` the handler uses, creating them up front.
+    def install(self, client_factory):
+
+        for service_name in ['cloudformation', 'ce', 'organizations', 'account']:
+            client = client_factory.get_client(service_name)
+            client.meta.events.register('before-parameter-build.*.*', self.__record_params)
+            client.meta.events.register('before-call.*.*', self.__handle_call)
+
+    # __record_params: Keeps the API parameters of a call in its request context, as `before-call` only sees the serialized request.
+    def __record_params(self, params, context, **kwargs):
+        context.update({ 'benchmark_params': dict(params) })
+
+    # __handle_call: Answers a botocore call. Returns a tuple of (AWSResponse, dict), the HTTP response and the parsed response, as a `before-call` handler.
+    def __handle_call(self, model, context, **kwargs):
+
+        from botocore.awsrequest import AWSResponse
+
+        params = context['benchmark_params']
+
+        operation = model.service_model.service_name + '.' + model.name
+
+        with self.lock:
+            self.api_calls.update({ operation: self.api_calls.get(operation, 0) + 1 })
+
+        status_code, parsed_response = getattr(self, '_FakeAws__' + re.sub(r'(?<!^)(?=[A-Z])', '_', model.name).lower())(params)
+        parsed_response.update({ 'ResponseMetadata': { 'HTTPStatusCode': status_code } })
+
+        return AWSResponse(None, status_code, {}, None), parsed_response
+
+    # __stack_resource: Returns the `describe_stack_resources` entry of a nested stack.
+    def __stack_resource(self, parent_stack_id: str, stack_id: str) -> dict:
+
+        return {
+            'StackName': parent_stack_id.split('/')[1],
+            'StackId': parent_stack_id,
+            'LogicalResourceId': stack_id.split('/')[1].replace('-', ''),
+            'PhysicalResourceId': stack_id,
+            'ResourceType': 'AWS::CloudFormation::Stack',
+            'Timestamp': datetime.now(),
+            'ResourceStatus': 'CREATE_COMPLETE'
+        }
+
+    # __stack: Returns the `describe_stacks` entry of a stack.
+    def __stack(self, stack_id: str) -> dict:
+
+        stack = {
+            'StackId': stack_id,
+            'StackName': stack_id.split('/')[1],
+            'CreationTime': datetime.now(),
+            'StackStatus': 'CREATE_COMPLETE',
+            'Outputs': [{ 'OutputKey': 'Output' + str(index), 'OutputValue': stack_id.split('/')[1] + '-' + str(index) } for index in range(3)]
+        }
+
+        # Nested stacks name their parent and root stack, as CloudFormation does.
+        if stack_id != self.root_stack_id:
+            stack.update({ 'ParentId': next(parent_stack_id for parent_stack_id, child_stack_ids in self.children.items() if stack_id in child_stack_ids), 'RootId': self.root_stack_id })
+
+        return stack
+
+    def __describe_stack_resources(self, params: dict) -> tuple[int, dict]:
+        return 200, { 'StackResources': [self.__stack_resource(parent_stack_id=params['StackName'], stack_id=stack_id) for stack_id in self.children.get(params['StackName'], [])] }
+
+    def __describe_stack_events(self, params: dict) -> tuple[int, dict]:
+        return 200, { 'StackEvents': [] }
+
+    def __describe_stacks(self, params: dict) -> tuple[int, dict]:
+
+        if 'StackName' in params:
+            return 200, { 'Stacks': [self.__stack(stack_id=params['StackName'])] }
+
+        # A sweep of the region pages through every stack, 100 at a time.
+        all_stack_ids = [self.root_stack_id] + self.stack_ids
+        page_start = int(params.get('NextToken', '0'))
+        response = { 'Stacks': [self.__stack(stack_id=stack_id) for stack_id in all_stack_ids[page_start:page_start + 100]] }
+
+        if page_start + 100 < len(all_stack_ids):
+            response.update({ 'NextToken': str(page_start + 100) })
+
+        return 200, response
+
+    def __describe_account(self, params: dict) -> tuple[int, dict]:
+
+        if not self.is_organizations_account:
+            return 400, { 'Error': { 'Code': 'AWSOrganizationsNotInUseException', 'Message': 'Your account is not a member of an organization.' } }
+
+        return 200, { 'Account': { 'Id': params['AccountId'], 'Email': 'aws@example.com', 'Name': 'Benchmark', 'Status': 'ACTIVE' } }
+
+    def __get_alternate_contact(self, params: dict) -> tuple[int, dict]:
+        return 200, { 'AlternateContact': { 'AlternateContactType': params['AlternateContactType'], 'EmailAddress': params['AlternateContactType'].lower() + '@example.com', 'Name': 'Benchmark', 'PhoneNumber': '+10000000000', 'Title': 'Benchmark' } }
+
+    def __get_cost_and_usage(self, params: dict) -> tuple[int, dict]:
+
+        period_start = date.fromisoformat(params['TimePeriod']['Start'])
+        period_end = date.fromisoformat(params['TimePeriod']['End'])
+        current_month_start = date.today().replace(day=1)
+
+        period_starts = []
+        while period_start < period_end:
+            period_starts.append(period_start)
+            period_start = period_start + timedelta(days=1) if params['Granularity'] == 'DAILY' else (period_start + timedelta(days=32)).replace(day=1)
+
+        # Groups are paged 500 at a time, splitting periods across pages as Cost Explorer does.
+        groups = [(period_start, region, service) for period_start in period_starts for region in self.regions for service in self.services]
+        page_start = int(params.get('NextPageToken', '0'))
+
+        results_by_time = {}
+        for period_start, region, service in groups[page_start:page_start + 500]:
+            results_by_time.setdefault(period_start, []).append({
+                'Keys': [region, service] if params['GroupBy'][0]['Key'] == 'REGION' else [service, region],
+                'Metrics': { 'UnblendedCost': { 'Amount': str(round((len(region) + len(service)) * 1.37, 2)), 'Unit': 'USD' } }
+            })
+
+        response = { 'ResultsByTime': [{ 'TimePeriod': { 'Start': period_start.isoformat(), 'End': period_end.isoformat() }, 'Groups': period_groups, 'Estimated': period_start >= (current_month_start - timedelta(days=1)).replace(day=1) } for period_start, period_groups in results_by_time.items()] }
+
+        if page_start + 500 < len(groups):
+            response.update({ 'NextPageToken': str(page_start + 500) })
+
+        return 200, response
+
+# LocalHttpServer - stands in for the API Endpoint, the CloudFormation response URL and the Jira REST API, counting requests per target
+class LocalHttpServer(BaseHTTPRequestHandler):
+
+    http_calls = {}
+    jira_issues = {}
+    lock = threading.Lock()
+
+    # start: Starts the server on a free local port in a daemon thread. Returns the base URL of the server.
+    @classmethod
+    def start(cls) -> str:
+
+        http_server = ThreadingHTTPServer(('127.0.0.1', 0), cls)
+        threading.Thread(target=http_server.serve_forever, daemon=True).start()
+        return 'http://127.0.0.1:' + str(http_server.server_port)
+
+    def log_message(self, *args):
+        pass
+
+    # __count: Counts the request under its target, `endpoint`, `cfn-response` or `jira`.
+    def __count(self) -> str:
+
+        target = self.path.split('/')[1].split('?')[0]
+
+        with self.lock:
+            self.http_calls.update({ target: self.http_calls.get(target, 0) + 1 })
+
+        return target
+
+    # __read_body: Returns the request body as `bytes`.
+    def __read_body(self) -> bytes:
+        return self.rfile.read(int(self.headers['Content-Length'])) if self.headers.get('Content-Length') else b''
+
+    # __send: Sends a JSON response.
+    def __send(self, status_code: int, body = None):
+
+        response_body = json.dumps(body).encode('utf-8') if body is not None else b''
+        self.send_response(status_code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(response_body)))
+        self.end_headers()
+        self.wfile.write(response_body)
+
+    # __jira_create_issue: Stores a Jira issue created from an `issue` or `issue/bulk` body. Returns the created issue reference.
+    def __jira_create_issue(self, issue_update: dict) -> dict:
+
+        with self.lock:
+            issue_id = str(len(self.jira_issues) + 1)
+            self.jira_issues.update({ issue_id: {
+                'id': issue_id,
+                'key': 'BENCH-' + issue_id,
+                'self': 'http://' + self.headers['Host'] + '/jira/rest/api/2/issue/' + issue_id,
+                'fields': issue_update['fields'],
+                'properties': { issue_property['key']: issue_property['value'] for issue_property in issue_update.get('properties', []) }
+            }})
+
+        return { key: self.jira_issues[issue_id][key] for key in ['id', 'key', 'self'] }
+
+    # __jira_search: Answers a JQL search on the summary and labels of the stored issues.
+    def __jira_search(self, query: dict) -> dict:
+
+        jql = query['jql'][0]
+        summaries = re.findall(r'summary ~ "\\"(.*?)\\""', jql)
+        labels = re.findall(r'labels = "(.*?)"', jql)
+        property_keys = query['properties'][0].split(',') if 'properties' in query else []
+
+        issues = []
+        for issue in list(self.jira_issues.values()):
+
+            if summaries and issue['fields']['summary'] not in summaries:
+                continue
+            if labels and not any(label in issue['fields'].get('labels', []) for label in labels):
+                continue
+
+            issues.append({
+                'id': issue['id'],
+                'key': issue['key'],
+                'self': issue['self'],
+                'fields': { 'summary': issue['fields']['summary'], 'labels': issue['fields'].get('labels', []), 'status': { 'name': 'To Do' }, 'updated': '2026-01-01T00:00:00.000+0000' },
+                'properties': { property_key: issue['properties'][property_key] for property_key in property_keys if property_key in issue['properties'] }
+            })
+
+        start_at = int(query.get('startAt', ['0'])[0])
+        max_results = int(query.get('maxResults', ['50'])[0])
+
+        return { 'startAt': start_at, 'maxResults': max_results, 'total': len(issues), 'issues': issues[start_at:start_at + max_results] }
+
+    def do_GET(self):
+
+        self.__count()
+        url = urlparse(self.path)
+
+        if url.path.startswith('/jira/rest/api/2/project/'):
+            return self.__send(200, { 'id': '10000', 'key': url.path.split('/')[-1], 'self': 'http://' + self.headers['Host'] + url.path, 'issueTypes': [{ 'id': '10001', 'name': 'Task' }] })
+        if url.path == '/jira/rest/api/2/search':
+            return self.__send(200, self.__jira_search(query=parse_qs(url.query)))
+        if url.path == '/jira/rest/api/2/field':
+            return self.__send(200, [{ 'id': 'summary', 'name': 'Summary', 'clauseNames': ['summary'] }, { 'id': 'labels', 'name': 'Labels', 'clauseNames': ['labels'] }])
+        if url.path == '/jira/rest/api/2/serverInfo':
+            return self.__send(200, { 'versionNumbers': [1001, 0, 0], 'deploymentType': 'Cloud' })
+
+        self.__send(404, { 'errorMessages': ['Not Found'] })
+
+    def do_POST(self):
+
+        target = self.__count()
+        body = self.__read_body()
+
+        if target != 'jira':
+            return self.__send(200, {})
+        if self.path == '/jira/rest/api/2/issue':
+            return self.__send(201, self.__jira_create_issue(issue_update=json.loads(body)))
+        if self.path == '/jira/rest/api/2/issue/bulk':
+            return self.__send(201, { 'issues': [self.__jira_create_issue(issue_update=issue_update) for issue_update in json.loads(body)['issueUpdates']], 'errors': [] })
+
+        self.__send(404, { 'errorMessages': ['Not Found'] })
+
+    def do_PUT(self):
+
+        target = self.__count()
+        body = self.__read_body()
+
+        if target != 'jira':
+            return self.__send(200, {})
+
+        issue_id = self.path.split('?')[0].split('/')[-1]
+        if issue_id in self.jira_issues:
+            issue_update = json.loads(body)
+            self.jira_issues[issue_id]['fields'].update(issue_update.get('fields', {}))
+            for issue_property in issue_update.get('properties', []):
+                self.jira_issues[issue_id]['properties'].update({ issue_property['key']: issue_property['value'] })
+            return self.__send(204)
+
+        self.__send(404, { 'errorMessages': ['Not Found'] })
+
+# FakeLambdaContext - the parts of the Lambda context object the handler reads
+class FakeLambdaContext:
+
+    log_stream_name = 'benchmark/log-stream'
+    aws_request_id = 'benchmark-request'
+
+    def __init__(self, timeout_seconds: float = 600):
+        self.deadline = time.monotonic() + timeout_seconds
+
+    def get_remaining_time_in_millis(self) -> int:
+        return int((self.deadline - time.monotonic()) * 1000)
+
+# Benchmark - drives custom resource events through `handler.lambda_handler` against FakeAws and LocalHttpServer
+class Benchmark:
+
+    # Benchmark Constructor
+    # base_url: Base URL of the LocalHttpServer
+    # iterations: Number of timed invocations per scenario, after the first, cold-cache invocation
+    # jira_enabled: True to create or update a Jira issue on Create and Update
+    # log_level: `LOGLEVEL` of the handler, errors expected from the stand-ins are hidden by default
+    #
+    # Returns: Benchmark object
+    # Raises: None
+    def __init__(self, base_url: str, iterations: int = 3, jira_enabled: bool = True, log_level: str = 'CRITICAL'):
+
+        self.base_url = base_url
+        self.iterations = iterations
+        self.jira_enabled = jira_enabled
+        self.log_level = log_level
+
+    # __set_environment: Points the handler at the local stand-ins. Must run before `handler` is imported.
+    def __set_environment(self, storage_path: str):
+
+        os.environ.update({
+            'AWS_ACCESS_KEY_ID': 'benchmark',
+            'AWS_SECRET_ACCESS_KEY': 'benchmark',
+            'AWS_DEFAULT_REGION': BENCHMARK_REGION,
+            'LOGLEVEL': self.log_level,
+            'REGION': BENCHMARK_REGION,
+            'AWS_ACCOUNT_ID': BENCHMARK_ACCOUNT_ID,
+            'ENDPOINT_TYPE': 'API',
+            'ENDPOINT_URL': self.base_url + '/endpoint',
+            'STORAGE_LOCAL_PATH': storage_path,
+            'JIRA_ENABLED': str(self.jira_enabled).lower(),
+            'JIRA_CLOUD_URL': self.base_url + '/jira',
+            'JIRA_PROJECT_KEY': 'BENCH',
+            'JIRA_AUTH_EMAIL': 'benchmark@example.com',
+            'JIRA_API_TOKEN': 'benchmark'
+        })
+        os.environ.pop('BOTOCORE_LOGLEVEL', None)
+
+    # __invoke: Runs one invocation of `lambda_handler`. Returns its wall time in milliseconds.
+    def __invoke(self, handler, event: dict) -> float:
+
+        # Expected errors, e.g. a non-Organizations account, are logged with their tracebacks, and the metrics are written to stdout, both are kept out of the report.
+        with contextlib.redirect_stderr(io.StringIO()), contextlib.redirect_stdout(io.StringIO()):
+            start_time = time.perf_counter()
+            handler.lambda_handler(event, FakeLambdaContext())
+            return (time.perf_counter() - start_time) * 1000
+
+    # run_scenario: Runs one scenario against a freshly loaded handler. Returns a `dict` with the cold and median warm wall time, the API and HTTP calls of the cold and of one warm invocation, and the peak traced memory of one warm invocation.
+    def run_scenario(self, scenario: dict) -> dict:
+
+        storage_path = tempfile.mkdtemp(prefix='benchmark-')
+
+        try:
+            self.__set_environment(storage_path=storage_path)
+            os.environ.update({ 'STACK_ID': FakeAws(nested_stacks=0, services=0, regions=0).root_stack_id })
+
+            import handler
+            handler = importlib.reload(handler)
+
+            fake_aws = FakeAws(nested_stacks=scenario['nested_stacks'], services=scenario['services'], regions=scenario['regions'], is_organizations_account=scenario.get('is_organizations_account', False))
+            fake_aws.install(client_factory=handler.client_factory)
+
+            event = {
+                'RequestType': scenario['request_type'],
+                'StackId': fake_aws.root_stack_id,
+                'RequestId': 'benchmark-request',
+                'LogicalResourceId': 'CustomResource',
+                'ResponseURL': self.base_url + '/cfn-response'
+            }
+
+            # Every invocation is a new request, unless the scenario replays a retried one.
+            invocations = itertools.count()
+            get_event = lambda: event if scenario.get('retried') else dict(event, RequestId='benchmark-request-' + str(next(invocations)))
+
+            LocalHttpServer.http_calls.clear()
+            cold_ms = self.__invoke(handler=handler, event=get_event())
+
+            # The cold invocation fills the warm caches, so its calls are reported apart from those of a warm invocation.
+            cold_api_calls = dict(sorted(fake_aws.api_calls.items()))
+            cold_http_calls = dict(sorted(LocalHttpServer.http_calls.items()))
+
+            warm_ms = []
+            for iteration in range(self.iterations):
+                fake_aws.api_calls.clear()
+                LocalHttpServer.http_calls.clear()
+                warm_ms.append(self.__invoke(handler=handler, event=get_event()))
+
+            api_calls = dict(sorted(fake_aws.api_calls.items()))
+            http_calls = dict(sorted(LocalHttpServer.http_calls.items()))
+
+            # Memory is traced in a separate invocation, as tracing slows down every allocation.
+            tracemalloc.start()
+            self.__invoke(handler=handler, event=get_event())
+            peak_memory = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+            return {
+                'scenario': scenario['name'],
+                'cold_ms': round(cold_ms, 1),
+                'warm_ms': round(statistics.median(warm_ms), 1) if warm_ms else None,
+                'cold_api_calls': cold_api_calls,
+                'cold_http_calls': cold_http_calls,
+                'api_calls': api_calls,
+                'http_calls': http_calls,
+                'peak_memory_mb': round(peak_memory / 1024 / 1024, 2)
+            }
+
+        finally:
+            shutil.rmtree(storage_path, ignore_errors=True)
+
+# main: Runs the benchmark scenarios and prints their report.
+def main(argv: list = None) -> int:
+
+    parser = argparse.ArgumentParser(description='Benchmark `handler.lambda_handler` against local AWS and HTTP stand-ins.')
+    parser.add_argument('--scenario', action='append', help='Scenario to run, may be repeated. Defaults to every scenario.')
+    parser.add_argument('--iterations', type=int, default=3, help='Warm invocations per scenario.')
+    parser.add_argument('--no-jira', action='store_true', help='Disable the Jira issue upsert.')
+    parser.add_argument('--log-level', default='CRITICAL', help='`LOGLEVEL` of the handler during the benchmark.')
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON.')
+    arguments = parser.parse_args(argv)
+
+    scenarios = [scenario for scenario in BENCHMARK_SCENARIOS if not arguments.scenario or scenario['name'] in arguments.scenario]
+    if not scenarios:
+        print('Unknown scenario, choose from - ' + ', '.join(scenario['name'] for scenario in BENCHMARK_SCENARIOS), file=sys.stderr)
+        return 1
+
+    benchmark = Benchmark(base_url=LocalHttpServer.start(), iterations=arguments.iterations, jira_enabled=not arguments.no_jira, log_level=arguments.log_level)
+    report = [benchmark.run_scenario(scenario=scenario) for scenario in scenarios]
+
+    if arguments.json:
+        print(json.dumps(report, indent=4))
+        return 0
+
+    for scenario_report in report:
+        print('{:<30} cold {:>8.1f}ms  warm {:>8.1f}ms  peak {:>6.2f}MB'.format(scenario_report['scenario'], scenario_report['cold_ms'], scenario_report['warm_ms'] or 0, scenario_report['peak_memory_mb']))
+        print('{:<30} API  cold {}'.format('', ', '.join(operation + '=' + str(count) for operation, count in scenario_report['cold_api_calls'].items())))
+        print('{:<30} API  warm {}'.format('', ', '.join(operation + '=' + str(count) for operation, count in scenario_report['api_calls'].items())))
+        print('{:<30} HTTP cold {}'.format('', ', '.join(target + '=' + str(count) for target, count in scenario_report['cold_http_calls'].items())))
+        print('{:<30} HTTP warm {}'.format('', ', '.join(target + '=' + str(count) for target, count in scenario_report['http_calls'].items())))
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
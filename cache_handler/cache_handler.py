@@ -0,0 +1,148 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+# CacheHandler - memoizes AWS metadata lookups within a single invocation and across warm Lambda invocations
+class CacheHandler:
+
+    # CacheHandler Constructor
+    # logger: Logger object
+    # ttl_seconds: Time-to-live of entries kept across warm invocations
+    # max_entries: Upper bound on the number of entries kept across warm invocations, least recently used entries are evicted first
+    #
+    # Returns: CacheHandler object
+    # Raises: None
+    def __init__(self, logger: logging.Logger, ttl_seconds: float = 900, max_entries: int = 128):
+
+        self.logger = logger
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._request_entries = {}
+        self._in_flight = {}
+        self._generation = 0
+        self.hits = self.misses = self.evictions = 0
+
+    # begin_request: Drops the request-scoped entries and starts a new generation. Called at the start of every invocation, warm entries are kept until they expire.
+    # Lookups abandoned by an earlier invocation may still be running, so their in-flight loads are no longer waited on and their late request-scoped results are not stored.
+    def begin_request(self):
+
+        with self._lock:
+            self._request_entries.clear()
+            self._in_flight.clear()
+            self._generation += 1
+
+    # get_generation: Returns the current invocation generation, to pass to `put` from a thread that may outlive the invocation.
+    def get_generation(self) -> int:
+        return self._generation
+
+    # __lookup: Returns a tuple of (bool, value), True if a valid entry exists for `key`. Must be called with the lock held.
+    def __lookup(self, key: tuple) -> tuple:
+
+        if key in self._request_entries:
+            return True, self._request_entries[key]
+
+        if key in self._entries:
+
+            expires_at, value = self._entries[key]
+
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                return True, value
+
+            del self._entries[key]
+
+        return False, None
+
+    # __store: Stores `value` against `key`, unless it is request-scoped and was loaded in an earlier `generation`. Must be called with the lock held.
+    def __store(self, key: tuple, value, request_scoped: bool, ttl_seconds: float, generation: int = None):
+
+        if request_scoped:
+
+            if generation is not None and generation != self._generation:
+                self.logger.debug('Cache dropped late request-scoped entry - %s', key)
+                return
+
+            self._request_entries.update({ key: value })
+            return
+
+        self._entries.update({ key: (time.monotonic() + ttl_seconds, value) })
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            evicted_key, evicted_entry = self._entries.popitem(last=False)
+            self.evictions += 1
+            self.logger.debug('Cache evicted - %s', evicted_key)
+
+    # __release_in_flight: Removes the in-flight load of `key`, unless `begin_request` already replaced it. Must be called with the lock held.
+    def __release_in_flight(self, key: tuple, in_flight: Future):
+
+        if self._in_flight.get(key) is in_flight:
+            del self._in_flight[key]
+
+    # get_or_load: Returns the cached value for `key`, calling `loader` on a miss. Concurrent callers asking for the same key wait for the first caller's result instead of repeating the lookup. `request_scoped` entries only live until the next `begin_request`. Exceptions raised by `loader` are not cached.
+    def get_or_load(self, key: tuple, loader, request_scoped: bool = False, ttl_seconds: float = None):
+
+        is_loader = False
+
+        with self._lock:
+
+            found, value = self.__lookup(key)
+            if found:
+                self.hits += 1
+                return value
+
+            in_flight = self._in_flight.get(key)
+            if in_flight is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+                in_flight = self._in_flight[key] = Future()
+                generation = self._generation
+                is_loader = True
+
+        if not is_loader:
+            return in_flight.result()
+
+        try:
+            value = loader()
+
+        except Exception as e:
+            with self._lock:
+                self.__release_in_flight(key, in_flight)
+            in_flight.set_exception(e)
+            raise
+
+        with self._lock:
+            self.__store(key, value, request_scoped, self.ttl_seconds if ttl_seconds is None else ttl_seconds, generation=generation)
+            self.__release_in_flight(key, in_flight)
+
+        in_flight.set_result(value)
+        return value
+
+    # put: Stores `value` against `key` without calling a loader, e.g. to seed entries from a bulk lookup. With a `generation` from `get_generation`, a request-scoped value is dropped once a later invocation began.
+    def put(self, key: tuple, value, request_scoped: bool = False, ttl_seconds: float = None, generation: int = None):
+
+        with self._lock:
+            self.__store(key, value, request_scoped, self.ttl_seconds if ttl_seconds is None else ttl_seconds, generation=generation)
+
+    # invalidate: Removes `key` from both the request-scoped and warm entries.
+    def invalidate(self, key: tuple):
+
+        with self._lock:
+            self._request_entries.pop(key, None)
+            self._entries.pop(key, None)
+
+    # get_stats: Returns a `dict` with the hit, miss and eviction counters and the current number of warm entries.
+    def get_stats(self) -> dict:
+
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries)
+            }
@@ -0,0 +1,107 @@
+import logging
+import threading
+
+# ClientFactory - builds boto3 clients on first use and reuses them for the lifetime of the container
+class ClientFactory:
+
+    # ClientFactory Constructor
+    # logger: Logger object
+    # retries: botocore retry configuration applied to every client
+    # botocore_log_level: Optional log level for boto3/botocore stream logging, applied once boto3 is first imported
+    # credentials: Optional temporary credentials, as returned by `sts:AssumeRole`, used instead of the default credential chain
+    # region_name: Optional AWS region of the clients, defaults to the region of the default session
+    # on_client_created: Optional function called with every client this factory, or a factory it assumes a role with, creates, e.g. to register event hooks
+    #
+    # Returns: ClientFactory object
+    # Raises: None
+    def __init__(self, logger: logging.Logger, retries: dict = None, botocore_log_level: str = None, credentials: dict = None, region_name: str = None, on_client_created = None):
+
+        self.logger = logger
+        self.retries = retries if retries else { 'max_attempts': 0, 'mode': 'standard' }
+        self.botocore_log_level = botocore_log_level
+        self.credentials = credentials
+        self.region_name = region_name
+        self.on_client_created = on_client_created
+        self._lock = threading.Lock()
+        self._clients = {}
+        self._session = None
+        self._client_config = None
+
+    # __get_session: Imports boto3 and botocore on first use, so code paths that never reach AWS do not pay their import cost, and returns the boto3 session of this factory. Must be called with the lock held.
+    def __get_session(self):
+
+        if self._session is None:
+
+            import boto3
+            from botocore.config import Config
+
+            # Setting up logging level specific to `botocore` from the environment variable `BOTOCORE_LOGLEVEL`.
+            if self.botocore_log_level == 'DEBUG':
+                self.logger.info('Setting boto3 logging to DEBUG')
+                boto3.set_stream_logger('') # Log everything on boto3 messages to stdout
+            elif self.botocore_log_level:
+                self.logger.info('Setting boto3 logging to ' + self.botocore_log_level)
+                boto3.set_stream_logger(level=logging._nameToLevel[self.botocore_log_level]) # Log boto3 messages that match BOTOCORE_LOGLEVEL to stdout
+
+            # Wire logs carry credentials and request bodies, so the stream handlers boto3 adds mask secrets too.
+            if self.botocore_log_level:
+                from log_handler.log_handler import install_redaction_filter
+                install_redaction_filter()
+                install_redaction_filter('boto3')
+
+            self._client_config = Config(retries=self.retries)
+
+            # Every factory owns its session, as boto3 sessions must not be shared between threads creating clients.
+            if self.credentials:
+                self._session = boto3.session.Session(
+                    aws_access_key_id=self.credentials['AccessKeyId'],
+                    aws_secret_access_key=self.credentials['SecretAccessKey'],
+                    aws_session_token=self.credentials['SessionToken'],
+                    region_name=self.region_name
+                )
+            else:
+                self._session = boto3.session.Session(region_name=self.region_name)
+
+        return self._session
+
+    # get_client: Returns the boto3 client for `service_name`, creating it on first use. Clients of `region_name` or `endpoint_url` are pooled separately, one per service, region and endpoint, clients without a region use the region of the factory.
+    def get_client(self, service_name: str, region_name: str = None, endpoint_url: str = None):
+
+        client_key = (service_name, region_name, endpoint_url) if endpoint_url else (service_name, region_name) if region_name else service_name
+
+        with self._lock:
+
+            if client_key not in self._clients:
+
+                session = self.__get_session()
+                self.logger.debug('Creating boto3 client - %s%s%s', service_name, ' in ' + region_name if region_name else '', ' for ' + endpoint_url if endpoint_url else '')
+
+                client_parameters = { 'config': self._client_config }
+                if region_name:
+                    client_parameters.update({ 'region_name': region_name })
+                if endpoint_url:
+                    client_parameters.update({ 'endpoint_url': endpoint_url })
+
+                self._clients.update({ client_key: session.client(service_name, **client_parameters) })
+
+                if self.on_client_created:
+                    self.on_client_created(self._clients[client_key])
+
+            return self._clients[client_key]
+
+    # assume_role: Assumes `role_arn` with this factory's credentials. Returns a new ClientFactory whose clients use the temporary credentials of the role.
+    def assume_role(self, role_arn: str, session_name: str, duration_seconds: int = 900):
+
+        assume_role_response = self.get_client('sts').assume_role(
+            RoleArn=role_arn,
+            RoleSessionName=session_name,
+            DurationSeconds=duration_seconds
+        )
+
+        return ClientFactory(
+            logger=self.logger,
+            retries=self.retries,
+            credentials=assume_role_response['Credentials'],
+            region_name=self.region_name,
+            on_client_created=self.on_client_created
+        )
@@ -1,37 +1,174 @@
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from boto3 import client
+from log_handler.log_handler import LazyDump
+from cache_handler.cache_handler import CacheHandler
 
 class CloudFormationStack:
 
     # CloudFormationStack Constructor
     # logger: Logger object
+    # cache: Optional CacheHandler object used to memoize lookups
     #
     # Returns: CloudFormationStack object
     # Raises: None
-    def __init__(self, logger: logging.Logger, cloudformation_client: client):
+    def __init__(self, logger: logging.Logger, cloudformation_client: client, cache: CacheHandler = None):
         
         self.logger = logger
         self.cloudformation_client = cloudformation_client
+        self.cache = cache
 
     # get_stack_outputs: Retrieve CloudFormation Stack outputs from a specific stack using the stack physical resource ID, returns the specific stack outputs as `dict`.
     def get_stack_outputs(self, stack_physical_resource_id: str) -> dict:
+
+        # Stack outputs change on every stack update, so they are only deduplicated within the current invocation.
+        if self.cache:
+            return self.cache.get_or_load(('cloudformation.describe_stacks', stack_physical_resource_id), lambda: self.__get_stack_outputs(stack_physical_resource_id=stack_physical_resource_id), request_scoped=True)
+
+        return self.__get_stack_outputs(stack_physical_resource_id=stack_physical_resource_id)
+
+    # __get_stack_outputs: Uncached `describe_stacks` lookup behind `get_stack_outputs`.
+    def __get_stack_outputs(self, stack_physical_resource_id: str) -> dict:
         
         describe_stacks_response = self.cloudformation_client.describe_stacks(
             StackName=stack_physical_resource_id
         )
 
-        self.logger.debug('Describe Stack Response - ' + str(describe_stacks_response))
+        self.logger.debug('Describe Stack Response - %s', LazyDump(describe_stacks_response))
+
+        stack_output = self.__get_outputs_from_stack(stack=describe_stacks_response['Stacks'][0])
+
+        self.logger.debug('Stack Output - %s', LazyDump(stack_output))
+
+        return { stack_physical_resource_id: stack_output }
+
+    # __get_outputs_from_stack: Converts the `Outputs` of a `describe_stacks` stack entry into a `dict` of output key to output value.
+    def __get_outputs_from_stack(self, stack: dict) -> dict:
 
         stack_output = {}
 
-        if 'Outputs' in describe_stacks_response['Stacks'][0]:
+        if 'Outputs' in stack:
 
-            for output in describe_stacks_response['Stacks'][0]['Outputs']:
+            for output in stack['Outputs']:
 
                 stack_output.update({ 
                     output['OutputKey']: output['OutputValue']
                 })
 
-        self.logger.debug('Stack Output - ' + str(stack_output))
+        return stack_output
+
+    # __sweep_stack_outputs: Pages through `describe_stacks` for every stack in the region, indexing the outputs of the stacks in `stack_ids`, and with `include_descendants` of every stack below `root_stack_id`, by StackId. Stops as soon as every stack in `stack_ids` was found, unless descendants are wanted, or after `max_sweep_pages` pages. Returns a tuple of (dict, dict), the StackId to stack outputs and the StackId to the StackId of its parent stack.
+    def __sweep_stack_outputs(self, root_stack_id: str, stack_ids: list, max_sweep_pages: int, include_descendants: bool = False) -> tuple[dict, dict]:
+
+        wanted_stack_ids = set(stack_ids)
+        stack_outputs_by_id = {}
+        parent_stack_ids = {}
+        describe_stacks_parameters = {}
+        page_count = 0
+
+        while page_count < max_sweep_pages:
+
+            describe_stacks_response = self.cloudformation_client.describe_stacks(**describe_stacks_parameters)
+            page_count += 1
+
+            for stack in describe_stacks_response['Stacks']:
+
+                if stack['StackId'] in wanted_stack_ids or stack.get('RootId') == root_stack_id:
+                    stack_outputs_by_id.update({ stack['StackId']: self.__get_outputs_from_stack(stack=stack) })
+                    parent_stack_ids.update({ stack['StackId']: stack.get('ParentId') })
+
+            if (not include_descendants and wanted_stack_ids.issubset(stack_outputs_by_id.keys())) or not describe_stacks_response.get('NextToken'):
+                break
+
+            describe_stacks_parameters.update({ 'NextToken': describe_stacks_response['NextToken'] })
+
+        self.logger.debug('Describe Stacks sweep read %d page(s), found %d of %d stack(s).', page_count, len(stack_outputs_by_id), len(wanted_stack_ids))
+
+        return stack_outputs_by_id, parent_stack_ids
+
+    # __get_descendant_stack_ids: Returns the StackIds below the stacks in `stack_ids` in breadth-first order, following the `ParentId` of every swept stack.
+    def __get_descendant_stack_ids(self, stack_ids: list, parent_stack_ids: dict) -> list:
+
+        child_stack_ids = {}
+        for stack_id, parent_stack_id in parent_stack_ids.items():
+            child_stack_ids.setdefault(parent_stack_id, []).append(stack_id)
+
+        descendant_stack_ids = []
+        stacks_to_visit = list(stack_ids)
+
+        while stacks_to_visit:
+
+            for child_stack_id in child_stack_ids.get(stacks_to_visit.pop(0), []):
+                if child_stack_id not in stack_ids and child_stack_id not in descendant_stack_ids:
+                    descendant_stack_ids.append(child_stack_id)
+                    stacks_to_visit.append(child_stack_id)
+
+        return descendant_stack_ids
+
+    # __get_stack_outputs_or_none: `get_stack_outputs` for one stack of a tree, returns None rather than raising if the stack cannot be described, e.g. as it was deleted, so the rest of the tree is still collected.
+    def __get_stack_outputs_or_none(self, stack_id: str) -> dict:
+
+        try:
+            return self.get_stack_outputs(stack_physical_resource_id=stack_id)
+
+        except Exception:
+            self.logger.exception('Stack `' + stack_id + '` could not be described, skipping its outputs')
+            return None
+
+    # get_nested_stack_tree_outputs: Retrieve the outputs of every stack in `stack_ids`, the nested stacks of `root_stack_id`, and with `include_descendants` of every stack below them, returns a `dict` of StackId to stack outputs in the order of `stack_ids`, followed by their descendants breadth-first. Stacks that cannot be described are left out.
+    # Descendants, and trees of at least `sweep_threshold` stacks, are read with one paginated `describe_stacks` sweep of the region, so the number of calls scales with pages rather than stacks, and the tree below `stack_ids` is found through the `ParentId` of every stack. Small trees, and stacks a sweep capped at `max_sweep_pages` did not reach, are described individually on up to `max_workers` threads.
+    def get_nested_stack_tree_outputs(self, root_stack_id: str, stack_ids: list, include_descendants: bool = False, sweep_threshold: int = 5, max_sweep_pages: int = 10, max_workers: int = 8) -> dict:
+
+        stack_outputs_by_id = {}
+        descendant_stack_ids = []
+        cache_generation = self.cache.get_generation() if self.cache else None
+
+        if stack_ids and (include_descendants or len(stack_ids) >= sweep_threshold):
+
+            swept_stack_outputs, parent_stack_ids = self.__sweep_stack_outputs(root_stack_id=root_stack_id, stack_ids=stack_ids, max_sweep_pages=max_sweep_pages, include_descendants=include_descendants)
+            stack_outputs_by_id.update(swept_stack_outputs)
+
+            if include_descendants:
+                descendant_stack_ids = self.__get_descendant_stack_ids(stack_ids=stack_ids, parent_stack_ids=parent_stack_ids)
+
+            if self.cache:
+                for stack_id, stack_output in stack_outputs_by_id.items():
+                    self.cache.put(('cloudformation.describe_stacks', stack_id), { stack_id: stack_output }, request_scoped=True, generation=cache_generation)
+
+        remaining_stack_ids = [stack_id for stack_id in stack_ids if stack_id not in stack_outputs_by_id]
+
+        if remaining_stack_ids:
+
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+
+                for stack_output in executor.map(lambda stack_id: self.__get_stack_outputs_or_none(stack_id=stack_id), remaining_stack_ids):
+                    if stack_output:
+                        stack_outputs_by_id.update(stack_output)
+
+        return { stack_id: stack_outputs_by_id[stack_id] for stack_id in stack_ids + descendant_stack_ids if stack_id in stack_outputs_by_id }
+
+    # get_stack_tree: Lists the nested stack tree of `stack_name` without waiting on its deployment, breadth-first through `describe_stack_resources`. Returns a tuple (str, list), the StackId of the root stack and the StackIds of its nested stacks.
+    def get_stack_tree(self, stack_name: str) -> tuple[str, list]:
+
+        root_stack_id = None
+        nested_stack_ids = []
+        stacks_to_visit = [stack_name]
+
+        while stacks_to_visit:
+
+            describe_stack_resources_response = self.cloudformation_client.describe_stack_resources(
+                StackName=stacks_to_visit.pop(0)
+            )
+
+            for stack_resource in describe_stack_resources_response['StackResources']:
+
+                if root_stack_id is None:
+                    root_stack_id = stack_resource['StackId']
+
+                if stack_resource['ResourceType'] == 'AWS::CloudFormation::Stack' and stack_resource.get('PhysicalResourceId'):
+                    nested_stack_ids.append(stack_resource['PhysicalResourceId'])
+                    stacks_to_visit.append(stack_resource['PhysicalResourceId'])
+
+        self.logger.debug('Stack `%s` has %d nested stack(s).', stack_name, len(nested_stack_ids))
 
-        return { stack_physical_resource_id: stack_output }  
\ No newline at end of file
+        return root_stack_id if root_stack_id else stack_name, nested_stack_ids
@@ -0,0 +1,86 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from botocore.exceptions import ClientError
+from client_factory.client_factory import ClientFactory
+from cloudformation_stack.cloudformation_stack import CloudFormationStack
+
+# RegionalStacks - collects the outputs of the same CloudFormation stack deployed in several regions, using one pooled CloudFormation client per region
+class RegionalStacks:
+
+    # RegionalStacks Constructor
+    # logger: Logger object
+    # client_factory: ClientFactory object pooling the regional CloudFormation clients
+    # max_workers: Upper bound on the number of regions collected at the same time
+    # region_catalog: Optional RegionCatalog object, used to skip regions outside the partition of the collection
+    #
+    # Returns: RegionalStacks object
+    # Raises: None
+    def __init__(self, logger: logging.Logger, client_factory: ClientFactory, max_workers: int = 8, region_catalog = None):
+
+        self.logger = logger
+        self.client_factory = client_factory
+        self.max_workers = max_workers
+        self.region_catalog = region_catalog
+        self.cloudformation_stacks = {}
+
+    # get_cloudformation_stack: Returns the CloudFormationStack object of `region_name`, reused across invocations.
+    def get_cloudformation_stack(self, region_name: str) -> CloudFormationStack:
+
+        if region_name not in self.cloudformation_stacks:
+            self.cloudformation_stacks.update({ region_name: CloudFormationStack(logger=self.logger, cloudformation_client=self.client_factory.get_client('cloudformation', region_name=region_name)) })
+
+        return self.cloudformation_stacks[region_name]
+
+    # __collect_region: Lists the nested stack tree of `stack_name` in `region_name` with `describe_stack_resources` and reads the outputs of the tree with `describe_stacks`. Returns a tuple (str, dict), the region and the stack outputs keyed by StackId, empty if the stack does not exist or could not be read in that region.
+    def __collect_region(self, region_name: str, stack_name: str) -> tuple[str, dict]:
+
+        try:
+            cloudformation_stack = self.get_cloudformation_stack(region_name=region_name)
+            root_stack_id, nested_stack_ids = cloudformation_stack.get_stack_tree(stack_name=stack_name)
+
+            return region_name, cloudformation_stack.get_nested_stack_tree_outputs(
+                root_stack_id=root_stack_id,
+                stack_ids=[root_stack_id] + nested_stack_ids
+            )
+
+        # Most regions of the list do not have the stack, an expected outcome rather than an error.
+        except ClientError as e:
+
+            if e.response.get('Error', {}).get('Code') == 'ValidationError' and 'does not exist' in e.response.get('Error', {}).get('Message', ''):
+                self.logger.debug('Stack `' + stack_name + '` does not exist in ' + region_name)
+            else:
+                self.logger.exception('Stack `' + stack_name + '` could not be read in ' + region_name + ' Error')
+
+            return region_name, {}
+
+        except Exception as e:
+            self.logger.exception('Stack `' + stack_name + '` could not be read in ' + region_name + ' Error')
+            return region_name, {}
+
+    # get_regional_stack_outputs: Collects the outputs of the `stack_name` stack tree in every region of `regions_list` in parallel. When `partition` and the `region_catalog` are given, regions of other partitions, which the credentials cannot reach, are skipped. Returns a `dict` of region to stack outputs keyed by StackId, in the order of `regions_list`, leaving out regions where the stack was not found.
+    def get_regional_stack_outputs(self, stack_name: str, regions_list: list, partition: str = None) -> dict:
+
+        regional_stack_outputs = {}
+
+        if partition and self.region_catalog:
+
+            skipped_regions = [region_name for region_name in regions_list if self.region_catalog.get_partition(region_id=region_name) != partition]
+
+            if skipped_regions:
+                self.logger.info('Skipping region(s) outside the `' + partition + '` partition - ' + str(skipped_regions))
+                regions_list = [region_name for region_name in regions_list if region_name not in skipped_regions]
+
+        # Clients are created up front, as the regional CloudFormationStack objects are shared across threads.
+        for region_name in regions_list:
+            self.get_cloudformation_stack(region_name=region_name)
+
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(regions_list)))) as executor:
+
+            for region_name, stack_outputs in executor.map(lambda region_name: self.__collect_region(region_name=region_name, stack_name=stack_name), regions_list):
+
+                if stack_outputs:
+                    regional_stack_outputs.update({ region_name: stack_outputs })
+
+        self.logger.info('Stack `' + stack_name + '` found in ' + str(len(regional_stack_outputs)) + ' of ' + str(len(regions_list)) + ' region(s)')
+
+        return regional_stack_outputs
@@ -0,0 +1,132 @@
+import logging
+import random
+import time
+from boto3 import client
+from log_handler.log_handler import LazyDump
+
+# Resource statuses of a nested stack that mean it has finished deploying, for both Create and Update events.
+NESTED_STACK_COMPLETE_STATUSES = ['CREATE_COMPLETE', 'UPDATE_COMPLETE', 'IMPORT_COMPLETE']
+
+# Resource statuses of a nested stack that will never reach a complete status within this deployment, including a rolled back nested stack and a retained one.
+NESTED_STACK_FAILED_STATUSES = ['CREATE_FAILED', 'UPDATE_FAILED', 'DELETE_IN_PROGRESS', 'DELETE_COMPLETE', 'DELETE_FAILED', 'DELETE_SKIPPED', 'IMPORT_FAILED', 'ROLLBACK_COMPLETE', 'ROLLBACK_FAILED', 'UPDATE_ROLLBACK_COMPLETE', 'UPDATE_ROLLBACK_FAILED']
+
+# StackWaiter - waits for the nested stacks of a CloudFormation stack to finish deploying, following stack events incrementally
+class StackWaiter:
+
+    # StackWaiter Constructor
+    # logger: Logger object
+    # cloudformation_client: CloudFormation boto3 client
+    # base_delay: Initial delay in seconds between polls
+    # max_delay: Upper bound in seconds of the delay between polls
+    #
+    # Returns: StackWaiter object
+    # Raises: None
+    def __init__(self, logger: logging.Logger, cloudformation_client: client, base_delay: float = 1.0, max_delay: float = 20.0):
+
+        self.logger = logger
+        self.cloudformation_client = cloudformation_client
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    # __get_nested_stack_resources: Returns a `list` of the `AWS::CloudFormation::Stack` resources directly within `stack_id`.
+    def __get_nested_stack_resources(self, stack_id: str) -> list:
+
+        describe_stack_resources_response = self.cloudformation_client.describe_stack_resources(
+            StackName=stack_id
+        )
+
+        self.logger.debug('Describe Stack Resources Response - %s', LazyDump(describe_stack_resources_response))
+
+        return [stack_resource for stack_resource in describe_stack_resources_response['StackResources'] if stack_resource['ResourceType'] == 'AWS::CloudFormation::Stack']
+
+    # __get_new_stack_events: Returns a tuple of (str, list), the new event cursor and the stack events newer than `cursor`, oldest first. With no cursor only the latest event is read, to position the cursor.
+    def __get_new_stack_events(self, stack_id: str, cursor: str) -> tuple[str, list]:
+
+        new_stack_events = []
+        describe_stack_events_parameters = { 'StackName': stack_id }
+
+        while True:
+
+            describe_stack_events_response = self.cloudformation_client.describe_stack_events(**describe_stack_events_parameters)
+
+            for stack_event in describe_stack_events_response['StackEvents']:
+
+                # Events are returned newest first, so reading stops at the last event already seen.
+                if cursor is None or stack_event['EventId'] == cursor:
+                    return (new_stack_events[0]['EventId'] if new_stack_events else stack_event['EventId']), list(reversed(new_stack_events))
+
+                new_stack_events.append(stack_event)
+
+            if not describe_stack_events_response.get('NextToken'):
+                break
+
+            describe_stack_events_parameters.update({ 'NextToken': describe_stack_events_response['NextToken'] })
+
+        return (new_stack_events[0]['EventId'] if new_stack_events else cursor), list(reversed(new_stack_events))
+
+    # __get_pending_resources: Returns a `dict` of the `nested_stack_resources` not yet in a complete or failed status, keyed by their logical ID.
+    def __get_pending_resources(self, nested_stack_resources: list) -> dict:
+
+        pending_resources = { stack_resource['LogicalResourceId']: stack_resource for stack_resource in nested_stack_resources if stack_resource['ResourceStatus'] not in NESTED_STACK_COMPLETE_STATUSES + NESTED_STACK_FAILED_STATUSES }
+
+        self.logger.debug('Nested CloudFormation Total Stack(s) Count - %d, pending - %s', len(nested_stack_resources), LazyDump(list(pending_resources.keys())))
+
+        return pending_resources
+
+    # __get_backoff_delay: Returns the jittered exponential delay in seconds before poll number `attempt`.
+    def __get_backoff_delay(self, attempt: int) -> float:
+        return random.uniform(self.base_delay, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    # __wait_for_stack: Waits for the nested stacks directly within `stack_id`. Returns a tuple of (bool, list), True if all of them completed, and the nested stack resources with their latest status.
+    def __wait_for_stack(self, stack_id: str, deadline: float) -> tuple[bool, list]:
+
+        nested_stack_resources = self.__get_nested_stack_resources(stack_id=stack_id)
+        pending_resources = self.__get_pending_resources(nested_stack_resources=nested_stack_resources)
+
+        if not pending_resources:
+            return all(stack_resource['ResourceStatus'] in NESTED_STACK_COMPLETE_STATUSES for stack_resource in nested_stack_resources), nested_stack_resources
+
+        # The resources are read again once the event cursor is positioned, so a nested stack completing before the cursor is not waited for until the timeout.
+        cursor, stack_events = self.__get_new_stack_events(stack_id=stack_id, cursor=None)
+        pending_resources = self.__get_pending_resources(nested_stack_resources=self.__get_nested_stack_resources(stack_id=stack_id))
+        attempt = 0
+
+        while pending_resources:
+
+            remaining_time = deadline - time.monotonic()
+            if remaining_time <= 0:
+                self.logger.error('Timed out waiting for nested stack(s) - ' + str(list(pending_resources.keys())))
+                return False, self.__get_nested_stack_resources(stack_id=stack_id)
+
+            delay = min(self.__get_backoff_delay(attempt=attempt), remaining_time)
+            self.logger.debug('Nested stack(s) still in progress, polling stack events again in %.2f seconds...', delay)
+            time.sleep(delay)
+
+            cursor, stack_events = self.__get_new_stack_events(stack_id=stack_id, cursor=cursor)
+            progressed = False
+
+            for stack_event in stack_events:
+
+                if stack_event['LogicalResourceId'] in pending_resources and stack_event.get('PhysicalResourceId') != stack_id:
+
+                    progressed = True
+                    self.logger.debug('Nested stack `%s` is %s', stack_event['LogicalResourceId'], stack_event['ResourceStatus'])
+
+                    if stack_event['ResourceStatus'] in NESTED_STACK_COMPLETE_STATUSES + NESTED_STACK_FAILED_STATUSES:
+                        pending_resources.pop(stack_event['LogicalResourceId'])
+
+            # Progress resets the backoff, an idle stack backs off further on every poll.
+            attempt = 0 if progressed else attempt + 1
+
+        # One final read confirms the terminal status of every nested stack and picks up their physical IDs.
+        nested_stack_resources = self.__get_nested_stack_resources(stack_id=stack_id)
+        return all(stack_resource['ResourceStatus'] in NESTED_STACK_COMPLETE_STATUSES for stack_resource in nested_stack_resources), nested_stack_resources
+
+    # wait_for_nested_stacks: Waits for every nested stack directly within `stack_id` to reach `CREATE_COMPLETE` or `UPDATE_COMPLETE`. A nested stack only completes once its own nested stacks did, so grandchild stacks are not polled. Returns a tuple of (bool, list), True if every nested stack completed within `timeout` seconds, and the nested stack resources with their latest status.
+    def wait_for_nested_stacks(self, stack_id: str, timeout: float = 540) -> tuple[bool, list]:
+
+        stacks_complete, nested_stack_resources = self.__wait_for_stack(stack_id=stack_id, deadline=time.monotonic() + timeout)
+
+        self.logger.debug('Nested CloudFormation Stacks - %s', LazyDump([stack_resource.get('PhysicalResourceId') for stack_resource in nested_stack_resources]))
+
+        return stacks_complete, nested_stack_resources
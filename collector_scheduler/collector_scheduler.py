@@ -0,0 +1,178 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# Payload keys listing the collectors that ran out of time, and the collectors that raised or were skipped as a dependency failed. The keys of these collectors are absent from the payload.
+MISSING_COLLECTORS_KEY = 'MissingCollectors'
+FAILED_COLLECTORS_KEY = 'FailedCollectors'
+
+# CollectorScheduler - runs the payload collectors of a single invocation on a bounded thread pool, honouring the dependencies between them
+class CollectorScheduler:
+
+    # CollectorScheduler Constructor
+    # logger: Logger object
+    # max_workers: Upper bound on the number of collectors running at the same time
+    #
+    # Returns: CollectorScheduler object
+    # Raises: None
+    def __init__(self, logger: logging.Logger, max_workers: int = 8):
+
+        self.logger = logger
+        self.max_workers = max_workers
+        self.collectors = {}
+        self.timings = {}
+        self.start_times = {}
+        self.missing = []
+        self.failed = []
+
+    # add_collector: Registers a collector. `collector_function` takes no arguments and returns a `dict` to be merged into the payload. `depends_on` lists the collector names that must finish before this collector starts. A collector still running `timeout` seconds after it started is abandoned and marked missing. Registration order is the order in which results are merged.
+    def add_collector(self, name: str, collector_function, depends_on: list = None, timeout: float = None):
+
+        if name in self.collectors:
+            raise ValueError('Collector `' + name + '` is already registered.')
+
+        self.collectors.update({
+            name: {
+                'function': collector_function,
+                'depends_on': list(depends_on) if depends_on else [],
+                'timeout': timeout
+            }
+        })
+
+    # __run_collector: Wraps a collector to capture its wall time. Returns a tuple of (bool, dict), True if the collector succeeded.
+    def __run_collector(self, name: str) -> tuple[bool, dict]:
+
+        start_time = time.perf_counter()
+        self.start_times.update({ name: time.monotonic() })
+
+        try:
+            result = self.collectors[name]['function']()
+            return True, result if result else {}
+
+        except Exception:
+            self.logger.exception('Collector `' + name + '` Error')
+            return False, {}
+
+        finally:
+            self.timings.update({ name: time.perf_counter() - start_time })
+            self.logger.info('Collector `' + name + '` completed in ' + str(round(self.timings[name] * 1000, 1)) + 'ms')
+
+    # __get_wait_timeout: Returns the seconds until the next running collector or the run itself reaches its deadline, at most a second as queued collectors have no start time yet, or None if nothing has a deadline.
+    def __get_wait_timeout(self, running_names: list, run_deadline: float) -> float:
+
+        now = time.monotonic()
+        deadlines = [run_deadline] if run_deadline is not None else []
+
+        for name in running_names:
+            if self.collectors[name]['timeout'] is not None:
+                deadlines.append(self.start_times[name] + self.collectors[name]['timeout'] if name in self.start_times else now + 1)
+
+        return max(0.0, min(min(deadlines) - now, 1.0)) if deadlines else None
+
+    # __is_overdue: Returns True if the running collector `name` passed its own timeout, or the run passed `run_deadline`.
+    def __is_overdue(self, name: str, run_deadline: float) -> bool:
+
+        now = time.monotonic()
+        timeout = self.collectors[name]['timeout']
+
+        return run_deadline is not None and now >= run_deadline or timeout is not None and name in self.start_times and now - self.start_times[name] >= timeout
+
+    # run: Executes every registered collector, starting each one as soon as its dependencies have completed. Collectors that raise, and collectors whose dependencies failed, are listed in `failed`. Collectors past their own timeout, or still running or not yet started `timeout` seconds into the run, are abandoned and listed in `missing`, along with the collectors depending on them. Returns a `dict` of collector name to result `dict`, in registration order.
+    def run(self, timeout: float = None) -> dict:
+
+        for name, collector in self.collectors.items():
+            for dependency in collector['depends_on']:
+                if dependency not in self.collectors:
+                    raise ValueError('Collector `' + name + '` depends on unknown collector `' + dependency + '`.')
+
+        results = {}
+        failed = set()
+        pending = list(self.collectors.keys())
+        running = {}
+        run_deadline = time.monotonic() + timeout if timeout is not None else None
+
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+
+        try:
+            while pending or running:
+
+                for name in list(pending):
+
+                    dependencies = self.collectors[name]['depends_on']
+
+                    if any(dependency in self.missing for dependency in dependencies):
+                        self.logger.error('Collector `' + name + '` missing as a dependency ran out of time.')
+                        self.missing.append(name)
+                        failed.add(name)
+                        pending.remove(name)
+
+                    elif any(dependency in failed for dependency in dependencies):
+                        self.logger.error('Collector `' + name + '` skipped as a dependency failed.')
+                        self.failed.append(name)
+                        failed.add(name)
+                        pending.remove(name)
+
+                    elif all(dependency in results for dependency in dependencies):
+
+                        if run_deadline is not None and time.monotonic() >= run_deadline:
+                            self.logger.error('Collector `' + name + '` missing as the collection ran out of time.')
+                            self.missing.append(name)
+                            failed.add(name)
+                        else:
+                            running.update({ executor.submit(self.__run_collector, name): name })
+
+                        pending.remove(name)
+
+                if not running:
+
+                    if pending:
+                        raise ValueError('Collector dependency cycle detected between - ' + str(pending))
+
+                    break
+
+                done, not_done = wait(running.keys(), timeout=self.__get_wait_timeout(running_names=list(running.values()), run_deadline=run_deadline), return_when=FIRST_COMPLETED)
+
+                for future in done:
+
+                    name = running.pop(future)
+                    succeeded, result = future.result()
+
+                    if succeeded:
+                        results.update({ name: result })
+                    else:
+                        self.failed.append(name)
+                        failed.add(name)
+
+                # Threads cannot be interrupted, so collectors past their deadline are abandoned and their late results ignored.
+                for future in not_done:
+
+                    name = running[future]
+
+                    if self.__is_overdue(name=name, run_deadline=run_deadline):
+                        self.logger.error('Collector `' + name + '` ran out of time, abandoning it.')
+                        self.missing.append(name)
+                        failed.add(name)
+                        running.pop(future)
+
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        slowest_collector = max(self.timings, key=self.timings.get) if self.timings else ''
+        self.logger.info('Slowest collector - `' + slowest_collector + '`' if slowest_collector else 'No collectors were run.')
+
+        return { name: results[name] for name in self.collectors.keys() if name in results }
+
+    # merge_results: Merges the collector results into `payload` in registration order, so the resulting key order does not depend on completion order. Collectors that ran out of time are listed under `MissingCollectors`, collectors that failed or were skipped under `FailedCollectors`. Returns the updated `dict`.
+    def merge_results(self, payload: dict, results: dict) -> dict:
+
+        for name in self.collectors.keys():
+            if name in results:
+                payload.update(results[name])
+
+        if self.missing:
+            payload.update({ MISSING_COLLECTORS_KEY: [name for name in self.collectors.keys() if name in self.missing] })
+
+        if self.failed:
+            payload.update({ FAILED_COLLECTORS_KEY: [name for name in self.collectors.keys() if name in self.failed] })
+
+        return payload
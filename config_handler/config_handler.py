@@ -1,8 +1,9 @@
-from os import environ, getcwd, listdir
-import re
+from os import environ, getcwd, path, stat
 import logging
-import traceback
+import hashlib
+import threading
 import json
+from log_handler.log_handler import LazyDump, register_secret
 
 # The ConfigMap - Mapping between runtime environment variable keys and JSON Config keys. Will need to append 'INPUT_' when looking to map within GitHub Actions environment
 ConfigKeyValuePair = {
@@ -14,189 +15,149 @@ ConfigKeyValuePair = {
     'JIRA_ENABLED': 'jira.enabled'
 }
 
+# The ConfigSchema - Type and default of every JSON Config key of the ConfigMap. Keys without an entry are strings defaulting to ''.
+ConfigSchema = {
+    'jira.default_issue_labels': (list, []),
+    'jira.enabled': (bool, False)
+}
+
+# JSON Config keys that must be set, to a non-empty value, when the parent section is enabled.
+ConfigRequiredFields = {
+    'jira': ['jira.cloud_url', 'jira.project_key', 'jira.auth_email', 'jira.api_token']
+}
+
+# Loaded configuration kept across warm invocations, keyed on the config.json path, its modification time and a fingerprint of the environment variables read.
+config_cache = {}
+config_cache_lock = threading.Lock()
+
 # ConfigHandler: class to handle configuration file and environment variables
 class ConfigHandler():
 
     # ConfigHandler Constructor
-    # jira_cloud_url: str
-    # jira_project_key: str
-    # jira_auth_email: str
-    # jira_api_token: str
-    # jira_default_issue_labels: list
-    # jira_enabled: bool
+    # logger: Logger object
     #
     # Returns: ConfigHandler object
     # Raises: None
     def __init__(self, logger: logging.Logger):
 
-        # Create a JSON Config parser
         self.logger = logger
-        self.jira_cloud_url = self.jira_project_key = self.jira_auth_email = self.jira_api_token = ''
-        self.jira_default_issue_labels = []
-        self.jira_enabled = False
-        self.config = self.build_config()
-        self.required_fields = ['jira.cloud_url', 'jira.project_key', 'jira.auth_email', 'jira.api_token']
+        self.is_github_actions = bool(environ.get('GITHUB_ACTIONS'))
+
+        # Inside GitHub Actions, inputs are passed as environment variables prefixed with `INPUT_`.
+        self.env_keys = { ('INPUT_' + env_key if self.is_github_actions else env_key): config_key for env_key, config_key in ConfigKeyValuePair.items() }
 
     # Get Boolean
-    def get_boolean(self, key: str):
-        return True if str(key).lower() == 'true' and key != '' else False
-
-    # Build the Config object
-    def build_config(self) -> dict:
-        return {
-            'jira': {
-                'cloud_url': self.jira_cloud_url,
-                'project_key': self.jira_project_key,
-                'auth_email': self.jira_auth_email,
-                'api_token': self.jira_api_token,
-                'default_issue_labels': self.jira_default_issue_labels,
-                'enabled': False
-            }
-        }
-
-    # Load the config.json file from the current working directory, or from the GITHUB_WORKSPACE environment variable if running inside GitHub Actions
-    def __load_config_file(self) -> dict:
+    def get_boolean(self, key) -> bool:
+        return key if isinstance(key, bool) else str(key).strip().lower() == 'true'
 
-        try:
-            config = {}
-            local_directory = getcwd()
+    # __convert_value: Converts a value from config.json or an environment variable to the type of `config_key` in the ConfigSchema. Lists are also accepted as comma separated strings.
+    def __convert_value(self, config_key: str, value):
 
-            if 'GITHUB_ACTIONS' in environ.keys():
+        value_type = ConfigSchema[config_key][0] if config_key in ConfigSchema else str
 
-                self.logger.debug('Running inside GitHub Actions')
-                local_directory = environ.get('GITHUB_WORKSPACE')
+        if value_type is bool:
+            return self.get_boolean(value)
 
-            for file in listdir(local_directory):
+        if value_type is list:
+            if isinstance(value, list):
+                return [str(item) for item in value]
+            return [item.strip() for item in str(value).split(',') if item.strip()]
 
-                if file == 'config.json':
+        return '' if value is None else str(value)
 
-                    with open('config.json', 'r+') as config_file:
+    # __get_config_file_path: Returns the path of config.json, within GITHUB_WORKSPACE when running inside GitHub Actions, else within the current working directory.
+    def __get_config_file_path(self) -> str:
 
-                        config = json.loads(config_file.read())
+        if self.is_github_actions and environ.get('GITHUB_WORKSPACE'):
+            return path.join(environ['GITHUB_WORKSPACE'], 'config.json')
 
-                        self.logger.debug("JSON Config - " + str(config))
+        return path.join(getcwd(), 'config.json')
 
-            return config if config else self.config
-        
-        except Exception as e:
-            self.logger.error('Error loading config.json file: ' + str(traceback.print_tb(e.__traceback__)))
+    # __get_cache_key: Returns the cache key of the configuration, the config.json path and modification time, or None if there is no config.json, and a digest of the environment variables the ConfigMap reads.
+    def __get_cache_key(self, config_file_path: str) -> tuple:
+
+        try:
+            config_file_mtime = stat(config_file_path).st_mtime_ns
+        except OSError:
+            config_file_mtime = None
+
+        env_fingerprint = hashlib.sha256(json.dumps([environ.get(env_key) for env_key in self.env_keys.keys()]).encode('utf-8')).hexdigest()
 
-    # Load the config.json file from environment variables instead if running inside GitHub Actions. Environment variables override config.json values to enable CI workflows.
-    def __load_config_env(self) -> dict:
+        return (config_file_path, config_file_mtime, env_fingerprint)
+
+    # __load_config_file: Returns the parsed config.json as `dict`, or an empty `dict` if there is none or it cannot be read.
+    def __load_config_file(self, config_file_path: str) -> dict:
 
         try:
-            config = {}
-
-            temp_list = []
-            for config_key, config_value in ConfigKeyValuePair.items():
-        
-                if 'GITHUB_ACTIONS' in environ.keys():
-                        if environ['GITHUB_ACTIONS']:
-                            config_key = 'INPUT_' + config_key
-
-                if config_key in environ.keys():
-                    self.logger.debug('Config found within environment variables - ' + str(config_key) + ' - ' + str(config_value))
-                    temp_list.append(config_value)
-
-            self.logger.debug('ConfigMap JSON key values found within environment variables - ' + str(temp_list))
-
-            unique_parent_list = []
-            for item in temp_list:
-                if item.split('.')[0] not in unique_parent_list:
-                    unique_parent_list.append(item.split('.')[0])
-
-            self.logger.debug('Parent config attributes found within environment variables - ' + str(unique_parent_list))
-
-            for parent_item in unique_parent_list:
-
-                temp_config_dict = {}
-                for list_item in [x for x in temp_list if re.match(parent_item+'.*', x)]:
-
-                    if 'GITHUB_ACTIONS' in environ.keys():
-                        if environ['GITHUB_ACTIONS']:
-                            list_item = 'INPUT_' + list_item
-
-                    self.logger.debug('Config `' + str(list_item) + '` within parent `' + str(parent_item) + '` - ' + str(environ[list_item.replace('.', '_').upper()]))
-
-                    item_path = list_item.split('.')
-                    for item in reversed(item_path):
-                        
-                        if 'GITHUB_ACTIONS' in environ.keys():
-                            if environ['GITHUB_ACTIONS']:
-                                if list_item == 'INPUT_jira.default_issue_labels':
-                                    temp_config_dict.update({
-                                        item: environ[list_item.replace('.', '_').upper()].split(',')
-                                    })
-                                else:
-                                    if list_item in ['INPUT_jira.enabled']:
-                                        temp_config_dict.update({
-                                            item: self.get_boolean(environ[list_item.replace('.', '_').upper()])
-                                        })
-                                    else:
-                                        temp_config_dict.update({
-                                            item: environ[list_item.replace('.', '_').upper()]
-                                        })
-                                config.update({list_item.split('.')[0].replace('INPUT_',''): temp_config_dict})
-                                break
-                        else:
-                            if list_item == 'jira.default_issue_labels':
-                                temp_config_dict.update({
-                                    item: environ[list_item.replace('.', '_').upper()].split(',')
-                                })
-                            else:
-                                if list_item in ['jira.enabled']:
-                                    temp_config_dict.update({
-                                        item: self.get_boolean(environ[list_item.replace('.', '_').upper()])
-                                    })
-                                else:
-                                    temp_config_dict.update({
-                                        item: environ[list_item.replace('.', '_').upper()]
-                                    })
-                            config.update({list_item.split('.')[0]: temp_config_dict})
-                            break
-            self.logger.debug('Config from environment variables - ' + str(config))
-            return config
-        
+            with open(config_file_path, 'r') as config_file:
+                config = json.loads(config_file.read())
+
+            self.logger.debug("JSON Config - %s", LazyDump(config))
+            return config if isinstance(config, dict) else {}
+
+        except FileNotFoundError:
+            return {}
+
         except Exception as e:
-            self.logger.error('Error loading environment variables: ' + str(traceback.print_tb(e.__traceback__)))
-            
-    def get_combined_config(self) -> dict:
+            self.logger.exception('Error loading config.json file')
+            return {}
 
-        from mergedeep import merge
-        try:
-            # Build a config file using config.json if it exists    
-            config_file = self.__load_config_file()
+    # __build_config: Resolves every key of the ConfigMap in one pass, from the environment variable when set, else from config.json, else from the ConfigSchema default. Returns the typed configuration as `dict`.
+    def __build_config(self, config_file: dict) -> dict:
 
-            # Override config.json if exists, with Environment variables for CI purposes
-            config_env = self.__load_config_env()
+        config = {}
 
-            # Return merged config objects
-            combined_config = merge(config_file, config_env)
+        for env_key, config_key in self.env_keys.items():
 
-            # Check if required fields exists in the config else return an exception. **Only works for strings in the config dictionary.**
-            if "enabled" in combined_config["jira"].keys():
+            section, key = config_key.split('.', 1)
+            default_value = ConfigSchema[config_key][1] if config_key in ConfigSchema else ''
 
-                if combined_config["jira"]["enabled"]:
+            if env_key in environ:
+                self.logger.debug('Config found within environment variables - %s - %s', env_key, config_key)
+                value = self.__convert_value(config_key=config_key, value=environ[env_key])
+            elif key in config_file.get(section, {}):
+                value = self.__convert_value(config_key=config_key, value=config_file[section][key])
+            else:
+                value = list(default_value) if isinstance(default_value, list) else default_value
 
-                    from flatten_json import flatten
-                    combined_config_key_list = flatten(combined_config, '.')
+            config.setdefault(section, {}).update({ key: value })
 
-                    # Check for required fields. **Only works for strings in the config dictionary.**
-                    is_field_not_found = 0
-                    field_not_found_list = []
-                    for field in self.required_fields:
+        return config
 
-                        if field not in combined_config_key_list:
+    # __validate_config: Disables every enabled section missing a required field, logging the missing fields. Returns the validated configuration as `dict`.
+    def __validate_config(self, config: dict) -> dict:
 
-                            is_field_not_found = 1
-                            field_not_found_list.append(field)
+        for section, required_fields in ConfigRequiredFields.items():
 
-                    if is_field_not_found:
-                        self.logger.error('Missing config fields - ' + str(field_not_found_list))
-                        raise
+            if not config.get(section, {}).get('enabled'):
+                continue
 
-            return combined_config
+            missing_fields = [required_field for required_field in required_fields if not config[section].get(required_field.split('.', 1)[1])]
 
-        except Exception as e:
-            self.logger.error('Error merging config: ' + str(traceback.print_tb(e.__traceback__)))
-        
\ No newline at end of file
+            if missing_fields:
+                self.logger.error('Missing config fields - ' + str(missing_fields) + ', disabling `' + section + '`.')
+                config[section].update({ 'enabled': False })
+
+        return config
+
+    # get_combined_config: Returns the configuration from config.json, overridden by environment variables for CI purposes. The result is cached until config.json or the environment variables change.
+    def get_combined_config(self) -> dict:
+
+        config_file_path = self.__get_config_file_path()
+        cache_key = self.__get_cache_key(config_file_path=config_file_path)
+
+        with config_cache_lock:
+            if config_cache.get('key') == cache_key:
+                return config_cache['config']
+
+        config = self.__validate_config(config=self.__build_config(config_file=self.__load_config_file(config_file_path=config_file_path)))
+
+        # The API token is masked wherever it would otherwise appear in a log record.
+        register_secret(config["jira"]["api_token"])
+
+        self.logger.debug('Combined config - %s', LazyDump(config))
+
+        with config_cache_lock:
+            config_cache.update({ 'key': cache_key, 'config': config })
+
+        return config
@@ -1,114 +1,311 @@
 import logging
-import traceback
+import json
+import threading
 from boto3 import client
+from log_handler.log_handler import LazyDump
 
 class CostExplorer:
 
     # CostExplorer Constructor
     # logger: Logger object
+    # storage_backend: Optional LocalFileBackend or S3Backend object caching the closed months of the cost matrix
+    # cache_key_prefix: Prefix of the cached month keys, e.g. the AWS account ID, so accounts sharing a backend do not collide
+    # region_catalog: Optional RegionCatalog object, leaving every billing pseudo-region out of the active regions rather than only `global` and `NoRegion`
     #
     # Returns: CostExplorer object
     # Raises: None
-    def __init__(self, logger: logging.Logger, costexplorer_client: client):
+    def __init__(self, logger: logging.Logger, costexplorer_client: client, storage_backend = None, cache_key_prefix: str = 'default', region_catalog = None):
         
         self.logger = logger
         self.costexplorer_client = costexplorer_client
+        self.storage_backend = storage_backend
+        self.cache_key_prefix = cache_key_prefix
+        self.region_catalog = region_catalog
+        self._cost_matrix = None
+        self._cost_matrix_generation = (0, threading.Lock())
 
-    # get_last_90_day_billing: Returns a `dict` of last 90 day AWS billing data 
-    def __get_last_90_day_billing(self, group_by_parameters_list: list) -> dict:
+    # __get_month_starts: Returns the first date of every month of the last 90 day billing period as `list` of `datetime`, oldest first and ending with the current month.
+    def __get_month_starts(self) -> list:
 
         from datetime import datetime, timedelta
 
-        # query_start_date = datetime.now() - timedelta(days=14) # Gets the date from 14 days ago. The start date is inclusive in the query.
-        query_start_date = (datetime.now().replace(day=1) - timedelta(days=88)).replace(day=1) # Gets the first date of the previous month. End date is exclusive of the query period.
-        query_end_date = datetime.now() # Gets the last date of the previous month. End date is exclusive.
+        current_month_start = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        month_start = (current_month_start - timedelta(days=88)).replace(day=1) # Gets the first date of the month 90 days ago. The start date is inclusive in the query.
 
-        return self.costexplorer_client.get_cost_and_usage(
-            TimePeriod={
+        month_starts = []
+        while month_start <= current_month_start:
+            month_starts.append(month_start)
+            month_start = (month_start + timedelta(days=32)).replace(day=1)
+
+        return month_starts
+
+    # get_last_90_day_billing: Yields every `ResultsByTime` entry of the last 90 day AWS billing data at `granularity`, or from `query_start_date` onwards when given, following `NextPageToken` until all pages have been read. Pages are requested as they are consumed, so only one page is held in memory.
+    def __get_last_90_day_billing(self, group_by_parameters_list: list, query_start_date = None, granularity: str = 'MONTHLY'):
+
+        from datetime import datetime
+
+        if query_start_date is None:
+            query_start_date = self.__get_month_starts()[0]
+        query_end_date = datetime.now() # End date is exclusive.
+
+        # The period is empty on the first day of a month when only the current month is queried.
+        if query_start_date.strftime('%Y-%m-%d') >= query_end_date.strftime('%Y-%m-%d'):
+            return
+
+        query_parameters = {
+            'TimePeriod': {
                 'Start': query_start_date.strftime('%Y-%m-%d'),
                 'End': query_end_date.strftime('%Y-%m-%d')
             },
-            Granularity='MONTHLY',
-            Metrics=[
+            'Granularity': granularity,
+            'Metrics': [
                 'UnblendedCost',
             ],
-            GroupBy=group_by_parameters_list
+            'GroupBy': group_by_parameters_list
+        }
+
+        page_count = 0
+
+        while True:
+
+            billing_response = self.costexplorer_client.get_cost_and_usage(**query_parameters)
+            page_count += 1
+
+            # DAILY pages can hold thousands of groups, so only a sample is rendered, and only when debug logging is on.
+            self.logger.debug('Last 90-day Billing Response page %d - %s', page_count, LazyDump(billing_response, max_items=10))
+
+            for billing_results in billing_response['ResultsByTime']:
+                yield billing_results
+
+            if not billing_response.get('NextPageToken'):
+                break
+
+            query_parameters.update({'NextPageToken': billing_response['NextPageToken']})
+
+    # load_last_90_day_cost_matrix: Returns the in-memory cost matrix, building it on first use. The matrix is a `dict` keyed by the month start date, each month holding the `Estimated` flag, the currency `Unit` and a `Costs` dict of `(region, service)` to amount. Subsequent calls reuse the matrix until `clear_cost_matrix` is called. Concurrent callers share a single query, as Cost Explorer bills every request.
+    def load_last_90_day_cost_matrix(self) -> dict:
+
+        generation, cost_matrix_lock = self._cost_matrix_generation
+
+        if self._cost_matrix is not None:
+            return self._cost_matrix
+
+        with cost_matrix_lock:
+
+            if self._cost_matrix is not None:
+                return self._cost_matrix
+
+            cost_matrix = self.__query_cost_matrix()
+
+            # A query abandoned past its deadline may finish after `clear_cost_matrix`, its matrix is not kept for the next invocation.
+            if generation == self._cost_matrix_generation[0]:
+                self._cost_matrix = cost_matrix
+
+            return cost_matrix
+
+    # __query_cost_matrix: Builds the cost matrix from a single paginated query grouped by REGION and SERVICE, serving closed months from `storage_backend` when configured. Returns the cost matrix as `dict`.
+    def __query_cost_matrix(self) -> dict:
+
+        group_by_parameters_list = [
+            {
+                'Type': 'DIMENSION',
+                'Key': 'REGION'
+            },
+            {
+                'Type': 'DIMENSION',
+                'Key': 'SERVICE'
+            },
+        ]
+
+        month_starts = self.__get_month_starts()
+        cost_matrix = {}
+
+        # Closed months never change, so months are read from the cache up to the first one missing, and only the months from there on are queried.
+        query_start_date = month_starts[0]
+        for month_start in month_starts[:-1]:
+
+            cached_month = self.__get_cached_month(month_start=month_start.strftime('%Y-%m-%d'))
+            if cached_month is None:
+                break
+
+            cost_matrix.update({ month_start.strftime('%Y-%m-%d'): cached_month })
+            query_start_date = month_starts[month_starts.index(month_start) + 1]
+
+        self.logger.info('Cost matrix served ' + str(len(cost_matrix)) + ' month(s) from the cache, querying from ' + query_start_date.strftime('%Y-%m-%d'))
+
+        for billing_results in self.__get_last_90_day_billing(group_by_parameters_list=group_by_parameters_list, query_start_date=query_start_date):
+
+            # Results for the same month can be split across pages, so months are merged rather than replaced.
+            month = cost_matrix.setdefault(billing_results['TimePeriod']['Start'], {
+                'Estimated': billing_results['Estimated'],
+                'Unit': 'USD',
+                'Costs': {}
+            })
+
+            for billing_group in billing_results['Groups']:
+
+                region, service = billing_group['Keys'][0], billing_group['Keys'][1]
+                month['Unit'] = billing_group['Metrics']['UnblendedCost']['Unit']
+                month['Costs'][(region, service)] = month['Costs'].get((region, service), 0.0) + float(billing_group['Metrics']['UnblendedCost']['Amount'])
+
+        for month_start in month_starts[:-1]:
+
+            month_key = month_start.strftime('%Y-%m-%d')
+            if month_start >= query_start_date and month_key in cost_matrix and not cost_matrix[month_key]['Estimated']:
+                self.__put_cached_month(month_start=month_key, month=cost_matrix[month_key])
+
+        cost_matrix = dict(sorted(cost_matrix.items()))
+
+        self.logger.debug('Last 90-day Cost Matrix - %s', LazyDump(cost_matrix))
+
+        return cost_matrix
+
+    # __get_month_cache_key: Returns the storage key of a cached month.
+    def __get_month_cache_key(self, month_start: str) -> str:
+        return 'cost-explorer/' + self.cache_key_prefix + '/REGION-SERVICE/' + month_start + '.json'
+
+    # __get_cached_month: Returns the cached cost matrix month starting on `month_start`, or None if it is not cached or the cache cannot be read.
+    def __get_cached_month(self, month_start: str) -> dict:
+
+        if not self.storage_backend:
+            return None
+
+        try:
+            cached_month = self.storage_backend.get(key=self.__get_month_cache_key(month_start=month_start))
+
+            if cached_month is None:
+                return None
+
+            cached_month = json.loads(cached_month)
+
+            return {
+                'Estimated': False,
+                'Unit': cached_month['Unit'],
+                'Costs': { (region, service): amount for region, service, amount in cached_month['Costs'] }
+            }
+
+        except Exception as e:
+            self.logger.exception('Cost Matrix Cache Read Error')
+            return None
+
+    # __put_cached_month: Caches a closed cost matrix month. Errors are logged, leaving the month to be queried again.
+    def __put_cached_month(self, month_start: str, month: dict):
+
+        if not self.storage_backend:
+            return
+
+        try:
+            self.storage_backend.put(
+                key=self.__get_month_cache_key(month_start=month_start),
+                data=json.dumps({
+                    'Unit': month['Unit'],
+                    'Costs': [[region, service, amount] for (region, service), amount in month['Costs'].items()]
+                }).encode('utf-8')
+            )
+
+        except Exception as e:
+            self.logger.exception('Cost Matrix Cache Write Error')
+
+    # load_last_90_day_cost_trends: Streams the last 90 day billing at DAILY granularity, grouped by the two `dimensions`, into a CostTrends object. Use `SERVICE` and `USAGE_TYPE` for usage-type trends. Returns the CostTrends object.
+    def load_last_90_day_cost_trends(self, dimensions: tuple = ('SERVICE', 'REGION')):
+
+        from datetime import datetime
+        from cost_explorer.cost_trends.cost_trends import CostTrends
+
+        query_start_date = self.__get_month_starts()[0]
+
+        cost_trends = CostTrends(
+            logger=self.logger,
+            start_date=query_start_date.date(),
+            end_date=datetime.now().date(),
+            dimensions=dimensions
         )
 
-    # get_active_regions_from_last_90_day_billing: This method retrieves the active AWS regions from the last 90 days billing. Returns a `list` of active AWS regions.
-    def get_active_regions_from_last_90_day_billing(self) -> list:
+        group_by_parameters_list = [{ 'Type': 'DIMENSION', 'Key': dimension } for dimension in dimensions]
+
+        return cost_trends.ingest(billing_results_iterable=self.__get_last_90_day_billing(group_by_parameters_list=group_by_parameters_list, query_start_date=query_start_date, granularity='DAILY'))
+
+    # get_cost_trends_from_last_90_day_billing: Returns the numeric spend trends of the last 90 days, month-over-month growth, run-rate and the `top_n` spenders of each of `dimensions`, as `dict`.
+    def get_cost_trends_from_last_90_day_billing(self, dimensions: tuple = ('SERVICE', 'REGION'), top_n: int = 5) -> dict:
 
         try:
-            group_by_parameters_list = [
-                {
-                    'Type': 'DIMENSION',
-                    'Key': 'REGION'
-                },
-            ]
-            billing_by_aws_region_response = self.__get_last_90_day_billing(group_by_parameters_list=group_by_parameters_list)
+            return self.load_last_90_day_cost_trends(dimensions=dimensions).get_trends(top_n=top_n)
+
+        except Exception as e:
+            self.logger.exception('CUR daily Cost Trends Error')
+            return {}
+
+    # clear_cost_matrix: Drops the cached cost matrix so the next lookup re-queries Cost Explorer. Called once per invocation as the CostExplorer object outlives a single Lambda invocation. Starts a new generation with its own lock, so a query left running by an earlier invocation neither stores its matrix nor holds up the next one.
+    def clear_cost_matrix(self):
+
+        self._cost_matrix_generation = (self._cost_matrix_generation[0] + 1, threading.Lock())
+        self._cost_matrix = None
 
-            self.logger.debug('Billing by AWS Region Response - ' + str(billing_by_aws_region_response))
+    # get_active_regions_from_last_90_day_billing: This method retrieves the active AWS regions from the last 90 days billing. Returns a `list` of active AWS regions.
+    def get_active_regions_from_last_90_day_billing(self) -> list:
 
+        try:
             active_aws_regions = []
             excluded_billing_regions = ['global', 'NoRegion']
 
-            for aws_region_results in billing_by_aws_region_response['ResultsByTime']:
+            for month_start, month in self.load_last_90_day_cost_matrix().items():
+
+                region_spend = {}
+                for (region, service), amount in month['Costs'].items():
+                    region_spend[region] = region_spend.get(region, 0.0) + amount
 
-                for aws_region_group in aws_region_results['Groups']:
+                for region, amount in region_spend.items():
 
-                    if float(aws_region_group['Metrics']['UnblendedCost']['Amount']).__ceil__() > 0:
+                    if amount.__ceil__() > 0:
 
-                        self.logger.debug('Region-wise spend in ' + aws_region_group['Keys'][0] + ' is $' + aws_region_group['Metrics']['UnblendedCost']['Amount'] + aws_region_group['Metrics']['UnblendedCost']['Unit'])
+                        self.logger.debug('Region-wise spend in %s for %s is $%s%s', region, month_start, amount, month['Unit'])
 
-                        if aws_region_group['Keys'][0] not in active_aws_regions:
+                        if region not in active_aws_regions:
 
-                            active_aws_regions.append(aws_region_group['Keys'][0])
+                            active_aws_regions.append(region)
 
             for excluded_region in excluded_billing_regions:
 
                 if excluded_region in active_aws_regions:
 
-                    self.logger.debug('Removed excluded billing region - ' + excluded_region + '.')
+                    self.logger.debug('Removed excluded billing region - %s.', excluded_region)
                     active_aws_regions.remove(excluded_region)
 
+            if self.region_catalog:
+                active_aws_regions = [region for region in active_aws_regions if self.region_catalog.is_region(region_id=region)]
+
             return active_aws_regions
         
         except Exception as e:
-            self.logger.error('CUR grouped by AWS Region Results Error - ' + str(traceback.print_tb(e.__traceback__)))
+            self.logger.exception('CUR grouped by AWS Region Results Error')
             return []
 
     # get_active_services_from_last_90_day_billing: This method retrieves the active AWS services from the last 90 days billing. Returns a `list` of active AWS services.
     def get_active_services_from_last_90_day_billing(self) -> list:
             
         try:
-            group_by_parameters_list = [
-                {
-                    'Type': 'DIMENSION',
-                    'Key': 'SERVICE'
-                },
-            ]
-            billing_by_aws_service_response = self.__get_last_90_day_billing(group_by_parameters_list=group_by_parameters_list)
-
-            self.logger.debug('Billing by AWS Service Response - ' + str(billing_by_aws_service_response))
-
             active_aws_services = []
 
-            for aws_service_results in billing_by_aws_service_response['ResultsByTime']:
+            for month_start, month in self.load_last_90_day_cost_matrix().items():
 
-                for aws_service_group in aws_service_results['Groups']:
+                service_spend = {}
+                for (region, service), amount in month['Costs'].items():
+                    service_spend[service] = service_spend.get(service, 0.0) + amount
 
-                    if float(aws_service_group['Metrics']['UnblendedCost']['Amount']).__ceil__() > 0:
+                for service, amount in service_spend.items():
 
-                        self.logger.debug('Service-wise spend in ' + aws_service_group['Keys'][0] + ' is $' + aws_service_group['Metrics']['UnblendedCost']['Amount'] + aws_service_group['Metrics']['UnblendedCost']['Unit'])
+                    if amount.__ceil__() > 0:
 
-                        if aws_service_group['Keys'][0] not in active_aws_services:
+                        self.logger.debug('Service-wise spend in %s for %s is $%s%s', service, month_start, amount, month['Unit'])
 
-                            active_aws_services.append(aws_service_group['Keys'][0])
+                        if service not in active_aws_services:
+
+                            active_aws_services.append(service)
 
             return active_aws_services
 
         except Exception as e:
-            self.logger.error('CUR grouped by AWS Service Results Error - ' + str(traceback.print_tb(e.__traceback__)))
+            self.logger.exception('CUR grouped by AWS Service Results Error')
             return []
 
     # get_monthly_recurring_revenue_from_last_90_day_billing: Returns the last 90 day billing
@@ -116,26 +313,24 @@ class CostExplorer:
 
         try:
             monthly_recurring_revenue_list = []
-            monthly_recurring_revenue_billing_response = self.__get_last_90_day_billing(group_by_parameters_list=[])
-
-            self.logger.debug('Last 90-day Billing Response - ' + str(monthly_recurring_revenue_billing_response))
 
             from datetime import datetime
 
-            for monthly_bill in monthly_recurring_revenue_billing_response["ResultsByTime"]:
+            for month_start, month in sorted(self.load_last_90_day_cost_matrix().items()):
 
-                if not monthly_bill["Estimated"]:
+                end_date = datetime.strptime(month_start, "%Y-%m-%d")
+                month_total = sum(month['Costs'].values())
 
-                    end_date = datetime.strptime(monthly_bill["TimePeriod"]["Start"], "%Y-%m-%d")
-                    monthly_recurring_revenue_list.append(str(end_date.strftime('%B %Y')) + " - " + str(float(monthly_bill["Total"]["UnblendedCost"]["Amount"]).__round__(2)) + " " + monthly_bill["Total"]["UnblendedCost"]["Unit"])
+                if not month['Estimated']:
+
+                    monthly_recurring_revenue_list.append(str(end_date.strftime('%B %Y')) + " - " + str(float(month_total).__round__(2)) + " " + month['Unit'])
 
                 else:
 
-                    end_date = datetime.strptime(monthly_bill["TimePeriod"]["Start"], "%Y-%m-%d")
-                    monthly_recurring_revenue_list.append(str(end_date.strftime('%B %Y')) + " (Estimated) - " + str(float(monthly_bill["Total"]["UnblendedCost"]["Amount"]).__round__(2)) + " " + monthly_bill["Total"]["UnblendedCost"]["Unit"])
+                    monthly_recurring_revenue_list.append(str(end_date.strftime('%B %Y')) + " (Estimated) - " + str(float(month_total).__round__(2)) + " " + month['Unit'])
 
             return monthly_recurring_revenue_list
 
         except Exception as e:
-            self.logger.error('CUR grouped monthly Results Error - ' + str(traceback.print_tb(e.__traceback__)))
-            return []
\ No newline at end of file
+            self.logger.exception('CUR grouped monthly Results Error')
+            return []
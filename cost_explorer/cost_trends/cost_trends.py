@@ -0,0 +1,188 @@
+import logging
+from array import array
+from datetime import date
+
+# CostTrends - packs DAILY `get_cost_and_usage` results into compact NumPy arrays and derives numeric spend trends from them
+# Only non-zero costs are kept, as one (day, key, key) coordinate and amount per row. Each dimension value is interned to an integer index, so accounts with thousands of usage types cost a few bytes per row rather than a dense day by service by usage type cube.
+class CostTrends:
+
+    # CostTrends Constructor
+    # logger: Logger object
+    # start_date: First day of the ingested period
+    # end_date: Day after the last day of the ingested period
+    # dimensions: Names of the two `GroupBy` dimensions of the ingested results, e.g. `SERVICE` and `REGION` or `SERVICE` and `USAGE_TYPE`
+    #
+    # Returns: CostTrends object
+    # Raises: None
+    def __init__(self, logger: logging.Logger, start_date: date, end_date: date, dimensions: tuple = ('SERVICE', 'REGION')):
+
+        self.logger = logger
+        self.start_date = start_date
+        self.end_date = end_date
+        self.dimensions = tuple(dimensions)
+        self.unit = 'USD'
+
+        # Rows are appended to typed buffers while streaming, and only viewed as NumPy arrays once ingestion is complete.
+        self._labels = [{}, {}]
+        self._day_index = array('H')
+        self._key_index = [array('I'), array('I')]
+        self._amounts = array('d')
+        self._arrays = None
+
+    # add_billing_results: Adds one DAILY `ResultsByTime` entry, grouped by `dimensions`.
+    def add_billing_results(self, billing_results: dict):
+
+        # NumPy views of the buffers must be released before the buffers can grow.
+        self._arrays = None
+
+        day = (date.fromisoformat(billing_results['TimePeriod']['Start']) - self.start_date).days
+
+        for billing_group in billing_results['Groups']:
+
+            amount = float(billing_group['Metrics']['UnblendedCost']['Amount'])
+            if amount == 0:
+                continue
+
+            self.unit = billing_group['Metrics']['UnblendedCost']['Unit']
+            self._day_index.append(day)
+
+            for dimension_index in range(2):
+                labels = self._labels[dimension_index]
+                self._key_index[dimension_index].append(labels.setdefault(billing_group['Keys'][dimension_index], len(labels)))
+
+            self._amounts.append(amount)
+
+    # ingest: Adds every DAILY `ResultsByTime` entry yielded by `billing_results_iterable`, one at a time. Returns the CostTrends object.
+    def ingest(self, billing_results_iterable):
+
+        for billing_results in billing_results_iterable:
+            self.add_billing_results(billing_results=billing_results)
+
+        self.logger.debug('Cost trends ingested %d non-zero cost row(s), %d %s and %d %s value(s)', len(self._amounts), len(self._labels[0]), self.dimensions[0], len(self._labels[1]), self.dimensions[1])
+
+        return self
+
+    # get_arrays: Returns the ingested rows as a `dict` of NumPy arrays, `Day`, `Key0`, `Key1` and `Amount`, sharing the memory of the ingestion buffers.
+    def get_arrays(self) -> dict:
+
+        import numpy
+
+        if self._arrays is None:
+            self._arrays = {
+                'Day': numpy.frombuffer(self._day_index, dtype=numpy.uint16) if len(self._day_index) else numpy.zeros(0, dtype=numpy.uint16),
+                'Key0': numpy.frombuffer(self._key_index[0], dtype=numpy.uint32) if len(self._key_index[0]) else numpy.zeros(0, dtype=numpy.uint32),
+                'Key1': numpy.frombuffer(self._key_index[1], dtype=numpy.uint32) if len(self._key_index[1]) else numpy.zeros(0, dtype=numpy.uint32),
+                'Amount': numpy.frombuffer(self._amounts, dtype=numpy.float64) if len(self._amounts) else numpy.zeros(0, dtype=numpy.float64)
+            }
+
+        return self._arrays
+
+    # get_daily_totals: Returns the total spend of every day of the period as a NumPy array indexed by day.
+    def get_daily_totals(self):
+
+        import numpy
+
+        arrays = self.get_arrays()
+        return numpy.bincount(arrays['Day'], weights=arrays['Amount'], minlength=(self.end_date - self.start_date).days)
+
+    # __get_month_index: Returns a tuple of (array, array), the month start of every month of the period as `datetime64[M]` and the month index of every day.
+    def __get_month_index(self) -> tuple:
+
+        import numpy
+
+        days = numpy.datetime64(self.start_date.isoformat(), 'D') + numpy.arange((self.end_date - self.start_date).days)
+        return numpy.unique(days.astype('datetime64[M]'), return_inverse=True)
+
+    # __get_current_month: Returns the month of `end_date` as `datetime64[M]`, the month the period runs into. On the first of a month, the period ends with the previous month and holds no day of it.
+    def __get_current_month(self):
+
+        import numpy
+
+        return numpy.datetime64(self.end_date.isoformat(), 'D').astype('datetime64[M]')
+
+    # get_run_rate: Returns a `dict` with the average daily spend of the last `trailing_days` days, and the current month's total projected from its spend to date.
+    def get_run_rate(self, trailing_days: int = 7) -> dict:
+
+        import numpy
+
+        daily_totals = self.get_daily_totals()
+        months, month_index = self.__get_month_index()
+
+        if not len(daily_totals):
+            return { 'DailyRunRate': 0.0, 'ProjectedMonthTotal': 0.0 }
+
+        daily_run_rate = float(daily_totals[-trailing_days:].mean())
+
+        current_month = self.__get_current_month()
+        current_month_days = months[month_index] == current_month
+        days_in_current_month = int(((current_month + 1) - current_month.astype('datetime64[D]')).astype(int))
+        month_to_date = float(daily_totals[current_month_days].sum())
+        elapsed_days = int(numpy.count_nonzero(current_month_days))
+
+        # The days of the current month not yet billed are projected at the trailing daily average. On the first of the month none of its days are in the period, so the whole month is projected.
+        projected_month_total = month_to_date + daily_run_rate * (days_in_current_month - elapsed_days)
+
+        return {
+            'DailyRunRate': round(daily_run_rate, 2),
+            'ProjectedMonthTotal': round(projected_month_total, 2)
+        }
+
+    # get_month_over_month_growth: Returns a `dict` of month (`YYYY-MM`) to the percentage change of its spend over the previous month, None where the previous month had no spend. The current, partial month is compared by its projected total.
+    def get_month_over_month_growth(self) -> dict:
+
+        import numpy
+
+        months, month_index = self.__get_month_index()
+        monthly_totals = numpy.bincount(month_index, weights=self.get_daily_totals(), minlength=len(months))
+
+        if len(monthly_totals):
+
+            # On the first of the month the period ends with the previous, complete month, so the current month is added rather than replacing it.
+            if months[-1] != self.__get_current_month():
+                months = numpy.append(months, self.__get_current_month())
+                monthly_totals = numpy.append(monthly_totals, 0.0)
+
+            monthly_totals[-1] = self.get_run_rate()['ProjectedMonthTotal']
+
+        previous_totals = monthly_totals[:-1]
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            growth = numpy.where(previous_totals > 0, (monthly_totals[1:] - previous_totals) / previous_totals * 100, numpy.nan)
+
+        return {
+            str(month): None if numpy.isnan(month_growth) else round(float(month_growth), 2)
+            for month, month_growth in zip(months[1:], growth)
+        }
+
+    # get_top_spenders: Returns the `top_n` values of dimension `dimension_index` with the highest spend over the last `trailing_days` days, as a `list` of [value, amount] pairs, highest first.
+    def get_top_spenders(self, dimension_index: int, top_n: int = 5, trailing_days: int = 30) -> list:
+
+        import numpy
+
+        arrays = self.get_arrays()
+        labels = list(self._labels[dimension_index].keys())
+
+        if not labels:
+            return []
+
+        recent_rows = arrays['Day'] >= max(0, (self.end_date - self.start_date).days - trailing_days)
+        spend = numpy.bincount(arrays['Key' + str(dimension_index)][recent_rows], weights=arrays['Amount'][recent_rows], minlength=len(labels))
+
+        top_n = min(top_n, len(labels))
+        top_indices = numpy.argpartition(spend, -top_n)[-top_n:]
+        top_indices = top_indices[numpy.argsort(spend[top_indices])[::-1]]
+
+        return [[labels[key_index], round(float(spend[key_index]), 2)] for key_index in top_indices if spend[key_index] > 0]
+
+    # get_trends: Returns every trend statistic as a `dict` of plain numbers and strings, ready for the payload.
+    def get_trends(self, top_n: int = 5) -> dict:
+
+        trends = {
+            'Unit': self.unit,
+            'MonthOverMonthGrowthPercent': self.get_month_over_month_growth()
+        }
+        trends.update(self.get_run_rate())
+
+        for dimension_index, dimension in enumerate(self.dimensions):
+            trends.update({ 'Top' + dimension.title().replace('_', '') + 'Spenders': self.get_top_spenders(dimension_index=dimension_index, top_n=top_n) })
+
+        return trends
@@ -0,0 +1,89 @@
+import logging
+import threading
+import time
+
+# Deadline - propagates the remaining execution time of an invocation, handing out time budgets to its steps while reserving time to deliver partial results and the CloudFormation response
+class Deadline:
+
+    # Deadline Constructor
+    # logger: Logger object
+    # context: Optional Lambda context object, its `get_remaining_time_in_millis` sets the deadline
+    # reserve_seconds: Seconds kept back from the collection and the Jira upsert for the API Endpoint request and the CloudFormation response
+    # response_reserve_seconds: Seconds kept back from every step for the CloudFormation response alone
+    # default_remaining_seconds: Remaining time assumed without a Lambda context, e.g. when run locally
+    #
+    # Returns: Deadline object
+    # Raises: None
+    def __init__(self, logger: logging.Logger, context = None, reserve_seconds: float = 20, response_reserve_seconds: float = 5, default_remaining_seconds: float = 600):
+
+        self.logger = logger
+        self.reserve_seconds = reserve_seconds
+        self.response_reserve_seconds = response_reserve_seconds
+        self._watchdog = None
+
+        remaining_seconds = context.get_remaining_time_in_millis() / 1000 if context is not None and hasattr(context, 'get_remaining_time_in_millis') else default_remaining_seconds
+        self.expires_at = time.monotonic() + remaining_seconds
+
+        self.logger.debug('Deadline in %.1fs, reserving %.1fs for delivery', remaining_seconds, reserve_seconds)
+
+    # get_remaining_seconds: Returns the seconds left until the invocation times out.
+    def get_remaining_seconds(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    # get_budget: Returns the seconds a step ahead of the delivery, e.g. a collector or the Jira upsert, may run for, up to `timeout` when given, leaving `reserve_seconds` for the delivery.
+    def get_budget(self, timeout: float = None) -> float:
+
+        budget = max(0.0, self.get_remaining_seconds() - self.reserve_seconds)
+        return min(budget, timeout) if timeout is not None else budget
+
+    # get_delivery_budget: Returns the seconds a delivery step may run for, up to `timeout` when given, leaving `response_reserve_seconds` for the CloudFormation response.
+    def get_delivery_budget(self, timeout: float = None) -> float:
+
+        budget = max(0.0, self.get_remaining_seconds() - self.response_reserve_seconds)
+        return min(budget, timeout) if timeout is not None else budget
+
+    # run_with_budget: Runs `step_function` on a daemon thread for at most `budget` seconds. Threads cannot be interrupted, so a step past its budget is abandoned and its late result ignored. Returns a tuple of (bool, result), True if the step completed within its budget.
+    # Raises: The exception raised by `step_function`, when it completed within its budget
+    def run_with_budget(self, name: str, step_function, budget: float) -> tuple[bool, object]:
+
+        if budget <= 0:
+            self.logger.error('Step `' + name + '` skipped, no time left in the budget.')
+            return False, None
+
+        outcome = {}
+
+        def run_step():
+            try:
+                outcome.update({ 'result': step_function() })
+
+            except Exception as e:
+                outcome.update({ 'error': e })
+
+        step_thread = threading.Thread(target=run_step, name='deadline-' + name, daemon=True)
+        step_thread.start()
+        step_thread.join(timeout=budget)
+
+        if step_thread.is_alive():
+            self.logger.error('Step `' + name + '` exceeded its budget of ' + str(round(budget, 1)) + ' seconds, abandoning it.')
+            return False, None
+
+        if 'error' in outcome:
+            raise outcome['error']
+
+        return True, outcome.get('result')
+
+    # start_watchdog: Calls `callback` on a timer `response_reserve_seconds` ahead of the deadline, unless `cancel_watchdog` is called first. Covers steps stalling past every budget.
+    def start_watchdog(self, callback):
+
+        self.cancel_watchdog()
+
+        self._watchdog = threading.Timer(max(0.0, self.get_remaining_seconds() - self.response_reserve_seconds), callback)
+        self._watchdog.daemon = True
+        self._watchdog.start()
+
+    # cancel_watchdog: Cancels the watchdog timer, if any.
+    def cancel_watchdog(self):
+
+        if self._watchdog:
+            self._watchdog.cancel()
+            self._watchdog = None
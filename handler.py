@@ -1,238 +1,620 @@
 import logging
 from os import environ
-import json
-import cfnresponse
-import traceback
-import time
-import boto3
-from botocore.config import Config
-
-client_config = Config(
-    retries = {
+import threading
+import urllib3
+from concurrent.futures import ThreadPoolExecutor
+
+# Only lightweight modules are imported at module level. boto3 clients and the Cost Explorer, CloudFormation, configuration and Jira subsystems are built on first use, keeping them out of the cold start of code paths that never reach them, e.g. Delete.
+from cache_handler.cache_handler import CacheHandler
+from client_factory.client_factory import ClientFactory
+from cloudformation_stack.stack_waiter.stack_waiter import NESTED_STACK_COMPLETE_STATUSES
+from collector_scheduler.collector_scheduler import CollectorScheduler
+from deadline.deadline import Deadline
+from http_delivery.http_delivery import HttpDelivery, SUCCESS, FAILED
+from metrics.metrics import MetricsRecorder
+from payload_encoder.payload_encoder import PayloadEncoder
+from log_handler.log_handler import setup_logging, LazyDump
+
+# Setting up the logging level from the environment variable `LOGLEVEL`. Records are written as JSON with secrets masked, unless `LOG_FORMAT` is `text`.
+setup_logging(log_format=environ['LOG_FORMAT'] if 'LOG_FORMAT' in environ.keys() else 'json')
+logger = logging.getLogger(__name__)
+logger.setLevel(environ['LOGLEVEL'] if 'LOGLEVEL' in environ.keys() else 'INFO')
+
+# Latency, retries, throttles and response sizes of every AWS, HTTP and Jira call, emitted as CloudWatch Embedded Metric Format lines at the end of each invocation.
+metrics = MetricsRecorder(
+    logger=logger,
+    namespace=environ['METRICS_NAMESPACE'] if 'METRICS_NAMESPACE' in environ.keys() else 'AWSPostStackOutputs',
+    enabled=environ['METRICS_ENABLED'].lower() != 'false' if 'METRICS_ENABLED' in environ.keys() else True
+)
+
+# boto3 clients are created on first use. `BOTOCORE_LOGLEVEL` is applied when boto3 is first imported.
+client_factory = ClientFactory(
+    logger=logger,
+    retries={
         'max_attempts': 0,
         'mode': 'standard'
-    }
+    },
+    botocore_log_level=environ['BOTOCORE_LOGLEVEL'] if 'BOTOCORE_LOGLEVEL' in environ.keys() else None,
+    on_client_created=metrics.instrument_client
 )
 
-from utils.utils import Utils
-from cost_explorer.cost_explorer import CostExplorer
-from cloudformation_stack.cloudformation_stack import CloudFormationStack
-from organizations.organizations import Organizations
-from account.account import Account
-from config_handler.config_handler import ConfigHandler
-from jira_handler.jira_handler import JiraHandler
+# Serializes every endpoint payload once, with `orjson` when installed, gzip compressing bodies of at least `HTTP_GZIP_THRESHOLD_BYTES`.
+payload_encoder = PayloadEncoder(
+    logger=logger,
+    compress_threshold=int(environ['HTTP_GZIP_THRESHOLD_BYTES']) if 'HTTP_GZIP_THRESHOLD_BYTES' in environ.keys() else 65536,
+    use_fast_json=environ['PAYLOAD_FAST_JSON'].lower() != 'false' if 'PAYLOAD_FAST_JSON' in environ.keys() else True,
+    metrics=metrics
+)
 
-# Setting up the logging level from the environment variable `LOGLEVEL`.
-logging.basicConfig()
-logger = logging.getLogger(__name__)
-logger.setLevel(environ['LOGLEVEL'] if 'LOGLEVEL' in environ.keys() else 'INFO')
+# Shared by the endpoint POST and the CloudFormation response, keeping connections alive across warm invocations.
+http_delivery = HttpDelivery(
+    logger=logger,
+    connect_timeout=float(environ['HTTP_CONNECT_TIMEOUT']) if 'HTTP_CONNECT_TIMEOUT' in environ.keys() else 3.05,
+    read_timeout=float(environ['HTTP_READ_TIMEOUT']) if 'HTTP_READ_TIMEOUT' in environ.keys() else 10,
+    max_retries=int(environ['HTTP_MAX_RETRIES']) if 'HTTP_MAX_RETRIES' in environ.keys() else 3,
+    gzip_threshold=int(environ['HTTP_GZIP_THRESHOLD_BYTES']) if 'HTTP_GZIP_THRESHOLD_BYTES' in environ.keys() else 65536,
+    metrics=metrics,
+    payload_encoder=payload_encoder,
+    on_cfn_response=lambda event, response_body: record_cfn_response(event=event, response_body=response_body)
+)
 
-# Setting up logging level specific to `botocore` from the environment variable `BOTOCORE_LOGLEVEL`.
-if 'BOTOCORE_LOGLEVEL' in environ.keys():
-    if environ['BOTOCORE_LOGLEVEL'] == 'DEBUG':    
-        logger.info('Setting boto3 logging to DEBUG')
-        boto3.set_stream_logger('') # Log everything on boto3 messages to stdout
-    else:
-        logger.info('Setting boto3 logging to ' + environ['BOTOCORE_LOGLEVEL'])
-        boto3.set_stream_logger(level=logging._nameToLevel[environ['BOTOCORE_LOGLEVEL']]) # Log boto3 messages that match BOTOCORE_LOGLEVEL to stdout
+# Memoizes Organizations, Account and CloudFormation lookups within an invocation and across warm invocations.
+cache = CacheHandler(
+    logger=logger,
+    ttl_seconds=float(environ['CACHE_TTL_SECONDS']) if 'CACHE_TTL_SECONDS' in environ.keys() else 900,
+    max_entries=int(environ['CACHE_MAX_ENTRIES']) if 'CACHE_MAX_ENTRIES' in environ.keys() else 128
+)
+
+subsystems = {}
+subsystems_lock = threading.RLock()
+
+# get_subsystem: Returns the subsystem registered under `name`, building it with `builder` on first use. Subsystems are kept for the lifetime of the container.
+def get_subsystem(name: str, builder):
+
+    with subsystems_lock:
+
+        if name not in subsystems:
+            subsystems.update({ name: builder() })
+
+        return subsystems[name]
+
+# get_region_catalog: Returns the RegionCatalog object, building it on first use. Shared by every subsystem converting or filtering regions.
+def get_region_catalog():
+
+    def build_region_catalog():
+        from region_catalog.region_catalog import RegionCatalog
+        return RegionCatalog(logger=logger)
+
+    return get_subsystem('region_catalog', build_region_catalog)
+
+# get_storage_backend: Returns the persistent storage backend selected by `STORAGE_BACKEND`, building it on first use. `s3` stores objects in `STORAGE_S3_BUCKET`, through `STORAGE_S3_ENDPOINT_URL` when set, `dynamodb` stores them in `STORAGE_DYNAMODB_TABLE`, through `STORAGE_DYNAMODB_ENDPOINT_URL` when set, anything else stores them below `STORAGE_LOCAL_PATH` in `/tmp`.
+def get_storage_backend():
+
+    def build_storage_backend():
+        from storage_backend.storage_backend import LocalFileBackend, S3Backend, DynamoDBBackend
+
+        if 'STORAGE_BACKEND' in environ.keys() and environ['STORAGE_BACKEND'] == 'dynamodb':
+            return DynamoDBBackend(
+                logger=logger,
+                dynamodb_client=client_factory.get_client('dynamodb', endpoint_url=environ['STORAGE_DYNAMODB_ENDPOINT_URL'] if 'STORAGE_DYNAMODB_ENDPOINT_URL' in environ.keys() else None),
+                table_name=environ['STORAGE_DYNAMODB_TABLE'],
+                ttl_seconds=int(environ['STORAGE_DYNAMODB_TTL_SECONDS']) if 'STORAGE_DYNAMODB_TTL_SECONDS' in environ.keys() else None
+            )
+
+        if 'STORAGE_BACKEND' in environ.keys() and environ['STORAGE_BACKEND'] == 's3':
+            return S3Backend(
+                logger=logger,
+                s3_client=client_factory.get_client('s3', endpoint_url=environ['STORAGE_S3_ENDPOINT_URL'] if 'STORAGE_S3_ENDPOINT_URL' in environ.keys() else None),
+                bucket_name=environ['STORAGE_S3_BUCKET'],
+                prefix=environ['STORAGE_S3_PREFIX'] if 'STORAGE_S3_PREFIX' in environ.keys() else ''
+            )
+
+        return LocalFileBackend(logger=logger, base_path=environ['STORAGE_LOCAL_PATH'] if 'STORAGE_LOCAL_PATH' in environ.keys() else '/tmp/aws-python-post-stack-outputs')
+
+    return get_subsystem('storage_backend', build_storage_backend)
+
+# get_cost_explorer: Returns the CostExplorer object, building it on first use. Closed billing months are cached in the storage backend unless `COST_CACHE_ENABLED` is `false`.
+def get_cost_explorer():
 
-costexplorer_client = boto3.client('ce', config=client_config)
-cost_explorer = CostExplorer(logger=logger, costexplorer_client=costexplorer_client)
+    def build_cost_explorer():
+        from cost_explorer.cost_explorer import CostExplorer
+        return CostExplorer(
+            logger=logger,
+            costexplorer_client=client_factory.get_client('ce'),
+            storage_backend=None if 'COST_CACHE_ENABLED' in environ.keys() and environ['COST_CACHE_ENABLED'].lower() == 'false' else get_storage_backend(),
+            cache_key_prefix=environ['AWS_ACCOUNT_ID'] if 'AWS_ACCOUNT_ID' in environ.keys() else 'default',
+            region_catalog=get_region_catalog()
+        )
 
-cloudformation_stack_client = boto3.client('cloudformation', config=client_config)
-cloudformation_stack = CloudFormationStack(logger=logger, cloudformation_client=cloudformation_stack_client)
+    return get_subsystem('cost_explorer', build_cost_explorer)
 
-organizations_client = boto3.client('organizations', config=client_config)
-organizations = Organizations(logger=logger, organizations_client=organizations_client)
+# get_cloudformation_stack: Returns the CloudFormationStack object, building it on first use.
+def get_cloudformation_stack():
 
-account_client = boto3.client('account', config=client_config)
-account = Account(logger=logger, account_client=account_client)
+    def build_cloudformation_stack():
+        from cloudformation_stack.cloudformation_stack import CloudFormationStack
+        return CloudFormationStack(logger=logger, cloudformation_client=client_factory.get_client('cloudformation'), cache=cache)
 
-utils = Utils(logger=logger)
+    return get_subsystem('cloudformation_stack', build_cloudformation_stack)
 
-config_handler = ConfigHandler(logger=logger)
-config = config_handler.get_combined_config()
-logger.debug("Final combined config - " + str(config))
+# get_stack_waiter: Returns the StackWaiter object, building it on first use.
+def get_stack_waiter():
 
-if config["jira"]["enabled"]:
-    jira = JiraHandler(logger=logger, config=config)
+    def build_stack_waiter():
+        from cloudformation_stack.stack_waiter.stack_waiter import StackWaiter
+        return StackWaiter(logger=logger, cloudformation_client=client_factory.get_client('cloudformation'))
 
-# post_http_request: Send a HTTP POST request to the `api_endpoint_url`, returns the HTTP response as dict.
-def post_http_request(event: dict, context: dict, api_endpoint_url: str, http_body: str) -> dict:
+    return get_subsystem('stack_waiter', build_stack_waiter)
+
+# get_regional_stacks: Returns the RegionalStacks object, building it on first use. Its regional CloudFormation clients are pooled by `client_factory`.
+def get_regional_stacks():
+
+    def build_regional_stacks():
+        from cloudformation_stack.regional_stacks.regional_stacks import RegionalStacks
+        return RegionalStacks(logger=logger, client_factory=client_factory, max_workers=int(environ['COLLECTOR_MAX_WORKERS']) if 'COLLECTOR_MAX_WORKERS' in environ.keys() else 8, region_catalog=get_region_catalog())
+
+    return get_subsystem('regional_stacks', build_regional_stacks)
+
+# get_organizations: Returns the Organizations object, building it on first use.
+def get_organizations():
+
+    def build_organizations():
+        from organizations.organizations import Organizations
+        return Organizations(logger=logger, organizations_client=client_factory.get_client('organizations'), cache=cache)
+
+    return get_subsystem('organizations', build_organizations)
+
+# get_account: Returns the Account object, building it on first use.
+def get_account():
+
+    def build_account():
+        from account.account import Account
+        return Account(
+            logger=logger,
+            account_client=client_factory.get_client('account'),
+            cache=cache,
+            contact_types=environ['ALTERNATE_CONTACT_TYPES'].split(',') if 'ALTERNATE_CONTACT_TYPES' in environ.keys() else None
+        )
+
+    return get_subsystem('account', build_account)
+
+# get_utils: Returns the Utils object, building it on first use.
+def get_utils():
+
+    def build_utils():
+        from utils.utils import Utils
+        return Utils(logger=logger, region_catalog=get_region_catalog())
+
+    return get_subsystem('utils', build_utils)
+
+# get_snapshot_store: Returns the SnapshotStore object, building it on first use. Snapshots are kept in the storage backend, so they survive cold starts when it is `s3`.
+def get_snapshot_store():
+
+    def build_snapshot_store():
+        from snapshot_store.snapshot_store import SnapshotStore
+        return SnapshotStore(logger=logger, storage_backend=get_storage_backend())
+
+    return get_subsystem('snapshot_store', build_snapshot_store)
+
+# get_idempotency_store: Returns the IdempotencyStore object, building it on first use. Responses are recorded in the storage backend, so retries reaching another container are only answered from the record with `s3` or `dynamodb`.
+def get_idempotency_store():
+
+    def build_idempotency_store():
+        from idempotency_store.idempotency_store import IdempotencyStore
+        return IdempotencyStore(
+            logger=logger,
+            storage_backend=get_storage_backend(),
+            http_delivery=http_delivery,
+            ttl_seconds=float(environ['IDEMPOTENCY_TTL_SECONDS']) if 'IDEMPOTENCY_TTL_SECONDS' in environ.keys() else 7200
+        )
+
+    return get_subsystem('idempotency_store', build_idempotency_store)
+
+# is_idempotency_enabled: Returns True unless `IDEMPOTENCY_ENABLED` is `false`.
+def is_idempotency_enabled() -> bool:
+    return 'IDEMPOTENCY_ENABLED' not in environ.keys() or environ['IDEMPOTENCY_ENABLED'].lower() != 'false'
+
+# record_cfn_response: Records the CloudFormation response accepted for the request of `event`, answering its retries. The response is already sent, so a storage backend that cannot be built only loses the record.
+def record_cfn_response(event: dict, response_body: dict):
+
+    if not is_idempotency_enabled():
+        return
 
     try:
-        if 'ENDPOINT_TYPE' in environ.keys() and 'ENDPOINT_URL' in environ.keys():
-            
-            if 'API' in environ['ENDPOINT_TYPE'] and environ['ENDPOINT_URL']:
+        get_idempotency_store().record_response(event=event, response_body=response_body)
 
-                logger.debug('API Endpoint URL - ' + str(environ['ENDPOINT_URL']))
-                logger.debug('HTTP Request Body - ' + str(http_body))
+    except Exception:
+        logger.exception('Idempotency Record Error')
 
-                import urllib3
-                http = urllib3.PoolManager()
+# get_config: Returns the combined configuration from `config.json` and the environment variables. The loader caches it until either changes, so warm invocations reuse it.
+def get_config() -> dict:
 
-                # encoded_msg = json.dumps(http_body).encode('utf-8')
+    from config_handler.config_handler import ConfigHandler
+    return ConfigHandler(logger=logger).get_combined_config()
 
-                logger.debug('HTTP POST Request Body - ' + str(json.dumps(http_body)))
+# get_jira: Returns the JiraHandler object, building it on first use. Only called when Jira is enabled in the configuration.
+def get_jira():
 
-                resp = http.request('POST', api_endpoint_url, body=json.dumps(http_body))
+    def build_jira():
+        from jira_handler.jira_handler import JiraHandler
+        return JiraHandler(
+            logger=logger,
+            config=get_config(),
+            metadata_ttl_seconds=float(environ['JIRA_METADATA_TTL_SECONDS']) if 'JIRA_METADATA_TTL_SECONDS' in environ.keys() else 3600,
+            index_refresh_seconds=float(environ['JIRA_INDEX_REFRESH_SECONDS']) if 'JIRA_INDEX_REFRESH_SECONDS' in environ.keys() else 300,
+            metrics=metrics
+        )
 
-                logger.debug('HTTP API Response - ' + str(resp.data.decode('utf-8')))
+    return get_subsystem('jira', build_jira)
 
-                responseData = {'statusCode': 200, 'body': str(resp.data.decode('utf-8'))}
-                logger.debug('HTTP Response - ' + str(responseData))
+# Whether the CloudFormation response of the current invocation was sent, by the handler or the deadline watchdog.
+cfn_response_state = { 'sent': False }
+cfn_response_lock = threading.Lock()
 
-                cfnresponse.send(event, context, cfnresponse.SUCCESS, {})
-                return responseData
-            
-            else:
-                cfnresponse.send(event, context, cfnresponse.FAILED, {})                
-        else:
-            cfnresponse.send(event, context, cfnresponse.FAILED, {})
+# send_cfn_response: Sends the CloudFormation response of the current invocation, unless one was already sent, e.g. by the deadline watchdog. With `record_response` False, the response is not recorded for the retries of the request, which then run for real. Returns True if CloudFormation accepted the response.
+def send_cfn_response(event: dict, context, response_status: str, response_data: dict, reason: str = None, record_response: bool = True) -> bool:
+
+    with cfn_response_lock:
+
+        if cfn_response_state['sent']:
+            logger.info('CloudFormation response already sent, not sending ' + response_status + '.')
+            return False
+
+        cfn_response_state.update({ 'sent': True })
 
-    except urllib3.exceptions.MaxRetryError as max_retry_err:
-        logger.error('HTTP POST API Max Retries failed - ' + str(traceback.print_tb(max_retry_err.__traceback__)))
-        cfnresponse.send(event, context, cfnresponse.FAILED, {})
+    return http_delivery.send_cfn_response(event, context, response_status, response_data, reason=reason, record_response=record_response)
+
+# post_to_endpoint: Send a HTTP POST request with `http_body` to the `api_endpoint_url`, returns the HTTP response as dict, or None if the request failed.
+def post_to_endpoint(api_endpoint_url: str, http_body: dict) -> dict:
+
+    try:
+        logger.debug('API Endpoint URL - %s', api_endpoint_url)
+        logger.debug('HTTP Request Body - %s', LazyDump(http_body))
+
+        resp = http_delivery.post_json(url=api_endpoint_url, payload=http_body)
+
+        responseData = {'statusCode': resp.status, 'body': str(resp.data.decode('utf-8'))}
+        logger.debug('HTTP Response - %s', LazyDump(responseData))
+
+        return responseData
+
+    except urllib3.exceptions.HTTPError as http_err:
+        logger.exception('HTTP POST API Max Retries failed')
 
     except Exception as e:
-        logger.error('HTTP POST API Error - ' + str(traceback.print_tb(e.__traceback__)))
-        cfnresponse.send(event, context, cfnresponse.FAILED, {})
+        logger.exception('HTTP POST API Error')
+
+# post_payload: Send a HTTP POST request with `http_body` to the `api_endpoint_url`. When the endpoint answers a delta payload with 409 Conflict, e.g. as it does not hold its base version, `full_http_body` is sent instead. Returns the HTTP response as dict, or None if the request failed.
+def post_payload(api_endpoint_url: str, http_body: dict, full_http_body: dict = None) -> dict:
+
+    responseData = post_to_endpoint(api_endpoint_url=api_endpoint_url, http_body=http_body)
+
+    if full_http_body is not None and responseData and responseData['statusCode'] == 409:
+        logger.info('API Endpoint rejected the delta payload, sending the full payload.')
+        responseData = post_to_endpoint(api_endpoint_url=api_endpoint_url, http_body=full_http_body)
+
+    return responseData
+
+# post_http_request: Send a HTTP POST request to the `api_endpoint_url`, falling back to `full_http_body` as `post_payload` does, and the custom resource response to CloudFormation, returns the HTTP response as dict. With a `deadline`, the request is abandoned once it runs into the time reserved for the CloudFormation response.
+def post_http_request(event: dict, context: dict, api_endpoint_url: str, http_body: dict, full_http_body: dict = None, deadline: Deadline = None) -> dict:
+
+    if 'ENDPOINT_TYPE' not in environ.keys() or 'ENDPOINT_URL' not in environ.keys() or 'API' not in environ['ENDPOINT_TYPE'] or not environ['ENDPOINT_URL']:
+        send_cfn_response(event, context, FAILED, {})
+        return
+
+    def post():
+        if deadline:
+            return deadline.run_with_budget('endpoint', lambda: post_payload(api_endpoint_url=api_endpoint_url, http_body=http_body, full_http_body=full_http_body), budget=deadline.get_delivery_budget())[1]
+        return post_payload(api_endpoint_url=api_endpoint_url, http_body=http_body, full_http_body=full_http_body)
+
+    # With `CFN_RESPONSE_MODE` set to `concurrent`, the CloudFormation response is sent alongside the endpoint POST and reports SUCCESS whatever the POST outcome, so the custom resource completes sooner.
+    if 'CFN_RESPONSE_MODE' in environ.keys() and environ['CFN_RESPONSE_MODE'] == 'concurrent':
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+
+            cfn_response_future = executor.submit(send_cfn_response, event, context, SUCCESS, {})
+            responseData = post()
+            cfn_response_future.result()
+
+        return responseData
+
+    responseData = post()
+    send_cfn_response(event, context, SUCCESS if responseData else FAILED, {})
+
+    return responseData
 
 # update_payload_with_aws_metadata: This method updates the HTTP request body with local metadata from the AWS Account, such as the Onboarding Stack ID, AWS Region and AWS Account ID where the onboarding stack was deployed. Returns a `dict` with the new HTTP payload.
 def update_payload_with_aws_metadata(http_payload: dict) -> dict:
 
-    logger.debug('Current HTTP Payload - ' + str(http_payload))
+    logger.debug('Current HTTP Payload - %s', LazyDump(http_payload))
 
     http_payload.update({ 'StackId': environ['STACK_ID'] if 'STACK_ID' in environ.keys() else '' })
     http_payload.update({ 'Region': environ['REGION'] if 'REGION' in environ.keys() else '' })
     http_payload.update({ 'AWSAccountId': environ['AWS_ACCOUNT_ID'] if 'AWS_ACCOUNT_ID' in environ.keys() else '' })
 
     # Check if the account is an Organizations Account
-    isOrganizationsAccount = str(organizations.check_organizations_account(account_id = environ['AWS_ACCOUNT_ID'])[0]) if 'AWS_ACCOUNT_ID' in environ.keys() else 'FatalError'
-    http_payload.update({ 'IsOrganizationsAccount': isOrganizationsAccount })
+    if 'AWS_ACCOUNT_ID' in environ.keys():
+        is_organizations_account, email_address = get_organizations().check_organizations_account(account_id = environ['AWS_ACCOUNT_ID'])
+        http_payload.update({ 'IsOrganizationsAccount': str(is_organizations_account) })
+    else:
+        is_organizations_account, email_address = False, ''
+        http_payload.update({ 'IsOrganizationsAccount': 'FatalError' })
 
-    if organizations.check_organizations_account(account_id = environ['AWS_ACCOUNT_ID'])[0]:
-        email_address = organizations.check_organizations_account(account_id = environ['AWS_ACCOUNT_ID'])[1]
+    if is_organizations_account:
         if '@' in email_address:
-            http_payload.update({ 'EmailDomain': organizations.check_organizations_account(account_id = environ['AWS_ACCOUNT_ID'])[1].split('@')[1] })
+            http_payload.update({ 'EmailDomain': email_address.split('@')[1] })
         else:
-            http_payload.update({ 'EmailDomain': organizations.check_organizations_account(account_id = environ['AWS_ACCOUNT_ID'])[1] })
+            http_payload.update({ 'EmailDomain': email_address })
     else:
-        http_payload.update({ 'EmailDomain': str(account.get_aws_account_information()[1]) if account.get_aws_account_information()[0] else environ['ENDUSER_DOMAIN_NAME'] if 'ENDUSER_DOMAIN_NAME' in environ.keys() else '' })
+        # Email domains of whichever alternate contacts are configured are used, even if some contact types are missing.
+        account_information = get_account().get_aws_account_information()
+        http_payload.update({ 'EmailDomain': account_information[1] if account_information[1] else environ['ENDUSER_DOMAIN_NAME'] if 'ENDUSER_DOMAIN_NAME' in environ.keys() else '' })
 
-    logger.debug('Final HTTP Payload - ' + str(http_payload))
+    logger.debug('Final HTTP Payload - %s', LazyDump(http_payload))
 
     return http_payload
     
-# lambda_handler: This script executes as a Custom Resource on the Onboarding CloudFormation stack, gathering required information related to the deployed stack and additional information required for the Well-Architected Framework Review (WAFR) and Foundational Technical Review (FTR). The script is executed when the stack is created, updated and removed.
-def lambda_handler(event, context):
+# collect_cost_matrix: Loads the Cost Explorer cost matrix ahead of the collectors deriving regions, services and MRR from it. Errors are raised, so the scheduler lists this collector and its dependents under `FailedCollectors` rather than each dependent querying Cost Explorer again. Returns an empty `dict` as the matrix itself is not part of the payload.
+def collect_cost_matrix() -> dict:
 
-    logger.debug('Environment variables - ' + str(environ))
+    get_cost_explorer().load_last_90_day_cost_matrix()
 
-    # Create or Update Stack - The following section gets executed when the deployed stack is created or updated using AWS CloudFormation.
-    if event['RequestType'] == 'Create' or event['RequestType'] == 'Update':
+    return {}
 
-        logger.debug(str(event['RequestType']) + ' Stack Event - ' + str(event))
+# collect_regional_stack_outputs: Collects the outputs of the onboarding stack, deployed under the same name, in every active region other than the Lambda's own region, which the nested stack outputs already cover. Returns a `dict` with the outputs keyed by region.
+def collect_regional_stack_outputs() -> dict:
 
-        if 'STACK_ID' in environ.keys():
-
-            describe_stack_resources_response = cloudformation_stack_client.describe_stack_resources(
-                StackName=environ['STACK_ID']
-            )
+    if 'MULTI_REGION_STACK_NAME' in environ.keys():
+        stack_name = environ['MULTI_REGION_STACK_NAME']
+    else:
+        # A StackId has the form `arn:aws:cloudformation:<region>:<account>:stack/<name>/<id>`.
+        stack_name = environ['STACK_ID'].split(':stack/')[1].split('/')[0] if ':stack/' in environ['STACK_ID'] else environ['STACK_ID']
 
-            logger.debug('Describe Stack Resources Response - ' + str(describe_stack_resources_response))
+    home_region = environ['REGION'] if 'REGION' in environ.keys() else ''
+    regions_list = [region for region in get_cost_explorer().get_active_regions_from_last_90_day_billing() if region != home_region]
 
-            nested_stack_creation_in_progress = True
-            nested_stack_creation_status_list = []
-            nested_cloudformation_stack_count = 0
+    return { 'RegionalStackOutputs': get_regional_stacks().get_regional_stack_outputs(
+        stack_name=stack_name,
+        regions_list=regions_list,
+        partition=get_region_catalog().get_partition(region_id=home_region) if home_region else None
+    ) }
 
-            # Loop to wait for all Nested CloudFormation Stacks to be created
-            describe_stack_resources_response = cloudformation_stack_client.describe_stack_resources(
-                StackName=environ['STACK_ID']
-            )
-            
-            for nested_stack in describe_stack_resources_response['StackResources']:
+# is_delta_payloads_enabled: Returns True if `DELTA_PAYLOADS_ENABLED` is `true`, versioning every payload and sending only what changed on Update.
+def is_delta_payloads_enabled() -> bool:
+    return 'DELTA_PAYLOADS_ENABLED' in environ.keys() and environ['DELTA_PAYLOADS_ENABLED'].lower() == 'true'
 
-                if nested_stack['ResourceType'] == 'AWS::CloudFormation::Stack':
+# get_versioned_http_bodies: Versions `stack_outputs` against the snapshot of the last payload delivered for `stack_id`. On Update with a snapshot, the HTTP body is the delta against it, else the full payload. Returns a tuple of the HTTP body, the full HTTP body to fall back to when a delta is sent, else None, and the version of the payload.
+def get_versioned_http_bodies(request_type: str, stack_id: str, stack_outputs: dict) -> tuple[dict, dict, int]:
 
-                    nested_cloudformation_stack_count += 1
-            
-            logger.debug('Nested CloudFormation Total Stack(s) Count - ' + str(nested_cloudformation_stack_count))
+    snapshot = get_snapshot_store().get_snapshot(stack_id=stack_id)
+    version = snapshot['Version'] + 1 if snapshot else 1
 
-            while nested_stack_creation_in_progress:
+    full_http_body = get_snapshot_store().get_full_payload(payload=stack_outputs, version=version)
 
-                for nested_stack in describe_stack_resources_response['StackResources']:
+    if request_type == 'Update' and snapshot:
+        return get_snapshot_store().get_delta_payload(snapshot=snapshot, payload=stack_outputs, version=version), full_http_body, version
 
-                    if nested_stack['ResourceType'] == 'AWS::CloudFormation::Stack' and nested_stack['ResourceStatus'] == 'CREATE_COMPLETE':
+    return full_http_body, None, version
 
-                        nested_stack_creation_status_list.append(True)
+# handle_stack_event: Collects and delivers the payload of a Create, Update or Delete `event`, sending the CloudFormation response at the end. Every step runs within its budget of the `deadline`.
+def handle_stack_event(event: dict, context, deadline: Deadline):
 
-                logger.debug('Nested Stack(s) Creation Status List - ' + str(nested_cloudformation_stack_count))
-
-                if len(nested_stack_creation_status_list) == nested_cloudformation_stack_count:
-                    nested_stack_creation_in_progress = False
-                else:
-                    logger.debug('Retrying in 5 seconds...')
-                    time.sleep(5)
+    # Create or Update Stack - The following section gets executed when the deployed stack is created or updated using AWS CloudFormation.
+    if event['RequestType'] == 'Create' or event['RequestType'] == 'Update':
 
-            stack_outputs = {}
-            stack_outputs.update({'Action': event['RequestType']})
-            stack_outputs.update(update_payload_with_aws_metadata(http_payload = stack_outputs))
-            stack_outputs.update({'ActiveAWSRegions': str(utils.convert_region_ids_to_region_names(regions_list=cost_explorer.get_active_regions_from_last_90_day_billing()))})
-            stack_outputs.update({'ActiveAWSServices': str(cost_explorer.get_active_services_from_last_90_day_billing())})
-            stack_outputs.update({'Monthly Recurring Revenue': str(cost_explorer.get_monthly_recurring_revenue_from_last_90_day_billing())})
+        logger.debug('%s Stack Event - %s', event['RequestType'], LazyDump(event))
 
-            for nested_stack in describe_stack_resources_response['StackResources']:
+        if 'STACK_ID' in environ.keys():
 
-                if nested_stack['ResourceType'] == 'AWS::CloudFormation::Stack':
+            # Wait for every nested CloudFormation stack, including grandchild stacks, to finish deploying.
+            nested_stacks_complete, nested_stack_resources = get_stack_waiter().wait_for_nested_stacks(
+                stack_id=environ['STACK_ID'],
+                timeout=deadline.get_budget(timeout=float(environ['STACK_WAITER_TIMEOUT']) if 'STACK_WAITER_TIMEOUT' in environ.keys() else 540)
+            )
 
-                    logger.debug('Initial Stack Output(s) Dictionary - ' + str(stack_outputs))
-                    
-                    stack_outputs.update(cloudformation_stack.get_stack_outputs(stack_physical_resource_id = nested_stack['PhysicalResourceId']))
+            if not nested_stacks_complete:
+                logger.error('Not all nested CloudFormation stacks completed, collecting the available stack outputs.')
 
-                    logger.debug('Final Stack Output(s) Dictionary - ' + str(stack_outputs))
+            stack_outputs = {}
+            stack_outputs.update({'Action': event['RequestType']})
 
-            logger.debug('Nested CloudFormation Stack Outputs - ' + str(stack_outputs))
+            # Regions, services and MRR are all derived from one cost matrix, refreshed once per invocation.
+            get_cost_explorer().clear_cost_matrix()
+
+            # Independent lookups run concurrently. Results are merged in registration order, keeping the payload key order stable.
+            # Each collector may run for `COLLECTOR_TIMEOUT_SECONDS`, and the collection as a whole until the time reserved for the delivery. Collectors out of time are listed under `MissingCollectors`.
+            collector_timeout = float(environ['COLLECTOR_TIMEOUT_SECONDS']) if 'COLLECTOR_TIMEOUT_SECONDS' in environ.keys() else None
+            scheduler = CollectorScheduler(logger=logger, max_workers=int(environ['COLLECTOR_MAX_WORKERS']) if 'COLLECTOR_MAX_WORKERS' in environ.keys() else 8)
+            scheduler.add_collector('aws_metadata', lambda: update_payload_with_aws_metadata(http_payload = {}), timeout=collector_timeout)
+            scheduler.add_collector('cost_matrix', collect_cost_matrix, timeout=collector_timeout)
+            # Lists and numbers are kept as native types, serialized once by `payload_encoder`.
+            scheduler.add_collector('active_regions', lambda: {'ActiveAWSRegions': get_utils().convert_region_ids_to_region_names(regions_list=get_cost_explorer().get_active_regions_from_last_90_day_billing())}, depends_on=['cost_matrix'], timeout=collector_timeout)
+            scheduler.add_collector('active_services', lambda: {'ActiveAWSServices': get_cost_explorer().get_active_services_from_last_90_day_billing()}, depends_on=['cost_matrix'], timeout=collector_timeout)
+            scheduler.add_collector('monthly_recurring_revenue', lambda: {'Monthly Recurring Revenue': get_cost_explorer().get_monthly_recurring_revenue_from_last_90_day_billing()}, depends_on=['cost_matrix'], timeout=collector_timeout)
+
+            # Outputs of the whole nested stack tree are collected in bulk, the completed nested stacks in the order the waiter read them, followed by their own nested stacks.
+            scheduler.add_collector('nested_stack_outputs', lambda: get_cloudformation_stack().get_nested_stack_tree_outputs(
+                root_stack_id=environ['STACK_ID'],
+                stack_ids=[nested_stack['PhysicalResourceId'] for nested_stack in nested_stack_resources if nested_stack.get('PhysicalResourceId') and nested_stack['ResourceStatus'] in NESTED_STACK_COMPLETE_STATUSES],
+                include_descendants=True
+            ), timeout=collector_timeout)
+
+            # With `COST_TRENDS_ENABLED` set to `true`, numeric spend trends are collected from a separate DAILY query.
+            if 'COST_TRENDS_ENABLED' in environ.keys() and environ['COST_TRENDS_ENABLED'].lower() == 'true':
+                scheduler.add_collector('cost_trends', lambda: {'CostTrends': get_cost_explorer().get_cost_trends_from_last_90_day_billing(
+                    dimensions=tuple(environ['COST_TRENDS_DIMENSIONS'].split(',')) if 'COST_TRENDS_DIMENSIONS' in environ.keys() else ('SERVICE', 'REGION'),
+                    top_n=int(environ['COST_TRENDS_TOP_N']) if 'COST_TRENDS_TOP_N' in environ.keys() else 5
+                )}, timeout=collector_timeout)
+
+            # With `COLLECTION_MODE` set to `multi_region`, the same stack is also read in every other active region.
+            if 'COLLECTION_MODE' in environ.keys() and environ['COLLECTION_MODE'] == 'multi_region':
+                scheduler.add_collector('regional_stack_outputs', collect_regional_stack_outputs, depends_on=['cost_matrix'], timeout=collector_timeout)
+
+            stack_outputs = scheduler.merge_results(payload=stack_outputs, results=scheduler.run(timeout=deadline.get_budget()))
+
+            logger.info('Cache statistics - ' + str(cache.get_stats()))
+
+            logger.debug('Nested CloudFormation Stack Outputs - %s', LazyDump(stack_outputs))
+
+            if get_config()["jira"]["enabled"]:
+
+                # The Jira upsert may run for `JIRA_TIMEOUT_SECONDS`, within the time left ahead of the delivery. A failed or abandoned upsert does not hold back the delivery.
+                try:
+                    deadline.run_with_budget('jira', lambda: get_jira().jira_create_issue(
+                        issue_summary=str(stack_outputs.get("AWSAccountId")) + " - " + str(stack_outputs.get("EmailDomain")),
+                        issue_desc=str(stack_outputs),
+                        issue_payload=stack_outputs,
+                        account_id=stack_outputs.get("AWSAccountId")
+                    ), budget=deadline.get_budget(timeout=float(environ['JIRA_TIMEOUT_SECONDS']) if 'JIRA_TIMEOUT_SECONDS' in environ.keys() else 60))
+
+                except Exception as e:
+                    logger.exception('JIRA Issue Error')
+        
+            http_body, full_http_body, payload_version = stack_outputs, None, None
 
-            if config["jira"]["enabled"]:
+            # With `DELTA_PAYLOADS_ENABLED` set to `true`, an Update only sends the changes since the last payload delivered for the stack.
+            if is_delta_payloads_enabled():
+                http_body, full_http_body, payload_version = get_versioned_http_bodies(request_type=event['RequestType'], stack_id=environ['STACK_ID'], stack_outputs=stack_outputs)
 
-                jira.jira_create_issue(
-                    issue_summary=str(stack_outputs["AWSAccountId"]) + " - " + str(stack_outputs["EmailDomain"]),
-                    issue_desc=str(stack_outputs)
-                )
-        
-            # Calling `post_http_request` to share the HTTP payload with the hosted API. Calls cfnresponse.send at the end of execution.
-            post_http_request(
+            # Calling `post_http_request` to share the HTTP payload with the hosted API. Sends the CloudFormation response at the end of execution.
+            responseData = post_http_request(
                 event=event,
                 context=context,
                 api_endpoint_url=environ['ENDPOINT_URL'],
-                http_body=stack_outputs
+                http_body=http_body,
+                full_http_body=full_http_body,
+                deadline=deadline
             )
+
+            # The snapshot only moves on once the endpoint accepted a complete payload, so the next delta is based on what it holds. After a partial payload, the next delta is answered with 409 Conflict and the full payload is sent.
+            if payload_version and responseData and responseData['statusCode'] < 400 and not get_snapshot_store().is_partial_payload(payload=stack_outputs):
+                get_snapshot_store().put_snapshot(stack_id=environ['STACK_ID'], payload=stack_outputs, version=payload_version)
             
-        # Handling `cfnresponse` error response when `STACK_ID` for the nested parent stack cannot be found within the runtime environment variables. 
+        # Handling the CloudFormation error response when `STACK_ID` for the nested parent stack cannot be found within the runtime environment variables. 
         else:
             logger.error(str(event['RequestType']) + '  Stack HTTP API Error - Environment variable `STACK_ID` not present.')
-            cfnresponse.send(event, context, cfnresponse.FAILED, {})
+            send_cfn_response(event, context, FAILED, {})
 
     # Delete Stack - The following section gets executed when the deployed stack is deleted from AWS CloudFormation.
     elif event['RequestType'] == 'Delete':
 
         try:
-            logger.debug('Delete Stack Event - ' + str(event))
+            logger.debug('Delete Stack Event - %s', LazyDump(event))
 
             stack_outputs = {}
             stack_outputs.update({'Action': event['RequestType']})
             stack_outputs = update_payload_with_aws_metadata(http_payload = stack_outputs)
         
-            # Calls cfnresponse.send at the end of execution.
-            post_http_request(
+            # Sends the CloudFormation response at the end of execution.
+            responseData = post_http_request(
                 event=event,
                 context=context,
                 api_endpoint_url=environ['ENDPOINT_URL'],
-                http_body=stack_outputs
+                http_body=stack_outputs,
+                deadline=deadline
             )
 
-        # Handling `cfnresponse` error response when the stack is deleted but there is an exception in calling the API. 
+            if is_delta_payloads_enabled() and 'STACK_ID' in environ.keys() and responseData and responseData['statusCode'] < 400:
+                get_snapshot_store().delete_snapshot(stack_id=environ['STACK_ID'])
+
+        # Handling the CloudFormation error response when the stack is deleted but there is an exception in calling the API. 
         except Exception as e:
-            logger.error('Delete Stack HTTP API Error - ' + str(traceback.print_tb(e.__traceback__)))
-            cfnresponse.send(event, context, cfnresponse.FAILED, {})
\ No newline at end of file
+            logger.exception('Delete Stack HTTP API Error')
+            send_cfn_response(event, context, FAILED, {})
+
+# lambda_handler: This script executes as a Custom Resource on the Onboarding CloudFormation stack, gathering required information related to the deployed stack and additional information required for the Well-Architected Framework Review (WAFR) and Foundational Technical Review (FTR). The script is executed when the stack is created, updated and removed.
+@metrics.flush_after
+def lambda_handler(event, context):
+
+    logger.debug('Environment variables - %s', LazyDump(environ, max_items=100))
+
+    cache.begin_request()
+
+    with cfn_response_lock:
+        cfn_response_state.update({ 'sent': False })
+
+    deadline = None
+
+    # Everything from the idempotency lookup on is guarded, so a misconfigured storage backend or deadline still ends in a response to CloudFormation.
+    try:
+
+        # A retried RequestId is answered with the CloudFormation response recorded for it, without waiting for the stacks again, querying Cost Explorer, or writing to Jira and the API Endpoint.
+        if is_idempotency_enabled() and get_idempotency_store().resend_recorded_response(event=event):
+            cfn_response_state.update({ 'sent': True })
+            return
+
+        # The remaining time of the invocation is shared out between the steps, keeping `DEADLINE_RESERVE_SECONDS` for the delivery and `DEADLINE_RESPONSE_RESERVE_SECONDS` for the CloudFormation response.
+        deadline = Deadline(
+            logger=logger,
+            context=context,
+            reserve_seconds=float(environ['DEADLINE_RESERVE_SECONDS']) if 'DEADLINE_RESERVE_SECONDS' in environ.keys() else 20,
+            response_reserve_seconds=float(environ['DEADLINE_RESPONSE_RESERVE_SECONDS']) if 'DEADLINE_RESPONSE_RESERVE_SECONDS' in environ.keys() else 5
+        )
+
+        # Should a step stall past every budget, a FAILED response is sent ahead of the Lambda timeout, rather than leaving the stack waiting for an hour. The timeout may be transient, so a retry of the request is not answered with this response.
+        deadline.start_watchdog(lambda: send_cfn_response(event, context, FAILED, {}, reason='The Lambda function ran out of time, see the details in CloudWatch Log Stream: ' + str(context.log_stream_name), record_response=False))
+
+        handle_stack_event(event=event, context=context, deadline=deadline)
+
+    except Exception:
+        logger.exception(str(event.get('RequestType')) + ' Stack Error')
+
+    finally:
+        if deadline:
+            deadline.cancel_watchdog()
+
+        # CloudFormation always receives a response, even when the event failed before sending one. As with the watchdog, the error may be transient, so it is not recorded for retries.
+        if not cfn_response_state['sent']:
+            send_cfn_response(event, context, FAILED, {}, record_response=False)
+
+# organization_sweep_handler: Batch entry point, run from the AWS Organizations management account, collecting the payload of every active member account through the read-only role `ORG_SWEEP_ROLE_NAME` and POSTing one payload per account to the API Endpoint. `event` may restrict the sweep with a list of `AccountIds`. Returns the sweep summary as `dict`.
+@metrics.flush_after
+def organization_sweep_handler(event, context):
+
+    logger.debug('Organization Sweep Event - %s', LazyDump(event))
+
+    cache.begin_request()
+
+    if 'ORG_SWEEP_ROLE_NAME' not in environ.keys() or 'ENDPOINT_URL' not in environ.keys():
+        logger.error('Organization Sweep Error - Environment variables `ORG_SWEEP_ROLE_NAME` and `ENDPOINT_URL` are required.')
+        return {}
+
+    from organization_sweep.organization_sweep import OrganizationSweep
+
+    max_workers = int(environ['ORG_SWEEP_MAX_WORKERS']) if 'ORG_SWEEP_MAX_WORKERS' in environ.keys() else 16
+
+    # Every sweep worker POSTs its own account payload, so the sweep keeps a connection per worker rather than sharing the pool of the custom resource.
+    sweep_http_delivery = get_subsystem('organization_sweep_http_delivery', lambda: HttpDelivery(
+        logger=logger,
+        connect_timeout=float(environ['HTTP_CONNECT_TIMEOUT']) if 'HTTP_CONNECT_TIMEOUT' in environ.keys() else 3.05,
+        read_timeout=float(environ['HTTP_READ_TIMEOUT']) if 'HTTP_READ_TIMEOUT' in environ.keys() else 10,
+        max_retries=int(environ['HTTP_MAX_RETRIES']) if 'HTTP_MAX_RETRIES' in environ.keys() else 3,
+        gzip_threshold=int(environ['HTTP_GZIP_THRESHOLD_BYTES']) if 'HTTP_GZIP_THRESHOLD_BYTES' in environ.keys() else 65536,
+        metrics=metrics,
+        payload_encoder=payload_encoder,
+        max_connections=max_workers
+    ))
+
+    organization_sweep = OrganizationSweep(
+        logger=logger,
+        client_factory=client_factory,
+        organizations=get_organizations(),
+        http_delivery=sweep_http_delivery,
+        endpoint_url=environ['ENDPOINT_URL'],
+        role_name=environ['ORG_SWEEP_ROLE_NAME'],
+        stack_name=environ['ORG_SWEEP_STACK_NAME'] if 'ORG_SWEEP_STACK_NAME' in environ.keys() else None,
+        management_account_id=environ['AWS_ACCOUNT_ID'] if 'AWS_ACCOUNT_ID' in environ.keys() else None,
+        max_workers=max_workers,
+        account_timeout=float(environ['ORG_SWEEP_ACCOUNT_TIMEOUT']) if 'ORG_SWEEP_ACCOUNT_TIMEOUT' in environ.keys() else 120,
+        partition=get_region_catalog().get_partition(region_id=environ['REGION']) if 'REGION' in environ.keys() else 'aws',
+        region_catalog=get_region_catalog()
+    )
+
+    # The sweep as a whole stops `DEADLINE_RESERVE_SECONDS` ahead of the Lambda timeout, on top of the `ORG_SWEEP_ACCOUNT_TIMEOUT` of every account.
+    deadline = Deadline(
+        logger=logger,
+        context=context,
+        reserve_seconds=float(environ['DEADLINE_RESERVE_SECONDS']) if 'DEADLINE_RESERVE_SECONDS' in environ.keys() else 20
+    )
+
+    return organization_sweep.run(account_ids=event.get('AccountIds') if isinstance(event, dict) else None, deadline=deadline)
@@ -0,0 +1,170 @@
+import logging
+import json
+import gzip
+import random
+import time
+import urllib3
+from log_handler.log_handler import LazyDump
+
+# CloudFormation custom resource response statuses, as defined by `cfnresponse`.
+SUCCESS = 'SUCCESS'
+FAILED = 'FAILED'
+
+# HTTP status codes worth retrying, anything else is returned to the caller as is.
+RETRYABLE_STATUS_CODES = [429, 500, 502, 503, 504]
+
+# HttpDelivery - pooled, keep-alive HTTP client shared by the API endpoint POST and the CloudFormation custom resource response
+class HttpDelivery:
+
+    # HttpDelivery Constructor
+    # logger: Logger object
+    # connect_timeout: Seconds allowed to establish a connection
+    # read_timeout: Seconds allowed between bytes of the response
+    # max_retries: Number of retries after the first attempt, on connection errors, timeouts and retryable status codes
+    # backoff_base: Initial backoff in seconds, doubled on every retry
+    # backoff_max: Upper bound of the backoff in seconds
+    # gzip_threshold: Bodies of at least this many bytes are gzip compressed, where the request allows it
+    # metrics: Optional MetricsRecorder object recording every request
+    # payload_encoder: Optional PayloadEncoder object serializing and compressing the `post_json` payloads, else they are sent as plain `json.dumps` text
+    # on_cfn_response: Optional function called with the event and the response body of every CloudFormation response accepted by `send_cfn_response`
+    # max_connections: Number of connections kept alive per host, at least the number of threads sending requests at the same time
+    #
+    # Returns: HttpDelivery object
+    # Raises: None
+    def __init__(self, logger: logging.Logger, connect_timeout: float = 3.05, read_timeout: float = 10, max_retries: int = 3, backoff_base: float = 0.25, backoff_max: float = 4, gzip_threshold: int = 65536, metrics = None, payload_encoder = None, on_cfn_response = None, max_connections: int = 4):
+
+        self.logger = logger
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.gzip_threshold = gzip_threshold
+        self.metrics = metrics
+        self.payload_encoder = payload_encoder
+        self.on_cfn_response = on_cfn_response
+
+        # Connections are kept alive in the pool and reused across requests and warm invocations. Retries are handled by `request` to apply jittered backoff.
+        self.http = urllib3.PoolManager(
+            num_pools=4,
+            maxsize=max_connections,
+            timeout=urllib3.Timeout(connect=connect_timeout, read=read_timeout),
+            retries=False
+        )
+
+    # __get_backoff_delay: Returns the jittered exponential delay in seconds before retry number `attempt`.
+    def __get_backoff_delay(self, attempt: int) -> float:
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    # __record: Records a request, including its retries, under `operation_name` when metrics are enabled.
+    def __record(self, operation_name: str, start_time: float, attempt: int, throttled: bool, response: urllib3.response.HTTPResponse = None):
+
+        if self.metrics:
+            self.metrics.record(
+                service='http',
+                operation=operation_name,
+                latency_ms=(time.perf_counter() - start_time) * 1000,
+                retries=attempt,
+                throttled=throttled,
+                error=response is None or response.status >= 400,
+                response_size=len(response.data) if response is not None and response.data else 0
+            )
+
+    # request: Sends a HTTP request with bounded, jittered retries. Bodies of at least `gzip_threshold` bytes are gzip compressed when `compress` is True. The request is recorded in `metrics` as `operation_name`, defaulting to the method. Returns the `urllib3` HTTP response of the last attempt.
+    # Raises: urllib3.exceptions.HTTPError when the last attempt failed to connect or timed out
+    def request(self, method: str, url: str, body: bytes = b'', headers: dict = None, compress: bool = True, operation_name: str = None) -> urllib3.response.HTTPResponse:
+
+        headers = dict(headers) if headers else {}
+
+        if compress and len(body) >= self.gzip_threshold:
+            self.logger.debug('Compressing HTTP body of %d bytes', len(body))
+            body = gzip.compress(body)
+            headers.update({ 'Content-Encoding': 'gzip' })
+
+        headers.update({ 'Content-Length': str(len(body)) })
+
+        attempt = 0
+        throttled = False
+        start_time = time.perf_counter()
+
+        while True:
+
+            try:
+                response = self.http.request(method, url, body=body, headers=headers)
+                throttled = throttled or response.status == 429
+
+                if response.status not in RETRYABLE_STATUS_CODES or attempt >= self.max_retries:
+                    self.__record(operation_name=operation_name or method, start_time=start_time, attempt=attempt, throttled=throttled, response=response)
+                    return response
+
+                self.logger.info('HTTP ' + method + ' returned ' + str(response.status) + ', retrying.')
+
+            except urllib3.exceptions.HTTPError as http_error:
+
+                if attempt >= self.max_retries:
+                    self.__record(operation_name=operation_name or method, start_time=start_time, attempt=attempt, throttled=throttled)
+                    raise
+
+                self.logger.info('HTTP ' + method + ' failed - ' + str(http_error) + ', retrying.')
+
+            time.sleep(self.__get_backoff_delay(attempt=attempt))
+            attempt += 1
+
+    # post_json: POSTs `payload` as JSON to `url`, encoded once by `payload_encoder` when set. Returns the `urllib3` HTTP response.
+    def post_json(self, url: str, payload: dict) -> urllib3.response.HTTPResponse:
+
+        if self.payload_encoder:
+            body, headers = self.payload_encoder.encode(payload=payload)
+
+            # The encoder already compressed the body when worth it.
+            return self.request('POST', url, body=body, headers=headers, compress=False, operation_name='PostJson')
+
+        return self.request(
+            'POST',
+            url,
+            body=json.dumps(payload).encode('utf-8'),
+            headers={ 'Content-Type': 'application/json' },
+            operation_name='PostJson'
+        )
+
+    # put_cfn_response_body: PUTs a custom resource `response_body` to the pre-signed S3 `response_url`. Returns True if CloudFormation accepted the response.
+    def put_cfn_response_body(self, response_url: str, response_body: dict) -> bool:
+
+        self.logger.debug('CloudFormation Response Body - %s', LazyDump(response_body))
+
+        try:
+            # The pre-signed URL is signed without a content type, and S3 stores the body as is, so it is never compressed.
+            response = self.request(
+                'PUT',
+                response_url,
+                body=json.dumps(response_body).encode('utf-8'),
+                headers={ 'Content-Type': '' },
+                compress=False,
+                operation_name='CloudFormationResponse'
+            )
+
+            self.logger.info('CloudFormation Response Status code - ' + str(response.status))
+            return response.status == 200
+
+        except Exception as e:
+            self.logger.exception('CloudFormation Response Error')
+            return False
+
+    # send_cfn_response: Sends the custom resource response to the pre-signed S3 `ResponseURL` of `event`, with the same body as `cfnresponse.send`. Once accepted, the response is passed to `on_cfn_response`, unless `record_response` is False. Returns True if CloudFormation accepted the response.
+    def send_cfn_response(self, event: dict, context, response_status: str, response_data: dict, physical_resource_id: str = None, no_echo: bool = False, reason: str = None, record_response: bool = True) -> bool:
+
+        response_body = {
+            'Status': response_status,
+            'Reason': reason or 'See the details in CloudWatch Log Stream: {}'.format(context.log_stream_name),
+            'PhysicalResourceId': physical_resource_id or context.log_stream_name,
+            'StackId': event['StackId'],
+            'RequestId': event['RequestId'],
+            'LogicalResourceId': event['LogicalResourceId'],
+            'NoEcho': no_echo,
+            'Data': response_data
+        }
+
+        accepted = self.put_cfn_response_body(response_url=event['ResponseURL'], response_body=response_body)
+
+        if accepted and record_response and self.on_cfn_response:
+            self.on_cfn_response(event, response_body)
+
+        return accepted
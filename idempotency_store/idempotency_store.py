@@ -0,0 +1,74 @@
+import logging
+import json
+import hashlib
+import time
+from http_delivery.http_delivery import HttpDelivery
+
+# IdempotencyStore - records the CloudFormation response of every custom resource request, so a retried RequestId is answered without running the request again
+class IdempotencyStore:
+
+    # IdempotencyStore Constructor
+    # logger: Logger object
+    # storage_backend: LocalFileBackend, S3Backend or DynamoDBBackend object the responses are recorded in
+    # http_delivery: HttpDelivery object resending the recorded responses
+    # ttl_seconds: Seconds a recorded response is resent for, CloudFormation gives up on a custom resource after an hour
+    # key_prefix: Storage key prefix of every recorded response
+    #
+    # Returns: IdempotencyStore object
+    # Raises: None
+    def __init__(self, logger: logging.Logger, storage_backend, http_delivery: HttpDelivery, ttl_seconds: float = 7200, key_prefix: str = 'idempotency'):
+
+        self.logger = logger
+        self.storage_backend = storage_backend
+        self.http_delivery = http_delivery
+        self.ttl_seconds = ttl_seconds
+        self.key_prefix = key_prefix
+
+    # __get_record_key: Returns the storage key of the response recorded for the request of `event`, a RequestId being unique within its stack.
+    def __get_record_key(self, event: dict) -> str:
+        return self.key_prefix + '/' + hashlib.sha256((event['StackId'] + '/' + event['RequestId']).encode('utf-8')).hexdigest() + '.json'
+
+    # get_recorded_response: Returns the CloudFormation response body recorded for the request of `event` as `dict`, or None if there is none, it expired or it cannot be read.
+    def get_recorded_response(self, event: dict) -> dict:
+
+        try:
+            record = self.storage_backend.get(key=self.__get_record_key(event=event))
+
+            if record is None:
+                return None
+
+            record = json.loads(record)
+
+            return record['ResponseBody'] if record['ExpiresAt'] > time.time() else None
+
+        except Exception as e:
+            self.logger.exception('Idempotency Record Read Error')
+            return None
+
+    # record_response: Records `response_body` as the CloudFormation response to the request of `event`. Only the first response of a request is recorded. Errors are logged, leaving a retry to run the request again.
+    def record_response(self, event: dict, response_body: dict):
+
+        try:
+            recorded = self.storage_backend.create(
+                key=self.__get_record_key(event=event),
+                data=json.dumps({ 'ExpiresAt': time.time() + self.ttl_seconds, 'ResponseBody': response_body }).encode('utf-8')
+            )
+
+            if not recorded:
+                self.logger.info('RequestId %s already has a recorded response.', event['RequestId'])
+
+        except Exception as e:
+            self.logger.exception('Idempotency Record Write Error')
+
+    # resend_recorded_response: Resends the CloudFormation response recorded for the request of `event` to its `ResponseURL`. Returns True if a response was recorded, in which case the request must not run again.
+    def resend_recorded_response(self, event: dict) -> bool:
+
+        response_body = self.get_recorded_response(event=event)
+
+        if response_body is None:
+            return False
+
+        self.logger.info('RequestId %s was already answered with %s, resending the recorded CloudFormation response.', event['RequestId'], response_body['Status'])
+        self.http_delivery.put_cfn_response_body(response_url=event['ResponseURL'], response_body=response_body)
+
+        return True
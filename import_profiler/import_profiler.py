@@ -0,0 +1,100 @@
+import argparse
+import json
+import subprocess
+import sys
+
+# ImportProfiler - measures the import-time cost of a module with `python -X importtime` and reports it per top-level package
+class ImportProfiler:
+
+    # ImportProfiler Constructor
+    # module_name: Name of the module whose import is profiled, e.g. `handler`
+    # python_executable: Python interpreter used to run the import, defaults to the current interpreter
+    #
+    # Returns: ImportProfiler object
+    # Raises: None
+    def __init__(self, module_name: str = 'handler', python_executable: str = None):
+
+        self.module_name = module_name
+        self.python_executable = python_executable if python_executable else sys.executable
+
+    # run_importtime: Imports `module_name` in a fresh interpreter with `-X importtime`. Returns the raw `-X importtime` report written to stderr as `str`.
+    def run_importtime(self) -> str:
+
+        completed_process = subprocess.run(
+            [self.python_executable, '-X', 'importtime', '-c', 'import ' + self.module_name],
+            capture_output=True,
+            text=True
+        )
+
+        if completed_process.returncode != 0:
+            raise RuntimeError('Importing `' + self.module_name + '` failed - ' + completed_process.stderr[-2000:])
+
+        return completed_process.stderr
+
+    # parse_importtime: Parses a `-X importtime` report. Returns a `list` of `dict` with the `self_us`, `cumulative_us`, `depth` and `module` of every imported module, in import order.
+    def parse_importtime(self, importtime_report: str) -> list:
+
+        imported_modules = []
+
+        for line in importtime_report.splitlines():
+
+            # Lines look like `import time:       123 |        456 |     package.module`, the indentation of the name gives the nesting depth.
+            if not line.startswith('import time:') or 'self [us]' in line:
+                continue
+
+            self_us, cumulative_us, module = line[len('import time:'):].split('|', 2)
+            imported_modules.append({
+                'self_us': int(self_us.strip()),
+                'cumulative_us': int(cumulative_us.strip()),
+                'depth': (len(module) - len(module.lstrip(' '))) // 2,
+                'module': module.strip()
+            })
+
+        return imported_modules
+
+    # get_report: Profiles the import of `module_name`. Returns a `dict` with the total import time in milliseconds and the self time of every top-level package in milliseconds, largest first.
+    def get_report(self) -> dict:
+
+        imported_modules = self.parse_importtime(importtime_report=self.run_importtime())
+
+        packages = {}
+        for imported_module in imported_modules:
+            package = imported_module['module'].split('.')[0]
+            packages[package] = packages.get(package, 0) + imported_module['self_us']
+
+        total_us = sum(imported_module['self_us'] for imported_module in imported_modules)
+
+        return {
+            'module': self.module_name,
+            'total_ms': round(total_us / 1000, 1),
+            'packages_ms': { package: round(self_us / 1000, 1) for package, self_us in sorted(packages.items(), key=lambda item: item[1], reverse=True) }
+        }
+
+# main: Prints the import-time report of a module. Exits with a non-zero status when `--budget-ms` is given and the total import time exceeds it.
+def main(argv: list = None) -> int:
+
+    parser = argparse.ArgumentParser(description='Report the import-time cost of a module per top-level package.')
+    parser.add_argument('--module', default='handler', help='Module to profile, defaults to `handler`.')
+    parser.add_argument('--top', type=int, default=20, help='Number of packages to report.')
+    parser.add_argument('--budget-ms', type=float, default=None, help='Fail when the total import time exceeds this many milliseconds.')
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON.')
+    arguments = parser.parse_args(argv)
+
+    report = ImportProfiler(module_name=arguments.module).get_report()
+    report['packages_ms'] = dict(list(report['packages_ms'].items())[:arguments.top])
+
+    if arguments.json:
+        print(json.dumps(report, indent=4))
+    else:
+        print('Import time of `' + report['module'] + '` - ' + str(report['total_ms']) + 'ms')
+        for package, package_ms in report['packages_ms'].items():
+            print('{:>10.1f}ms  {}'.format(package_ms, package))
+
+    if arguments.budget_ms is not None and report['total_ms'] > arguments.budget_ms:
+        print('Import time budget of ' + str(arguments.budget_ms) + 'ms exceeded.', file=sys.stderr)
+        return 1
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
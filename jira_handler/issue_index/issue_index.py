@@ -0,0 +1,115 @@
+import logging
+import threading
+import time
+import copy
+from jira.client import JIRA
+
+# Label tagged onto every issue tracked by the index, the index sweep only reads issues carrying it.
+INDEXED_ISSUE_LABEL = 'aws-stack-outputs'
+
+# Prefix of the label keying an issue by AWS account ID.
+ACCOUNT_LABEL_PREFIX = 'aws-account-'
+
+# get_account_label: Returns the label keying an issue by `account_id`.
+def get_account_label(account_id: str) -> str:
+    return ACCOUNT_LABEL_PREFIX + str(account_id)
+
+# IssueIndex - local index of AWS account ID to open JIRA issue, filled by one paginated JQL sweep and refreshed incrementally from recently updated issues
+class IssueIndex:
+
+    # IssueIndex Constructor
+    # logger: Logger object
+    # project_key: Project key string
+    # properties: Comma separated issue entity properties kept alongside every indexed issue
+    # refresh_interval_seconds: Seconds after which the index is refreshed with the issues updated since the last sync
+    #
+    # Returns: IssueIndex object
+    # Raises: None
+    def __init__(self, logger: logging.Logger, project_key: str, properties: str = None, refresh_interval_seconds: float = 300):
+
+        self.logger = logger
+        self.project_key = project_key
+        self.properties = properties
+        self.refresh_interval_seconds = refresh_interval_seconds
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._last_sync = None
+
+    # __get_account_id: Returns the AWS account ID an issue is keyed by, from its labels, or an empty string.
+    def __get_account_id(self, raw_issue: dict) -> str:
+
+        for label in raw_issue['fields'].get('labels') or []:
+            if label.startswith(ACCOUNT_LABEL_PREFIX):
+                return label[len(ACCOUNT_LABEL_PREFIX):]
+
+        return ''
+
+    # __search: Runs a paginated JQL search returning the raw issues with the fields and properties the index keeps.
+    def __search(self, jira: JIRA, jql: str) -> list:
+
+        issues = jira.search_issues(
+            jql,
+            maxResults=False,
+            fields='summary,labels,status',
+            properties=self.properties
+        )
+
+        return [issue.raw for issue in issues]
+
+    # refresh: Fills the index with one sweep of the open indexed issues on first use, then applies the issues updated since the last sync once `refresh_interval_seconds` have passed. Issues that left the `To Do` status are dropped. No search is made while the index is fresh.
+    def refresh(self, jira: JIRA, force: bool = False):
+
+        with self._lock:
+
+            now = time.time()
+
+            if not force and self._last_sync is not None and now - self._last_sync < self.refresh_interval_seconds:
+                return
+
+            if self._last_sync is None:
+
+                raw_issues = self.__search(jira=jira, jql='project = ' + self.project_key + ' AND status = "To Do" AND labels = "' + INDEXED_ISSUE_LABEL + '"')
+                self._entries.clear()
+
+            else:
+
+                # A relative date avoids any dependency on the Jira user's time zone, one extra minute covers the minute granularity of JQL dates.
+                minutes_since_last_sync = int((now - self._last_sync) // 60) + 1
+                raw_issues = self.__search(jira=jira, jql='project = ' + self.project_key + ' AND labels = "' + INDEXED_ISSUE_LABEL + '" AND updated >= "-' + str(minutes_since_last_sync) + 'm"')
+
+            for raw_issue in raw_issues:
+
+                account_id = self.__get_account_id(raw_issue=raw_issue)
+                if not account_id:
+                    continue
+
+                status = raw_issue['fields'].get('status')
+                if status and status.get('name') != 'To Do':
+                    if account_id in self._entries and self._entries[account_id]['key'] == raw_issue['key']:
+                        del self._entries[account_id]
+                    continue
+
+                self._entries.update({ account_id: raw_issue })
+
+            self._last_sync = now
+
+            self.logger.debug('JIRA Issue Index synced %d issue(s), %d account(s) indexed.', len(raw_issues), len(self._entries))
+
+    # lookup: Returns a copy of the raw issue indexed for `account_id`, or None.
+    def lookup(self, account_id: str) -> dict:
+
+        with self._lock:
+            raw_issue = self._entries.get(str(account_id))
+            return copy.deepcopy(raw_issue) if raw_issue else None
+
+    # record: Indexes `raw_issue` for `account_id` after it was created or updated.
+    def record(self, account_id: str, raw_issue: dict):
+
+        with self._lock:
+            self._entries.update({ str(account_id): copy.deepcopy(raw_issue) })
+
+    # discard: Drops the issue indexed for `account_id`, e.g. when it no longer exists.
+    def discard(self, account_id: str):
+
+        with self._lock:
+            self._entries.pop(str(account_id), None)
@@ -1,6 +1,22 @@
 import logging
+import json
+import hashlib
 from jira.client import JIRA
 from jira.resources import Issue
+from jira.utils import json_loads
+from jira.exceptions import JIRAError
+from jira_handler.issue_index.issue_index import IssueIndex, INDEXED_ISSUE_LABEL, get_account_label
+from log_handler.log_handler import LazyDump
+
+# Maximum number of issues Jira accepts in one bulk create request, also used to bound the size of a single JQL query.
+JIRA_BULK_BATCH_SIZE = 50
+
+# Issue entity property holding the content digest of the payload an issue was last written with.
+ISSUE_DIGEST_PROPERTY_KEY = 'stack-outputs-digest'
+
+# compute_content_digest: Returns the SHA-256 hex digest of the canonical JSON form of `content`, stable across processes unlike `hash()`.
+def compute_content_digest(content) -> str:
+    return hashlib.sha256(json.dumps(content, sort_keys=True, separators=(',', ':'), default=str).encode('utf-8')).hexdigest()
 
 # Issues - Python class to manipulate JIRA issues using the JIRA Python SDK
 class Issues:
@@ -10,125 +26,340 @@ class Issues:
     # project_key: Project key string
     # email_domain: Email domain string
     # default_issue_labels: Default issue labels list
+    # issue_type_ids: Optional dict of issue type name to ID, avoids resolving the issue type by name on create
+    # issue_index: Optional IssueIndex object resolving issues by AWS account ID without a search
     # logger: Logger object
     #
     # Returns: Issues object
     # Raises: None
-    def __init__(self, logger: logging.Logger, jira_credentials: JIRA, project_key: str, project_id: int, email_domain: str, default_issue_labels: list = []):
+    def __init__(self, logger: logging.Logger, jira_credentials: JIRA, project_key: str, project_id: int, email_domain: str, default_issue_labels: list = [], issue_type_ids: dict = None, issue_index: IssueIndex = None):
         self.jira = jira_credentials
         self.project_key = project_key
         self.project_id = project_id
         self.email_domain = email_domain
         self.default_issue_labels = default_issue_labels
+        self.issue_type_ids = issue_type_ids if issue_type_ids else {}
+        self.issue_index = issue_index
         self.logger = logger
-    
-    # Check if JIRA issue already exists, returns bool and issue_key if key exists
-    def __does_issue_exist(self, issue_summary: str) -> tuple[bool, str]:
+
+    # Build the JQL clause matching an issue summary. Quotes and backslashes would end the JQL phrase early, and are not significant to the text search, so they are left out.
+    def __get_summary_clause(self, issue_summary: str) -> str:
+        return 'summary ~ "\\"' + issue_summary.replace('\\', ' ').replace('"', ' ') + '\\""'
+
+    # Search for open JIRA issues matching any of the summaries, returns the matching issues with their summary, labels and content digest property. Descriptions are not transferred.
+    def __search_issues(self, issue_summaries: list) -> list:
 
         # Search for issues in this project where the given summary matches exactly and the status is not Done to avoid older issues being updated with newer findings. Newer findings require newer tickets in that case.
         issues = self.jira.search_issues(
-            'project = ' + self.project_key + ' AND status = "To Do" AND summary ~ "\\"' + issue_summary + '\\""'
+            'project = ' + self.project_key + ' AND status = "To Do" AND (' + ' OR '.join([self.__get_summary_clause(issue_summary) for issue_summary in issue_summaries]) + ')',
+            maxResults=False,
+            fields='summary,labels',
+            properties=ISSUE_DIGEST_PROPERTY_KEY
         )
 
-        self.logger.debug("Search Issue results - " + str(issues))
+        self.logger.debug("Search Issue results - %s", LazyDump(issues))
+
+        return issues
+
+    # Check if JIRA issue already exists, returns bool and the issue, with its summary, labels and content digest property, if it exists
+    def __does_issue_exist(self, issue_summary: str) -> tuple[bool, Issue]:
+
+        issues = self.__search_issues(issue_summaries=[issue_summary])
 
         if len(issues) > 0:
             self.logger.info("Issue already exists - " + str(issues))
-            return True, issues[0].key
+            return True, issues[0]
         else:
             self.logger.info("Issue does not exist - " + str(issues))
-            return False, ''
-    
-    # Create a new JIRA issue
-    def __create_issue(self, issue_summary: str, issue_desc: str, issue_type: str) -> Issue:        
+            return False, None
+
+    # Get the content digest an issue was last written with, returns an empty string if the issue has none
+    def __get_issue_digest(self, issue: Issue) -> str:
 
-        # Create an issue
-        new_issue = self.jira.create_issue(
-            fields={
-                'project': self.project_id,
+        digest_property = issue.raw.get('properties', {}).get(ISSUE_DIGEST_PROPERTY_KEY, {})
+        return digest_property.get('digest', '') if isinstance(digest_property, dict) else ''
+
+    # Build the entity properties written alongside the issue fields
+    def __get_issue_properties(self, content_digest: str) -> list:
+        return [{'key': ISSUE_DIGEST_PROPERTY_KEY, 'value': {'digest': content_digest}}]
+
+    # Find the open JIRA issue of an AWS account in the issue index, returns the issue or None. Only searches when the index is due a refresh.
+    def __find_indexed_issue(self, account_id: str) -> Issue:
+
+        if not self.issue_index or not account_id:
+            return None
+
+        self.issue_index.refresh(jira=self.jira)
+        raw_issue = self.issue_index.lookup(account_id=account_id)
+
+        if raw_issue:
+            self.logger.info("Issue found in index - " + raw_issue['key'])
+            return Issue(self.jira._options, self.jira._session, raw=raw_issue)
+
+        return None
+
+    # Record an issue in the issue index after it was created or updated
+    def __record_indexed_issue(self, account_id: str, issue: Issue, issue_summary: str, labels: list, content_digest: str):
+
+        if not self.issue_index or not account_id:
+            return
+
+        self.issue_index.record(account_id=account_id, raw_issue={
+            'id': issue.id,
+            'key': issue.key,
+            'self': issue.self,
+            'fields': {
                 'summary': issue_summary,
-                'description': issue_desc,
-                'issuetype': {'name': issue_type}
-            }
+                'labels': labels,
+                'status': {'name': 'To Do'}
+            },
+            'properties': {ISSUE_DIGEST_PROPERTY_KEY: {'digest': content_digest}}
+        })
+
+    # Build the labels of a new JIRA issue, the mandatory labels plus, for an AWS account, the labels keying the issue in the issue index
+    def __get_create_labels(self, account_id: str = None) -> list:
+
+        labels = list(self.default_issue_labels)
+
+        if account_id:
+            labels.extend([INDEXED_ISSUE_LABEL, get_account_label(account_id=account_id)])
+
+        return labels
+
+    # Build the fields of a new JIRA issue, including the mandatory labels
+    def __get_create_fields(self, issue_summary: str, issue_desc: str, issue_type: str, account_id: str = None) -> dict:
+
+        fields = {
+            'project': {'id': str(self.project_id)},
+            'summary': issue_summary,
+            'description': issue_desc,
+            'issuetype': {'id': self.issue_type_ids[issue_type]} if issue_type in self.issue_type_ids else {'name': issue_type}
+        }
+
+        labels = self.__get_create_labels(account_id=account_id)
+
+        if labels:
+            self.logger.debug("Tagging mandatory labels onto Issue.")
+            fields.update({'labels': labels})
+        else:
+            self.logger.debug("No mandatory labels to tag onto Issue.")
+
+        return fields
+    
+    # Create a new JIRA issue, with the mandatory labels and the content digest property set in the same request
+    def __create_issue(self, issue_summary: str, issue_desc: str, issue_type: str, content_digest: str, account_id: str = None) -> Issue:        
+
+        # Create an issue. `JIRA.create_issue` cannot set entity properties, so the request is sent directly on the JIRA session. The created issue is not fetched again.
+        response = self.jira._session.post(
+            self.jira._get_url('issue'),
+            data=json.dumps({
+                'fields': self.__get_create_fields(issue_summary=issue_summary, issue_desc=issue_desc, issue_type=issue_type, account_id=account_id),
+                'properties': self.__get_issue_properties(content_digest=content_digest)
+            })
         )
+
+        new_issue = Issue(self.jira._options, self.jira._session, raw=json_loads(response))
+        self.__record_indexed_issue(account_id=account_id, issue=new_issue, issue_summary=issue_summary, labels=self.__get_create_labels(account_id=account_id), content_digest=content_digest)
         self.logger.info("New Issue created: " + str(new_issue))
-        self.logger.info("New Issue type: " + str(type(new_issue)))
         return new_issue
 
-    # Get an JIRA issue
-    def __get_issue(self, issue_id: str) -> Issue:
-
-        issue = self.jira.issue(issue_id)
-        self.logger.debug("Get Issue: " + str(issue.fields.summary) + " - " + str(issue.fields.description))
-        return issue
-
     # Update an JIRA issue
-    def __update_issue(self, issue_id: str, issue_summary: str, issue_desc: str) -> Issue:
+    def __update_issue(self, issue: Issue, issue_summary: str, issue_desc: str, content_digest: str, account_id: str = None) -> Issue:
 
-        self.logger.debug("Updating Issue ID: " + issue_id)
+        self.logger.debug("Updating Issue ID: %s", issue.key)
 
-        # Change the issue's summary and description.
-        self.jira.issue(issue_id).update(
-            fields={
+        update_data = {
+            'fields': {
                 'summary': issue_summary,
                 'description': issue_desc
             },
-            notify=True
+            'properties': self.__get_issue_properties(content_digest=content_digest)
+        }
+
+        # Issues created before the issue index existed are labelled on their next update, so later upserts find them without a search.
+        labels = list(issue.raw['fields'].get('labels') or [])
+        missing_labels = [label for label in self.__get_create_labels(account_id=account_id) if label not in labels] if account_id else []
+
+        if missing_labels:
+            update_data.update({ 'update': { 'labels': [{'add': label} for label in missing_labels] } })
+            labels.extend(missing_labels)
+
+        # Change the issue's summary, description and content digest property. `Issue.update` reloads the whole issue after the write, so the update is sent directly on the JIRA session instead.
+        self.jira._session.put(
+            issue.self,
+            data=json.dumps(update_data)
         )
 
-        updated_issue = self.jira.issue(issue_id)
-        self.logger.debug("Issue Updated: " + str(updated_issue.fields.summary) + " - " + str(updated_issue.fields.description))
-        return updated_issue
-    
-    def upsert_jira_issue(self, issue_summary: str, issue_desc: str, issue_type: str = "Task") -> Issue:
+        issue.fields.summary = issue_summary
+        issue.fields.description = issue_desc
+        issue.fields.labels = labels
+        issue.raw['fields'].update({ 'summary': issue_summary, 'description': issue_desc, 'labels': labels })
+        issue.raw.setdefault('properties', {}).update({ ISSUE_DIGEST_PROPERTY_KEY: {'digest': content_digest} })
+        self.__record_indexed_issue(account_id=account_id, issue=issue, issue_summary=issue_summary, labels=labels, content_digest=content_digest)
 
-        # Check if issue already exists. If it does, then don't create a new issue. If it doesn't, then create a new issue
-        # Returns bool and issue_key if key exists. Returns bool and empty string if key doesn't exist.
-        key_info = self.__does_issue_exist(issue_summary = issue_summary)
+        self.logger.debug("Issue Updated: %s", issue.key)
+        return issue
 
-        if key_info[0]:
+    # Update an existing JIRA issue if its content digest changed, using the digest returned by the search. Returns a tuple of (bool, Issue), True if the issue was updated.
+    def __update_issue_if_changed(self, issue: Issue, issue_summary: str, issue_desc: str, content_digest: str, account_id: str = None) -> tuple[bool, Issue]:
 
-            issue = self.__get_issue(issue_id = key_info[1])
+        if self.__get_issue_digest(issue=issue) != content_digest:
+            self.logger.debug("Issue content digest has changed. Updating Issue.")
 
-            # Compare hashes of server version (issue.fields.description) and local version (issue_desc)
-            if hash(issue.fields.description) != hash(issue_desc):
-                self.logger.debug("Issue Description has changed. Updating Issue.")
+            return True, self.__update_issue(
+                issue = issue,
+                issue_summary = issue_summary,
+                issue_desc = issue_desc,
+                content_digest = content_digest,
+                account_id = account_id
+            )
 
-                return self.__update_issue(
-                    issue_id = key_info[1],
+        self.logger.debug("Issue content digest has not changed. Issue does not need an update.")
+        return False, issue
+    
+    # Update or Insert a JIRA issue. Change detection compares the SHA-256 digest of `issue_payload`, or of `issue_desc` when no payload is given, with the digest stored on the issue, so unchanged issues cost a single search.
+    # With an `account_id`, the issue is resolved through the issue index keyed by AWS account ID, and a search is only made when the index is due a refresh or the account is not indexed yet.
+    def upsert_jira_issue(self, issue_summary: str, issue_desc: str, issue_type: str = "Task", issue_payload: dict = None, account_id: str = None) -> Issue:
+
+        content_digest = compute_content_digest(issue_payload if issue_payload is not None else issue_desc)
+
+        indexed_issue = self.__find_indexed_issue(account_id=account_id)
+
+        if indexed_issue:
+
+            try:
+                return self.__update_issue_if_changed(
+                    issue = indexed_issue,
                     issue_summary = issue_summary,
                     issue_desc = issue_desc,
-                )
-            else:
-                self.logger.debug("Issue Description has not changed. Issue does not need an update.")
-            return issue
+                    content_digest = content_digest,
+                    account_id = account_id
+                )[1]
+
+            except JIRAError as jira_error:
+                if jira_error.status_code != 404:
+                    raise
+
+                # The indexed issue was deleted, fall back to the summary search.
+                self.logger.info("Indexed Issue no longer exists - " + indexed_issue.key)
+                self.issue_index.discard(account_id=account_id)
+
+        # Check if issue already exists. If it does, then don't create a new issue. If it doesn't, then create a new issue
+        # Returns bool and the issue if it exists. Returns bool and None if it doesn't exist.
+        key_info = self.__does_issue_exist(issue_summary = issue_summary)
+
+        if key_info[0]:
+
+            return self.__update_issue_if_changed(
+                issue = key_info[1],
+                issue_summary = issue_summary,
+                issue_desc = issue_desc,
+                content_digest = content_digest,
+                account_id = account_id
+            )[1]
         else:
             # Create an Issue with the data object
-            new_issue = self.__create_issue(
+            return self.__create_issue(
                 issue_summary = issue_summary,
                 issue_desc = issue_desc,
-                issue_type = issue_type
+                issue_type = issue_type,
+                content_digest = content_digest,
+                account_id = account_id
             )
 
-            if self.default_issue_labels:
-                self.logger.debug("Tagging mandatory labels onto Issue.")
-                self.__tag_mandatory_labels_onto_issue(issue_id = new_issue)
+    # Post a batch of new issues to Jira's bulk create endpoint, `issue_updates` being a list of dict with `fields` and `properties`. Returns a list of dict with the `status` (`Success` or `Error`) and the created `issue` or the `error`, in order.
+    def __create_issues_bulk(self, issue_updates: list) -> list:
+
+        # `JIRA.create_issues` cannot set entity properties, so the request is sent directly on the JIRA session. The created issues are not fetched again.
+        response = self.jira._session.post(
+            self.jira._get_url('issue/bulk'),
+            data=json.dumps({ 'issueUpdates': issue_updates })
+        )
+        raw_issues_json = json_loads(response)
+
+        errors = { error['failedElementNumber']: error['elementErrors'] for error in raw_issues_json.get('errors', []) }
+        created_issues = list(raw_issues_json.get('issues', []))
+
+        created_issue_list = []
+        for index in range(len(issue_updates)):
+
+            if index in errors:
+                created_issue_list.append({ 'status': 'Error', 'error': errors[index] })
             else:
-                self.logger.debug("No mandatory labels to tag onto Issue.")
+                created_issue_list.append({ 'status': 'Success', 'issue': Issue(self.jira._options, self.jira._session, raw=created_issues.pop(0)) })
+
+        return created_issue_list
+
+    # Update or Insert many JIRA issues, `issues` being a list of (summary, description), (summary, description, payload) or (summary, description, payload, account_id) tuples. Issues of indexed AWS accounts are resolved through the issue index, the others with one search per batch of summaries. Issues are only updated when their content digest changed and new issues are created with Jira's bulk create endpoint. Returns a list of dict with the `summary`, `status` (`Created`, `Updated`, `Unchanged` or `Error`) and `issue` of every input, in order.
+    def bulk_upsert_jira_issues(self, issues: list, issue_type: str = "Task") -> list:
+
+        results = []
+
+        for batch_start in range(0, len(issues), JIRA_BULK_BATCH_SIZE):
+
+            batch = issues[batch_start:batch_start + JIRA_BULK_BATCH_SIZE]
+
+            batch_issues = []
+            for issue in batch:
+
+                issue_desc = issue[1]
+                issue_payload = issue[2] if len(issue) > 2 else None
+                account_id = issue[3] if len(issue) > 3 else None
+
+                batch_issues.append({
+                    'summary': issue[0],
+                    'description': issue_desc,
+                    'account_id': account_id,
+                    'digest': compute_content_digest(issue_payload if issue_payload is not None else issue_desc),
+                    'existing_issue': self.__find_indexed_issue(account_id=account_id)
+                })
+
+            # The summary search is fuzzy, so only issues whose summary matches exactly are updated.
+            unresolved_summaries = [batch_issue['summary'] for batch_issue in batch_issues if batch_issue['existing_issue'] is None]
+            existing_issues = {}
+
+            if unresolved_summaries:
+                for existing_issue in self.__search_issues(issue_summaries=unresolved_summaries):
+                    existing_issues.setdefault(existing_issue.fields.summary, existing_issue)
+
+            batch_results = []
+            new_issues = []
+
+            for batch_issue in batch_issues:
+
+                existing_issue = batch_issue['existing_issue'] or existing_issues.get(batch_issue['summary'])
+
+                if existing_issue:
+
+                    is_updated, existing_issue = self.__update_issue_if_changed(issue=existing_issue, issue_summary=batch_issue['summary'], issue_desc=batch_issue['description'], content_digest=batch_issue['digest'], account_id=batch_issue['account_id'])
+                    batch_results.append({
+                        'summary': batch_issue['summary'],
+                        'status': "Updated" if is_updated else "Unchanged",
+                        'issue': existing_issue
+                    })
+
+                else:
+                    batch_results.append({ 'summary': batch_issue['summary'], 'status': 'Created', 'issue': None })
+                    new_issues.append((len(batch_results) - 1, batch_issue, {
+                        'fields': self.__get_create_fields(issue_summary=batch_issue['summary'], issue_desc=batch_issue['description'], issue_type=issue_type, account_id=batch_issue['account_id']),
+                        'properties': self.__get_issue_properties(content_digest=batch_issue['digest'])
+                    }))
+
+            if new_issues:
 
-            return new_issue
+                created_issues = self.__create_issues_bulk(issue_updates=[issue_update for result_index, batch_issue, issue_update in new_issues])
 
-    # Tag mandatory labels onto a JIRA issue
-    def __tag_mandatory_labels_onto_issue(self, issue_id: str) -> Issue:
+                for (result_index, batch_issue, issue_update), created_issue in zip(new_issues, created_issues):
 
-        # Get an issue.
-        issue = self.jira.issue(issue_id)
+                    if created_issue['status'] == 'Success':
+                        batch_results[result_index].update({ 'issue': created_issue['issue'] })
+                        self.__record_indexed_issue(account_id=batch_issue['account_id'], issue=created_issue['issue'], issue_summary=batch_issue['summary'], labels=issue_update['fields'].get('labels', []), content_digest=batch_issue['digest'])
+                    else:
+                        self.logger.error("Bulk Issue creation failed for `" + batch_issue['summary'] + "` - " + str(created_issue['error']))
+                        batch_results[result_index].update({ 'status': 'Error' })
 
-        # Modify the List of existing labels. The new label is unicode with no spaces
-        for label in self.default_issue_labels:
-            issue.fields.labels.append(label)
+            results.extend(batch_results)
 
-        # Change the issue without sending updates
-        issue.update(notify=False, fields={"labels": issue.fields.labels})
+        self.logger.info("Bulk Upsert results - " + str([(result['summary'], result['status']) for result in results]))
 
-        return issue
\ No newline at end of file
+        return results
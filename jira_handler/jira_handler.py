@@ -1,60 +1,152 @@
 import logging
+import hashlib
+import threading
 from jira import JIRA
 from jira_handler.projects.projects import Projects
-from jira_handler.issues.issues import Issues
+from jira_handler.issues.issues import Issues, ISSUE_DIGEST_PROPERTY_KEY
+from jira_handler.issue_index.issue_index import IssueIndex
+from cache_handler.cache_handler import CacheHandler
+
+# JIRA sessions kept across warm invocations, keyed by server, user and a digest of the API token, so the TLS connection and authentication are reused.
+jira_sessions = {}
+jira_sessions_lock = threading.Lock()
 
 class JiraHandler:
 
     # JiraHandler Constructor
     # logger: Logger object
+    # cache: Optional CacheHandler object holding the JIRA metadata (project ID and issue types)
+    # metadata_ttl_seconds: Time-to-live of the JIRA metadata
+    # index_refresh_seconds: Seconds after which the AWS account to issue index is refreshed with recently updated issues
+    # metrics: Optional MetricsRecorder object recording every Jira REST call of the sessions this handler creates
     #
     # Returns: JiraHandler object
     # Raises: None
-    def __init__(self, logger: logging.Logger, config: dict):
+    def __init__(self, logger: logging.Logger, config: dict, cache: CacheHandler = None, metadata_ttl_seconds: float = 3600, index_refresh_seconds: float = 300, metrics = None):
         
         self.logger = logger
         self.config = config
+        self.cache = cache if cache else CacheHandler(logger=logger, ttl_seconds=metadata_ttl_seconds)
+        self.metadata_ttl_seconds = metadata_ttl_seconds
+        self.metrics = metrics
+
+        # The index lives as long as the JiraHandler, i.e. across warm invocations.
+        self.issue_index = IssueIndex(
+            logger=logger,
+            project_key=config["jira"]["project_key"],
+            properties=ISSUE_DIGEST_PROPERTY_KEY,
+            refresh_interval_seconds=index_refresh_seconds
+        )
+
+    # __get_session_key: Returns the key of the JIRA session for the configured server and credentials.
+    def __get_session_key(self) -> tuple:
+        return (
+            self.config["jira"]["cloud_url"],
+            self.config["jira"]["auth_email"],
+            hashlib.sha256(self.config["jira"]["api_token"].encode('utf-8')).hexdigest()
+        )
+
+    # get_jira_session: Returns the JIRA object for the configured server, creating it on first use. The server info round trip is skipped.
+    def get_jira_session(self) -> JIRA:
+
+        session_key = self.__get_session_key()
+
+        with jira_sessions_lock:
+
+            if session_key not in jira_sessions:
+
+                self.logger.debug("Creating JIRA session - %s", self.config["jira"]["cloud_url"])
+
+                jira_sessions.update({
+                    session_key: JIRA(
+                        server=self.config["jira"]["cloud_url"],
+                        basic_auth=(self.config["jira"]["auth_email"],
+                        self.config["jira"]["api_token"]),
+                        get_server_info=False
+                    )
+                })
+
+                if self.metrics:
+                    self.metrics.instrument_jira_session(jira=jira_sessions[session_key])
+
+            return jira_sessions[session_key]
+
+    # reset_jira_session: Drops the JIRA session for the configured server, e.g. after it failed, so the next call creates a new one.
+    def reset_jira_session(self):
+
+        with jira_sessions_lock:
+            jira_sessions.pop(self.__get_session_key(), None)
+
+    # get_project_metadata: Returns the project metadata `dict` of the configured project, with the project `id`, `key` and `issue_types`, refreshed every `metadata_ttl_seconds`. Returns an empty `dict` if the project does not exist.
+    def get_project_metadata(self, jira: JIRA) -> dict:
 
-    # jira_create_issue: Creates an JIRA Object and creates a new issue on JIRA
-    def jira_create_issue(self, issue_summary: str = '', issue_desc: str = ''):
+        project_key = self.config["jira"]["project_key"]
 
-        # Create a JIRA Object
-        jira = JIRA(
-            server=self.config["jira"]["cloud_url"],
-            basic_auth=(self.config["jira"]["auth_email"],
-            self.config["jira"]["api_token"])
+        project_metadata = self.cache.get_or_load(
+            ('jira.project', self.config["jira"]["cloud_url"], project_key),
+            lambda: Projects(jira_credentials=jira, logger=self.logger).get_project_metadata(project_key=project_key),
+            ttl_seconds=self.metadata_ttl_seconds
         )
 
-        # Create an Projects Object
-        projectsObj = Projects(jira_credentials=jira, logger=self.logger)
-
-        # Returns bool and project ID
-        project_info = projectsObj.does_project_exist(self.config["jira"]["project_key"])
-
-        if project_info[0]:
-
-            # Create an Issues Object
-            issueObj = Issues(
-                logger=self.logger,
-                jira_credentials=jira,
-                project_key=self.config["jira"]["project_key"],
-                project_id=project_info[1],
-                email_domain="@" + str(self.config["jira"]["auth_email"].split('@')[1]),
-                default_issue_labels=self.config["jira"]["default_issue_labels"],
-            )
-               
-            # Building an JIRA issue
-            self.logger.debug("JIRA Issue Summary: " + str(issue_summary))
-            self.logger.debug("JIRA Issue Description: %s", issue_desc)
-
-            # Update or Insert a JIRA issue. If the issue exists, then update it. If the issue doesn't exist, then create a new issue.
-            issueObj.upsert_jira_issue(
-                issue_summary = issue_summary,
-                issue_desc = issue_desc,
-                issue_type = "Task"
-            )
-                
-            self.logger.info("Success.")
-
-        else:
-            raise Exception("JIRA Cloud Project does not exist.")
\ No newline at end of file
+        # A missing project is not kept, so a newly created project is picked up on the next call.
+        if not project_metadata:
+            self.cache.invalidate(('jira.project', self.config["jira"]["cloud_url"], project_key))
+
+        return project_metadata
+
+    # __get_issues: Returns an Issues object for the configured project. Raises an Exception if the project does not exist.
+    def __get_issues(self) -> Issues:
+
+        # Reuse the JIRA session of a warm container
+        jira = self.get_jira_session()
+
+        try:
+            # Returns the project ID and issue types, without enumerating every project
+            project_metadata = self.get_project_metadata(jira=jira)
+
+        except Exception:
+            self.reset_jira_session()
+            raise
+
+        if not project_metadata:
+            raise Exception("JIRA Cloud Project does not exist.")
+
+        # Create an Issues Object
+        return Issues(
+            logger=self.logger,
+            jira_credentials=jira,
+            project_key=self.config["jira"]["project_key"],
+            project_id=project_metadata['id'],
+            email_domain="@" + str(self.config["jira"]["auth_email"].split('@')[1]),
+            default_issue_labels=self.config["jira"]["default_issue_labels"],
+            issue_type_ids=project_metadata['issue_types'],
+            issue_index=self.issue_index
+        )
+
+    # jira_create_issue: Creates an JIRA Object and creates a new issue on JIRA. When given, `issue_payload` is the structured content the issue change detection is based on and `account_id` the AWS account ID the issue is keyed by.
+    def jira_create_issue(self, issue_summary: str = '', issue_desc: str = '', issue_payload: dict = None, account_id: str = None):
+
+        issueObj = self.__get_issues()
+
+        # Building an JIRA issue
+        self.logger.debug("JIRA Issue Summary: %s", issue_summary)
+        self.logger.debug("JIRA Issue Description: %s", issue_desc)
+
+        # Update or Insert a JIRA issue. If the issue exists, then update it. If the issue doesn't exist, then create a new issue.
+        issueObj.upsert_jira_issue(
+            issue_summary = issue_summary,
+            issue_desc = issue_desc,
+            issue_type = "Task",
+            issue_payload = issue_payload,
+            account_id = account_id
+        )
+            
+        self.logger.info("Success.")
+
+    # jira_bulk_upsert_issues: Creates or updates many issues on JIRA at once, `issues` being a list of (summary, description), (summary, description, payload) or (summary, description, payload, account_id) tuples. Returns a list of upsert result `dict`, see `Issues.bulk_upsert_jira_issues`.
+    def jira_bulk_upsert_issues(self, issues: list) -> list:
+
+        return self.__get_issues().bulk_upsert_jira_issues(
+            issues = issues,
+            issue_type = "Task"
+        )
@@ -1,5 +1,7 @@
 import logging
 from jira.client import JIRA
+from jira.exceptions import JIRAError
+from log_handler.log_handler import LazyDump
 
 # Projects - class to manage JIRA Cloud projects
 class Projects:
@@ -23,19 +25,37 @@ class Projects:
         projects = self.jira.projects()
         return projects
 
+    # Get a JIRA Cloud project by key with a direct lookup, returns the project metadata as `dict` with the project `id`, `key` and `issue_types`, a `dict` of issue type name to ID. Returns an empty `dict` if the project does not exist.
+    def get_project_metadata(self, project_key: str) -> dict:
+
+        try:
+            project = self.jira.project(project_key)
+
+        except JIRAError as jira_error:
+            if jira_error.status_code == 404:
+                self.logger.debug("Project not found - %s", project_key)
+                return {}
+            raise
+
+        project_metadata = {
+            'id': project.id,
+            'key': project.key,
+            'issue_types': { issue_type['name']: issue_type['id'] for issue_type in project.raw.get('issueTypes', []) }
+        }
+
+        self.logger.debug("Project Metadata - %s", LazyDump(project_metadata))
+
+        return project_metadata
+
     # Check if project exists in JIRA Cloud
     def does_project_exist(self, project_key: str) -> tuple[bool, str]:
 
-        projects = self.get_projects()
-
-        self.logger.debug("List of ALL Projects - " + str(projects))    
+        project_metadata = self.get_project_metadata(project_key=project_key)
 
-        for project in projects:
-            # key, name, id
-            if project.key == project_key:
-                return True, project.id
+        if project_metadata:
+            return True, project_metadata['id']
 
-        return False
+        return False, ''
     
     def get_project_issue_types(self, project_id: str):
 
@@ -43,7 +63,7 @@ class Projects:
             projectIdOrKey = project_id
         )
 
-        self.logger.debug("List of ALL Issue Types for Project ID " + project_id + " - " + str(issue_types_list))
+        self.logger.debug("List of ALL Issue Types for Project ID %s - %s", project_id, LazyDump(issue_types_list))
 
         return issue_types_list
 
@@ -0,0 +1,162 @@
+import logging
+import json
+import re
+import threading
+import time
+
+# Keys whose values are never logged, matched case-insensitively anywhere in a dict key or `key=value` / `'key': value` text.
+SECRET_KEY_PATTERN = re.compile(r'(api[_-]?token|password|secret|session[_-]?token|authorization|credentials|private[_-]?key)', re.IGNORECASE)
+
+# Masks `'key': 'value'`, `"key": "value"` and `key=value` pairs of secret keys in rendered text.
+SECRET_PAIR_PATTERN = re.compile(r'''(['"]?[\w-]*(?:api[_-]?token|password|secret|session[_-]?token|authorization|private[_-]?key)[\w-]*['"]?\s*[:=]\s*)(['"])?((?(2)[^'"]*|[^\s,}]*))''', re.IGNORECASE)
+
+REDACTED = '***'
+
+# Secret values registered at runtime, e.g. the Jira API token once the configuration is loaded.
+secret_values = set()
+secret_values_lock = threading.Lock()
+
+# Attributes of every `LogRecord`, anything else was passed through `extra` and is added to the JSON record.
+STANDARD_RECORD_ATTRIBUTES = set(logging.LogRecord('', 0, '', 0, '', None, None).__dict__.keys()) | { 'message', 'asctime', 'aws_request_id' }
+
+# register_secret: Registers a secret value, which is masked wherever it appears in a log message.
+def register_secret(secret_value: str):
+
+    if secret_value and len(str(secret_value)) >= 4:
+        with secret_values_lock:
+            secret_values.add(str(secret_value))
+
+# redact: Returns `text` with secret key-value pairs and registered secret values masked.
+def redact(text: str) -> str:
+
+    text = SECRET_PAIR_PATTERN.sub(lambda match: match.group(1) + (match.group(2) or '') + REDACTED, text)
+
+    for secret_value in list(secret_values):
+        if secret_value in text:
+            text = text.replace(secret_value, REDACTED)
+
+    return text
+
+# LazyDump - wraps a large object passed as a log argument, rendering it only if the record is emitted, with secret keys masked, at most `max_items` items per collection and at most `max_chars` characters
+class LazyDump:
+
+    # LazyDump Constructor
+    # value: Object to render, e.g. an API response
+    # max_items: Number of items rendered from each dict or list, the remainder is summarised as a count
+    # max_chars: Length the rendered text is truncated to
+    #
+    # Returns: LazyDump object
+    # Raises: None
+    def __init__(self, value, max_items: int = 20, max_chars: int = 4096):
+
+        self.value = value
+        self.max_items = max_items
+        self.max_chars = max_chars
+
+    # __sample: Returns a copy of `value` with collections cut to `max_items` items and secret keys masked.
+    def __sample(self, value, depth: int = 0):
+
+        if depth > 8:
+            return '...'
+
+        if isinstance(value, dict) or hasattr(value, 'keys') and hasattr(value, '__getitem__'):
+
+            sampled_value = {}
+            keys = list(value.keys())
+
+            for key in keys[:self.max_items]:
+                sampled_value.update({ key: REDACTED if SECRET_KEY_PATTERN.search(str(key)) else self.__sample(value[key], depth + 1) })
+
+            if len(keys) > self.max_items:
+                sampled_value.update({ '...': str(len(keys) - self.max_items) + ' more item(s)' })
+
+            return sampled_value
+
+        if isinstance(value, (list, tuple, set)):
+
+            items = list(value)
+            sampled_value = [self.__sample(item, depth + 1) for item in items[:self.max_items]]
+
+            if len(items) > self.max_items:
+                sampled_value.append('... ' + str(len(items) - self.max_items) + ' more item(s)')
+
+            return sampled_value
+
+        return value
+
+    def __str__(self) -> str:
+
+        rendered_value = str(self.__sample(self.value))
+
+        if len(rendered_value) > self.max_chars:
+            rendered_value = rendered_value[:self.max_chars] + '... (' + str(len(rendered_value) - self.max_chars) + ' more character(s))'
+
+        return rendered_value
+
+    __repr__ = __str__
+
+# RedactionFilter - masks secrets in every record passing through a log handler, tracebacks included. The message is only formatted for records that are emitted.
+class RedactionFilter(logging.Filter):
+
+    def filter(self, record: logging.LogRecord) -> bool:
+
+        try:
+            record.msg = redact(record.getMessage())
+            record.args = None
+
+            # The traceback is formatted once and masked, and formatters reuse `exc_text` rather than formatting it again.
+            if record.exc_info and not record.exc_text:
+                record.exc_text = redact(logging.Formatter().formatException(record.exc_info))
+
+        except Exception:
+            pass
+
+        return True
+
+# JsonFormatter - formats every record as one JSON object per line, with the level, logger, message, Lambda request ID and any `extra` fields
+class JsonFormatter(logging.Formatter):
+
+    def format(self, record: logging.LogRecord) -> str:
+
+        json_record = {
+            'timestamp': self.formatTime(record, '%Y-%m-%dT%H:%M:%S') + '.' + str(int(record.msecs)).zfill(3) + 'Z',
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+
+        if getattr(record, 'aws_request_id', None):
+            json_record.update({ 'aws_request_id': record.aws_request_id })
+
+        for key, value in record.__dict__.items():
+            if key not in STANDARD_RECORD_ATTRIBUTES:
+                json_record.update({ key: value })
+
+        if record.exc_info:
+            json_record.update({ 'exception': record.exc_text or redact(self.formatException(record.exc_info)) })
+
+        return json.dumps(json_record, default=str)
+
+# install_redaction_filter: Adds the RedactionFilter to every handler of the logger named `logger_name`, the root logger by default, unless it already has one.
+def install_redaction_filter(logger_name: str = None):
+
+    for log_handler in logging.getLogger(logger_name).handlers:
+        if not any(isinstance(log_filter, RedactionFilter) for log_filter in log_handler.filters):
+            log_handler.addFilter(RedactionFilter())
+
+# setup_logging: Configures the root log handlers, the Lambda runtime's own or a new stderr handler, with the RedactionFilter and, for `log_format` `json`, the JsonFormatter. Safe to call more than once.
+def setup_logging(log_format: str = 'json'):
+
+    root_logger = logging.getLogger()
+
+    if not root_logger.handlers:
+        logging.basicConfig()
+
+    install_redaction_filter()
+
+    for log_handler in root_logger.handlers:
+
+        if log_format == 'json':
+            json_formatter = JsonFormatter()
+            json_formatter.converter = time.gmtime
+            log_handler.setFormatter(json_formatter)
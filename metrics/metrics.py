@@ -0,0 +1,197 @@
+import logging
+import functools
+import json
+import re
+import sys
+import threading
+import time
+
+# Error codes AWS services return when a call was throttled.
+THROTTLING_ERROR_CODES = ['Throttling', 'ThrottlingException', 'ThrottledException', 'RequestThrottledException', 'TooManyRequestsException', 'RequestLimitExceeded', 'SlowDown', 'LimitExceededException']
+
+# Metrics of every recorded operation, with their CloudWatch units.
+METRIC_UNITS = {
+    'Latency': 'Milliseconds',
+    'Calls': 'Count',
+    'Retries': 'Count',
+    'Throttles': 'Count',
+    'Errors': 'Count',
+    'ResponseSize': 'Bytes'
+}
+
+# CloudWatch accepts at most 100 values per metric in one EMF line.
+EMF_MAX_VALUES = 100
+
+# MetricsRecorder - records the latency, retries, throttles, errors and response size of every AWS, HTTP and Jira call of an invocation, and emits them as CloudWatch Embedded Metric Format (EMF) log lines
+class MetricsRecorder:
+
+    # MetricsRecorder Constructor
+    # logger: Logger object
+    # namespace: CloudWatch namespace of the metrics
+    # enabled: False to record nothing, e.g. when the EMF lines are not wanted
+    # emit: Optional function called with every EMF line, defaults to writing it to stdout, which Lambda forwards to CloudWatch Logs
+    #
+    # Returns: MetricsRecorder object
+    # Raises: None
+    def __init__(self, logger: logging.Logger, namespace: str = 'AWSPostStackOutputs', enabled: bool = True, emit = None):
+
+        self.logger = logger
+        self.namespace = namespace
+        self.enabled = enabled
+        self.emit = emit if emit else self.__write_stdout
+        self._lock = threading.Lock()
+        self._operations = {}
+
+    # __write_stdout: Writes an EMF line to stdout. EMF lines must not carry the log record prefix of the logger.
+    def __write_stdout(self, line: str):
+        sys.stdout.write(line + '\n')
+        sys.stdout.flush()
+
+    # record: Records one call of `operation` of `service`.
+    def record(self, service: str, operation: str, latency_ms: float, retries: int = 0, throttled: bool = False, error: bool = False, response_size: int = 0):
+
+        if not self.enabled:
+            return
+
+        with self._lock:
+
+            recorded_operation = self._operations.setdefault((service, operation), { 'Latency': [], 'Calls': 0, 'Retries': 0, 'Throttles': 0, 'Errors': 0, 'ResponseSize': 0 })
+            recorded_operation['Latency'].append(round(latency_ms, 2))
+            recorded_operation['Calls'] += 1
+            recorded_operation['Retries'] += retries
+            recorded_operation['Throttles'] += 1 if throttled else 0
+            recorded_operation['Errors'] += 1 if error else 0
+            recorded_operation['ResponseSize'] += response_size
+
+    # instrument_client: Registers botocore event hooks on a boto3 client, timing every call from `before-call` to `after-call` or `after-call-error`. The start time is kept in the request context, so concurrent calls on the same client do not interfere.
+    def instrument_client(self, client):
+
+        if not self.enabled:
+            return
+
+        client.meta.events.register_first('before-call.*.*', self.__before_call)
+        client.meta.events.register('after-call.*.*', self.__after_call)
+        client.meta.events.register('after-call-error.*.*', self.__after_call_error)
+
+    def __before_call(self, context, **kwargs):
+        context.update({ 'metrics_start_time': time.perf_counter() })
+
+    def __after_call(self, http_response, parsed, model, context, **kwargs):
+
+        if 'metrics_start_time' not in context:
+            return
+
+        error_code = parsed.get('Error', {}).get('Code', '') if isinstance(parsed, dict) else ''
+
+        self.record(
+            service=model.service_model.service_name,
+            operation=model.name,
+            latency_ms=(time.perf_counter() - context.pop('metrics_start_time')) * 1000,
+            retries=parsed.get('ResponseMetadata', {}).get('RetryAttempts', 0) if isinstance(parsed, dict) else 0,
+            throttled=error_code in THROTTLING_ERROR_CODES,
+            error=http_response.status_code >= 300,
+            response_size=int(http_response.headers.get('content-length', 0)) if http_response.headers else 0
+        )
+
+    def __after_call_error(self, exception, model, context, **kwargs):
+
+        if 'metrics_start_time' not in context:
+            return
+
+        self.record(
+            service=model.service_model.service_name,
+            operation=model.name,
+            latency_ms=(time.perf_counter() - context.pop('metrics_start_time')) * 1000,
+            error=True
+        )
+
+    # instrument_jira_session: Registers a `requests` response hook on a JIRA session, recording every Jira REST call by method and path, with numeric IDs and keys collapsed so they group into one operation.
+    def instrument_jira_session(self, jira):
+
+        if not self.enabled:
+            return
+
+        jira._session.hooks['response'].append(self.__on_jira_response)
+
+    def __on_jira_response(self, response, *args, **kwargs):
+
+        path = response.request.path_url.split('?')[0]
+        path = re.sub(r'/[A-Z][A-Z0-9_]+-\d+(?=/|$)', '/{key}', re.sub(r'(?<!/api)/\d+(?=/|$)', '/{id}', path))
+
+        self.record(
+            service='jira',
+            operation=response.request.method + ' ' + path,
+            latency_ms=response.elapsed.total_seconds() * 1000,
+            throttled=response.status_code == 429,
+            error=response.status_code >= 400,
+            response_size=len(response.content) if response.content else 0
+        )
+
+    # get_emf_lines: Returns the recorded metrics, or `recorded_operations` when given, as EMF JSON lines, one or more per operation with the `Service` and `Operation` dimensions. Latencies are emitted as value arrays, so CloudWatch can compute percentiles.
+    def get_emf_lines(self, recorded_operations: dict = None) -> list:
+
+        if recorded_operations is None:
+            with self._lock:
+                recorded_operations = dict(self._operations)
+
+        emf_lines = []
+        timestamp = int(time.time() * 1000)
+
+        for (service, operation), recorded_operation in recorded_operations.items():
+
+            latencies = recorded_operation['Latency']
+
+            for chunk_start in range(0, len(latencies), EMF_MAX_VALUES):
+
+                emf_line = {
+                    '_aws': {
+                        'Timestamp': timestamp,
+                        'CloudWatchMetrics': [{
+                            'Namespace': self.namespace,
+                            'Dimensions': [['Service', 'Operation']],
+                            'Metrics': [{ 'Name': name, 'Unit': unit } for name, unit in METRIC_UNITS.items()] if chunk_start == 0 else [{ 'Name': 'Latency', 'Unit': METRIC_UNITS['Latency'] }]
+                        }]
+                    },
+                    'Service': service,
+                    'Operation': operation,
+                    'Latency': latencies[chunk_start:chunk_start + EMF_MAX_VALUES]
+                }
+
+                # Counters are emitted once per operation, with the first chunk of latencies.
+                if chunk_start == 0:
+                    emf_line.update({ name: recorded_operation[name] for name in METRIC_UNITS.keys() if name != 'Latency' })
+
+                emf_lines.append(json.dumps(emf_line, separators=(',', ':')))
+
+        return emf_lines
+
+    # flush: Emits the metrics recorded since the last flush and starts recording afresh.
+    def flush(self):
+
+        if not self.enabled:
+            return
+
+        with self._lock:
+            recorded_operations = self._operations
+            self._operations = {}
+
+        try:
+            for emf_line in self.get_emf_lines(recorded_operations=recorded_operations):
+                self.emit(emf_line)
+
+        except Exception as e:
+            self.logger.exception('Metrics Flush Error')
+
+    # flush_after: Decorates a Lambda handler, flushing the metrics of every invocation once it returns or raises.
+    def flush_after(self, handler_function):
+
+        @functools.wraps(handler_function)
+        def handler_wrapper(*args, **kwargs):
+
+            try:
+                return handler_function(*args, **kwargs)
+
+            finally:
+                self.flush()
+
+        return handler_wrapper
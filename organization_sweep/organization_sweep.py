@@ -0,0 +1,201 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from client_factory.client_factory import ClientFactory
+from collector_scheduler.collector_scheduler import CollectorScheduler
+from deadline.deadline import Deadline
+from http_delivery.http_delivery import HttpDelivery
+from organizations.organizations import Organizations
+from region_catalog.region_catalog import RegionCatalog
+from utils.utils import Utils
+
+# OrganizationSweep - collects the payload of every member account of an AWS Organization from the management account, through a read-only role assumed in each account
+class OrganizationSweep:
+
+    # OrganizationSweep Constructor
+    # logger: Logger object
+    # client_factory: ClientFactory object of the management account, used to assume the role in each member account
+    # organizations: Organizations object used to list the member accounts
+    # http_delivery: HttpDelivery object used to stream the account payloads, with a connection per worker as every worker POSTs its own account payload
+    # endpoint_url: API Endpoint the account payloads are POSTed to
+    # role_name: Name of the read-only IAM role assumed in every member account
+    # stack_name: Optional name of the onboarding stack whose nested stack tree outputs are collected in each account
+    # management_account_id: Optional ID of the account running the sweep, collected with its own credentials rather than an assumed role
+    # partition: AWS partition of the role ARNs
+    # max_workers: Upper bound on the number of accounts collected at the same time
+    # account_timeout: Seconds after which an account still being collected is abandoned
+    # collector_max_workers: Upper bound on the number of collectors running at the same time within one account
+    # region_catalog: Optional RegionCatalog object shared with the other subsystems, else one is built
+    #
+    # Returns: OrganizationSweep object
+    # Raises: None
+    def __init__(self, logger: logging.Logger, client_factory: ClientFactory, organizations: Organizations, http_delivery: HttpDelivery, endpoint_url: str, role_name: str, stack_name: str = None, management_account_id: str = None, partition: str = 'aws', max_workers: int = 16, account_timeout: float = 120, collector_max_workers: int = 3, region_catalog: RegionCatalog = None):
+
+        self.logger = logger
+        self.client_factory = client_factory
+        self.organizations = organizations
+        self.http_delivery = http_delivery
+        self.endpoint_url = endpoint_url
+        self.role_name = role_name
+        self.stack_name = stack_name
+        self.management_account_id = management_account_id
+        self.partition = partition
+        self.max_workers = max_workers
+        self.account_timeout = account_timeout
+        self.collector_max_workers = collector_max_workers
+        self.region_catalog = region_catalog or RegionCatalog(logger=logger)
+        self.utils = Utils(logger=logger, region_catalog=self.region_catalog)
+
+    # __get_account_client_factory: Returns the ClientFactory of `account_id`, assuming `role_name` unless it is the management account.
+    def __get_account_client_factory(self, account_id: str) -> ClientFactory:
+
+        if account_id == self.management_account_id:
+            return self.client_factory
+
+        return self.client_factory.assume_role(
+            role_arn='arn:' + self.partition + ':iam::' + account_id + ':role/' + self.role_name,
+            session_name='OrganizationSweep-' + account_id
+        )
+
+    # __collect_stack_outputs: Collects the outputs of the `stack_name` stack tree of an account. Returns a `dict` with the root StackId and the outputs keyed by StackId.
+    def __collect_stack_outputs(self, cloudformation_stack) -> dict:
+
+        root_stack_id, nested_stack_ids = cloudformation_stack.get_stack_tree(stack_name=self.stack_name)
+
+        stack_outputs = { 'StackId': root_stack_id }
+        stack_outputs.update(cloudformation_stack.get_nested_stack_tree_outputs(
+            root_stack_id=root_stack_id,
+            stack_ids=[root_stack_id] + nested_stack_ids
+        ))
+
+        return stack_outputs
+
+    # __collect_account_information: Collects the alternate contacts of an account. Returns a `dict` with whether every alternate contact is configured and their email domains.
+    def __collect_account_information(self, account) -> dict:
+
+        all_contacts_present, email_domains = account.get_aws_account_information()
+
+        return {
+            'AlternateContactsConfigured': str(all_contacts_present),
+            'AlternateContactEmailDomains': email_domains
+        }
+
+    # __collect_cost_matrix: Loads the cost matrix of an account ahead of the collectors deriving regions, services and MRR from it. Returns an empty `dict` as the matrix itself is not part of the payload.
+    def __collect_cost_matrix(self, cost_explorer) -> dict:
+
+        cost_explorer.load_last_90_day_cost_matrix()
+        return {}
+
+    # collect_account: Runs the CloudFormationStack, Account and CostExplorer collectors for one member account of `list_accounts`. Returns the account payload as `dict`.
+    def collect_account(self, organization_account: dict) -> dict:
+
+        from account.account import Account
+        from cloudformation_stack.cloudformation_stack import CloudFormationStack
+        from cost_explorer.cost_explorer import CostExplorer
+
+        account_id = organization_account['Id']
+        account_client_factory = self.__get_account_client_factory(account_id=account_id)
+
+        cloudformation_stack = CloudFormationStack(logger=self.logger, cloudformation_client=account_client_factory.get_client('cloudformation'))
+        account = Account(logger=self.logger, account_client=account_client_factory.get_client('account'))
+        cost_explorer = CostExplorer(logger=self.logger, costexplorer_client=account_client_factory.get_client('ce'), region_catalog=self.region_catalog)
+
+        account_payload = {
+            'Action': 'OrganizationSweep',
+            'AWSAccountId': account_id,
+            'AccountName': organization_account.get('Name', ''),
+            'IsOrganizationsAccount': str(True),
+            'EmailDomain': organization_account['Email'].split('@')[1] if '@' in organization_account.get('Email', '') else organization_account.get('Email', '')
+        }
+
+        scheduler = CollectorScheduler(logger=self.logger, max_workers=self.collector_max_workers)
+
+        if self.stack_name:
+            scheduler.add_collector('stack_outputs', lambda: self.__collect_stack_outputs(cloudformation_stack=cloudformation_stack))
+
+        scheduler.add_collector('account_information', lambda: self.__collect_account_information(account=account))
+        scheduler.add_collector('cost_matrix', lambda: self.__collect_cost_matrix(cost_explorer=cost_explorer))
+        scheduler.add_collector('active_regions', lambda: {'ActiveAWSRegions': self.utils.convert_region_ids_to_region_names(regions_list=cost_explorer.get_active_regions_from_last_90_day_billing())}, depends_on=['cost_matrix'])
+        scheduler.add_collector('active_services', lambda: {'ActiveAWSServices': cost_explorer.get_active_services_from_last_90_day_billing()}, depends_on=['cost_matrix'])
+        scheduler.add_collector('monthly_recurring_revenue', lambda: {'Monthly Recurring Revenue': cost_explorer.get_monthly_recurring_revenue_from_last_90_day_billing()}, depends_on=['cost_matrix'])
+
+        return scheduler.merge_results(payload=account_payload, results=scheduler.run())
+
+    # __sweep_account: Collects an account with `collect_account` and POSTs its payload, recording in `start_times` when the account started, so queued accounts are not timed out before they run. Returns True if the endpoint accepted the payload.
+    def __sweep_account(self, organization_account: dict, start_times: dict) -> bool:
+
+        start_times.update({ organization_account['Id']: time.monotonic() })
+        return self.__deliver_account_payload(account_payload=self.collect_account(organization_account=organization_account))
+
+    # __deliver_account_payload: POSTs an account payload to the API Endpoint. Returns True if the endpoint accepted it.
+    def __deliver_account_payload(self, account_payload: dict) -> bool:
+
+        try:
+            response = self.http_delivery.post_json(url=self.endpoint_url, payload=account_payload)
+            self.logger.info('Account ' + account_payload['AWSAccountId'] + ' payload delivered with status code ' + str(response.status))
+            return response.status < 400
+
+        except Exception as e:
+            self.logger.exception('Account ' + account_payload['AWSAccountId'] + ' payload delivery Error')
+            return False
+
+    # run: Collects every active account of the organization, or only `account_ids` when given, on a pool of `max_workers` threads. Each worker POSTs the payload of its account as soon as it completes. Accounts running for longer than `account_timeout` seconds are abandoned, and once the budget of `deadline` is spent every account still running or queued is abandoned. Returns a `dict` summary of the account IDs per outcome.
+    def run(self, account_ids: list = None, deadline: Deadline = None) -> dict:
+
+        organization_accounts = self.organizations.list_accounts()
+
+        if account_ids:
+            organization_accounts = [organization_account for organization_account in organization_accounts if organization_account['Id'] in account_ids]
+
+        summary = { 'Delivered': [], 'DeliveryFailed': [], 'Failed': [], 'TimedOut': [] }
+        start_times = {}
+
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+
+        try:
+            running = {
+                executor.submit(self.__sweep_account, organization_account, start_times): organization_account['Id']
+                for organization_account in organization_accounts
+            }
+
+            while running:
+
+                done, not_done = wait(running.keys(), timeout=min(1.0, deadline.get_budget()) if deadline else 1, return_when=FIRST_COMPLETED)
+
+                for future in done:
+
+                    account_id = running.pop(future)
+
+                    try:
+                        summary['Delivered' if future.result() else 'DeliveryFailed'].append(account_id)
+
+                    except Exception as e:
+                        self.logger.exception('Account ' + account_id + ' collection Error')
+                        summary['Failed'].append(account_id)
+
+                # Threads cannot be interrupted, so accounts past their timeout, or still running or queued once the sweep is out of time, are abandoned and their late results ignored.
+                now = time.monotonic()
+                out_of_time = deadline is not None and deadline.get_budget() <= 0
+
+                if out_of_time and running:
+                    self.logger.error('Organization sweep ran out of time, abandoning ' + str(len(running)) + ' account(s).')
+
+                for future in not_done:
+
+                    account_id = running[future]
+
+                    if out_of_time:
+                        summary['TimedOut'].append(account_id)
+                        running.pop(future)
+
+                    elif account_id in start_times and now - start_times[account_id] > self.account_timeout:
+                        self.logger.error('Account ' + account_id + ' timed out after ' + str(self.account_timeout) + ' seconds, abandoning it.')
+                        summary['TimedOut'].append(account_id)
+                        running.pop(future)
+
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        self.logger.info('Organization sweep of ' + str(len(organization_accounts)) + ' account(s) - ' + str({ outcome: len(account_ids) for outcome, account_ids in summary.items() }))
+
+        return summary
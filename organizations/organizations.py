@@ -1,22 +1,32 @@
 import logging
-import traceback
 from boto3 import client
+from cache_handler.cache_handler import CacheHandler
 
 class Organizations:
 
     # Organizations Constructor
     # logger: Logger object
+    # cache: Optional CacheHandler object used to memoize lookups
     #
     # Returns: Organizations object
     # Raises: None
-    def __init__(self, logger: logging.Logger, organizations_client: client):
+    def __init__(self, logger: logging.Logger, organizations_client: client, cache: CacheHandler = None):
         
         self.logger = logger
         self.organizations_client = organizations_client
+        self.cache = cache
 
     # check_organizations_account: Checks to see if the AWS Account is part of AWS Organizations. This is a recommended best practice in the Well-Architected Framework Review assessment. Returns a tuple (bool, str), True if the AWS account is part of AWS Organizations and the `str` would be the email address associated with the AWS Org account.
     def check_organizations_account(self, account_id: str) -> tuple[bool, str]:
 
+        if self.cache:
+            return self.cache.get_or_load(('organizations.describe_account', account_id), lambda: self.__check_organizations_account(account_id=account_id))
+
+        return self.__check_organizations_account(account_id=account_id)
+
+    # __check_organizations_account: Uncached `describe_account` lookup behind `check_organizations_account`.
+    def __check_organizations_account(self, account_id: str) -> tuple[bool, str]:
+
         try:
             response = self.organizations_client.describe_account(
                 AccountId=account_id
@@ -31,8 +41,23 @@ class Organizations:
             return True, response['Account']['Email']
         
         except self.organizations_client.exceptions.AccessDeniedException as AccessDeniedException:
-            self.logger.error('Access Denied Exception - ' + str(traceback.print_tb(AccessDeniedException.__traceback__)))
+            self.logger.exception('Access Denied Exception')
             return True, "Access Denied"
         except self.organizations_client.exceptions.AWSOrganizationsNotInUseException as AWSOrganizationsNotInUseException:
-            self.logger.error('AWS Organizations Not In Use Exception - ' + str(traceback.print_tb(AWSOrganizationsNotInUseException.__traceback__)))
-            return False, ''
\ No newline at end of file
+            self.logger.exception('AWS Organizations Not In Use Exception')
+            return False, ''
+
+    # list_accounts: Lists the AWS accounts of the organization, following every page of `list_accounts`. Only `ACTIVE` accounts are returned unless `active_only` is False.
+    def list_accounts(self, active_only: bool = True) -> list:
+
+        accounts = []
+
+        paginator = self.organizations_client.get_paginator('list_accounts')
+        for page in paginator.paginate():
+            for account in page['Accounts']:
+                if active_only and account['Status'] != 'ACTIVE':
+                    continue
+                accounts.append(account)
+
+        self.logger.info('Found ' + str(len(accounts)) + ' account(s) in AWS Organizations')
+        return accounts
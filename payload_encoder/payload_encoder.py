@@ -0,0 +1,99 @@
+import logging
+import json
+import gzip
+import time
+import datetime
+import decimal
+
+# Version of the payload schema, sent as `SchemaVersion` in every payload. Version 2 sends lists and numbers as native JSON types, rather than their Python `str()` text.
+SCHEMA_VERSION = 2
+
+# PayloadEncoder - serializes a payload once into the bytes sent to the API Endpoint, compressing it when it is large enough to be worth it
+class PayloadEncoder:
+
+    # PayloadEncoder Constructor
+    # logger: Logger object
+    # compress_threshold: Bodies of at least this many bytes are gzip compressed
+    # compression_level: gzip compression level, from 1 (fastest) to 9 (smallest)
+    # use_fast_json: True to serialize with `orjson` when it is installed, else the standard library `json` is used
+    # metrics: Optional MetricsRecorder object recording the encode time and size of every payload
+    #
+    # Returns: PayloadEncoder object
+    # Raises: None
+    def __init__(self, logger: logging.Logger, compress_threshold: int = 65536, compression_level: int = 6, use_fast_json: bool = True, metrics = None):
+
+        self.logger = logger
+        self.compress_threshold = compress_threshold
+        self.compression_level = compression_level
+        self.use_fast_json = use_fast_json
+        self.metrics = metrics
+        self._dumps = None
+        self.backend = None
+
+    # __default: Converts values the JSON backends cannot serialize natively. Returns a JSON serializable value.
+    def __default(self, value):
+
+        if isinstance(value, (datetime.datetime, datetime.date)):
+            return value.isoformat()
+
+        if isinstance(value, decimal.Decimal):
+            return float(value)
+
+        if isinstance(value, (set, frozenset, tuple)):
+            return list(value)
+
+        if isinstance(value, bytes):
+            return value.decode('utf-8', errors='replace')
+
+        # NumPy scalars, e.g. from the cost trends, expose their Python value through `item`.
+        if hasattr(value, 'item'):
+            return value.item()
+
+        return str(value)
+
+    # __get_dumps: Returns the function serializing a payload to `bytes`, loading the JSON backend on first use.
+    def __get_dumps(self):
+
+        if self._dumps:
+            return self._dumps
+
+        if self.use_fast_json:
+            try:
+                import orjson
+
+                self._dumps = lambda payload: orjson.dumps(payload, default=self.__default, option=orjson.OPT_NON_STR_KEYS)
+                self.backend = 'orjson'
+                return self._dumps
+
+            except ImportError:
+                self.logger.debug('orjson is not installed, falling back to json.')
+
+        self._dumps = lambda payload: json.dumps(payload, default=self.__default, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+        self.backend = 'json'
+        return self._dumps
+
+    # encode: Serializes `payload`, preceded by its `SchemaVersion`, to JSON. Bodies of at least `compress_threshold` bytes are gzip compressed, unless that does not make them smaller. Returns a tuple of the body as `bytes`, to be sent as is on every attempt, and its HTTP headers as `dict`.
+    def encode(self, payload: dict) -> tuple[bytes, dict]:
+
+        start_time = time.perf_counter()
+
+        body = self.__get_dumps()({ 'SchemaVersion': SCHEMA_VERSION, **payload })
+        raw_size = len(body)
+        headers = { 'Content-Type': 'application/json' }
+
+        if raw_size >= self.compress_threshold:
+
+            compressed_body = gzip.compress(body, compresslevel=self.compression_level)
+
+            if len(compressed_body) < raw_size:
+                body = compressed_body
+                headers.update({ 'Content-Encoding': 'gzip' })
+
+        encode_ms = (time.perf_counter() - start_time) * 1000
+
+        self.logger.info('Payload encoded with %s - %d bytes, %d bytes sent%s, in %.2fms', self.backend, raw_size, len(body), ' gzip compressed' if 'Content-Encoding' in headers else '', encode_ms)
+
+        if self.metrics:
+            self.metrics.record(service='payload', operation='Encode', latency_ms=encode_ms, response_size=len(body))
+
+        return body, headers
@@ -0,0 +1,112 @@
+import logging
+import re
+import threading
+
+# Region names by region ID, used where botocore's endpoint data has no entry or cannot be loaded. These names take precedence over botocore's descriptions, keeping the payload stable.
+STATIC_REGION_MAP = { 'us-east-1': 'US East (N. Virginia)', 'us-east-2': 'US East (Ohio)', 'us-west-1': 'US West (N. California)', 'us-west-2': 'US West (Oregon)', 'af-south-1': 'Africa (Cape Town)', 'ap-east-1': 'Asia Pacific (Hong Kong)', 'ap-south-2': 'Asia Pacific (Hyderabad)', 'ap-southeast-3': 'Asia Pacific (Jakarta)', 'ap-southeast-5': 'Asia Pacific (Malaysia)', 'ap-southeast-4': 'Asia Pacific (Melbourne)', 'ap-south-1': 'Asia Pacific (Mumbai)', 'ap-northeast-3': 'Asia Pacific (Osaka)', 'ap-northeast-2': 'Asia Pacific (Seoul)', 'ap-southeast-1': 'Asia Pacific (Singapore)', 'ap-southeast-2': 'Asia Pacific (Sydney)', 'ap-northeast-1': 'Asia Pacific (Tokyo)', 'ca-central-1': 'Canada (Central)', 'ca-west-1': 'Canada West (Calgary)', 'cn-north-1': 'China (Beijing)', 'cn-northwest-1': 'China (Ningxia)', 'eu-central-1': 'Europe (Frankfurt)', 'eu-west-1': 'Europe (Ireland)', 'eu-west-2': 'Europe (London)', 'eu-south-1': 'Europe (Milan)', 'eu-west-3': 'Europe (Paris)', 'eu-south-2': 'Europe (Spain)', 'eu-north-1': 'Europe (Stockholm)', 'eu-central-2': 'Europe (Zurich)', 'il-central-1': 'Israel (Tel Aviv)', 'me-south-1': 'Middle East (Bahrain)', 'me-central-1': 'Middle East (UAE)', 'sa-east-1': 'South America (São Paulo)', 'us-gov-east-1': 'AWS GovCloud (US-East)', 'us-gov-west-1': 'AWS GovCloud (US-West)' }
+
+# Partition of the regions of STATIC_REGION_MAP outside the `aws` partition.
+STATIC_PARTITION_MAP = { 'cn-north-1': 'aws-cn', 'cn-northwest-1': 'aws-cn', 'us-gov-east-1': 'aws-us-gov', 'us-gov-west-1': 'aws-us-gov' }
+
+# RegionCatalog - maps AWS region IDs to region names and back, built once from botocore's bundled endpoint data, with STATIC_REGION_MAP as the fallback
+class RegionCatalog:
+
+    # RegionCatalog Constructor
+    # logger: Logger object
+    #
+    # Returns: RegionCatalog object
+    # Raises: None
+    def __init__(self, logger: logging.Logger):
+
+        self.logger = logger
+        self._lock = threading.Lock()
+        self._region_names = None
+        self._region_ids = None
+        self._partitions = None
+        self._partition_patterns = []
+
+    # __load_endpoint_data: Returns botocore's bundled endpoint data as `dict`, or an empty `dict` if it cannot be loaded.
+    def __load_endpoint_data(self) -> dict:
+
+        try:
+            from botocore.loaders import Loader
+            return Loader().load_data('endpoints')
+
+        except Exception as e:
+            self.logger.exception('Region Catalog Error, falling back to the static region map')
+            return {}
+
+    # __build: Builds the region name, region ID and partition indexes on first use.
+    def __build(self):
+
+        if self._region_names is not None:
+            return
+
+        with self._lock:
+
+            if self._region_names is not None:
+                return
+
+            region_names, partitions, partition_patterns = {}, dict(STATIC_PARTITION_MAP), []
+
+            for partition in self.__load_endpoint_data().get('partitions', []):
+
+                if partition.get('regionRegex'):
+                    partition_patterns.append((re.compile(partition['regionRegex']), partition['partition']))
+
+                for region_id, region in partition.get('regions', {}).items():
+                    region_names.update({ region_id: region.get('description', region_id) })
+                    partitions.update({ region_id: partition['partition'] })
+
+            region_names.update(STATIC_REGION_MAP)
+
+            self._partition_patterns = partition_patterns
+            self._partitions = partitions
+            self._region_ids = { region_name: region_id for region_id, region_name in region_names.items() }
+            self._region_names = region_names
+
+            self.logger.debug('Region Catalog built with %d region(s)', len(region_names))
+
+    # get_region_name: Returns the name of `region_id`, or `region_id` itself if it is not a known region.
+    def get_region_name(self, region_id: str) -> str:
+
+        self.__build()
+        return self._region_names.get(region_id, region_id)
+
+    # get_region_id: Returns the ID of the region named `region_name`, or `region_name` itself if it is not a known region.
+    def get_region_id(self, region_name: str) -> str:
+
+        self.__build()
+        return self._region_ids.get(region_name, region_name)
+
+    # is_region: Returns True if `region_id` is a known region, or has the form of a region of one of the partitions, e.g. a region newer than botocore. Billing pseudo-regions such as `global` and `NoRegion` are not regions.
+    def is_region(self, region_id: str) -> bool:
+
+        self.__build()
+        return region_id in self._region_names or any(pattern.match(region_id) for pattern, partition in self._partition_patterns)
+
+    # get_partition: Returns the partition of `region_id`, e.g. `aws-cn`, defaulting to `aws`.
+    def get_partition(self, region_id: str) -> str:
+
+        self.__build()
+
+        if region_id in self._partitions:
+            return self._partitions[region_id]
+
+        for pattern, partition in self._partition_patterns:
+            if pattern.match(region_id):
+                return partition
+
+        return 'aws'
+
+    # convert_region_ids_to_region_names: Converts a list of region IDs to a list of region names, in the same order. Unknown IDs are kept as is. Returns `list`.
+    def convert_region_ids_to_region_names(self, regions_list: list) -> list:
+
+        self.__build()
+        return [self._region_names.get(region_id, region_id) for region_id in regions_list]
+
+    # convert_region_names_to_region_ids: Converts a list of region names to a list of region IDs, in the same order. Unknown names are kept as is. Returns `list`.
+    def convert_region_names_to_region_ids(self, region_names_list: list) -> list:
+
+        self.__build()
+        return [self._region_ids.get(region_name, region_name) for region_name in region_names_list]
@@ -0,0 +1,127 @@
+import logging
+import json
+import hashlib
+from collector_scheduler.collector_scheduler import MISSING_COLLECTORS_KEY, FAILED_COLLECTORS_KEY
+
+# Payload keys sent in full with every delta, identifying the stack the changes apply to. They are left out of the diff.
+DELTA_ENVELOPE_KEYS = ['Action', 'StackId', 'Region', 'AWSAccountId']
+
+# Payload keys listing the collectors that ran out of time or failed. A payload holding either is partial, its absent keys may still exist.
+PARTIAL_PAYLOAD_KEYS = [MISSING_COLLECTORS_KEY, FAILED_COLLECTORS_KEY]
+
+# SnapshotStore - records the last payload delivered for each StackId, so an Update only sends what changed since
+class SnapshotStore:
+
+    # SnapshotStore Constructor
+    # logger: Logger object
+    # storage_backend: LocalFileBackend or S3Backend object the snapshots are stored in
+    # key_prefix: Storage key prefix of every snapshot
+    #
+    # Returns: SnapshotStore object
+    # Raises: None
+    def __init__(self, logger: logging.Logger, storage_backend, key_prefix: str = 'snapshots'):
+
+        self.logger = logger
+        self.storage_backend = storage_backend
+        self.key_prefix = key_prefix
+
+    # __get_snapshot_key: Returns the storage key of the snapshot of `stack_id`. StackIds are ARNs, so they are hashed into a flat key.
+    def __get_snapshot_key(self, stack_id: str) -> str:
+        return self.key_prefix + '/' + hashlib.sha256(stack_id.encode('utf-8')).hexdigest() + '.json'
+
+    # __normalize: Returns `payload` as it reads back from JSON, e.g. with tuples as lists, so it compares equal to a stored snapshot.
+    def __normalize(self, payload: dict) -> dict:
+        return json.loads(json.dumps(payload, default=str))
+
+    # __diff: Compares `payload` against `base_payload`, recursing into nested dicts. Returns a tuple of the changed or added keys as `dict`, holding only the changes of nested dicts, and the paths of the removed keys as `list` of key lists.
+    def __diff(self, base_payload: dict, payload: dict, path: list = None) -> tuple[dict, list]:
+
+        path = path or []
+        changes, removed = {}, []
+
+        for key, value in payload.items():
+
+            if key not in base_payload:
+                changes.update({ key: value })
+
+            elif isinstance(value, dict) and isinstance(base_payload[key], dict):
+
+                nested_changes, nested_removed = self.__diff(base_payload=base_payload[key], payload=value, path=path + [key])
+
+                if nested_changes:
+                    changes.update({ key: nested_changes })
+
+                removed.extend(nested_removed)
+
+            elif value != base_payload[key]:
+                changes.update({ key: value })
+
+        removed.extend(path + [key] for key in base_payload.keys() if key not in payload)
+
+        return changes, removed
+
+    # get_snapshot: Returns the snapshot of `stack_id` as `dict` with its `Version` and `Payload`, or None if there is none or it cannot be read.
+    def get_snapshot(self, stack_id: str) -> dict:
+
+        try:
+            snapshot = self.storage_backend.get(key=self.__get_snapshot_key(stack_id=stack_id))
+            return json.loads(snapshot) if snapshot is not None else None
+
+        except Exception as e:
+            self.logger.exception('Snapshot Read Error')
+            return None
+
+    # put_snapshot: Records `payload` as version `version` of `stack_id`, once it was delivered. Errors are logged, leaving the next Update to send the full payload.
+    def put_snapshot(self, stack_id: str, payload: dict, version: int):
+
+        try:
+            self.storage_backend.put(
+                key=self.__get_snapshot_key(stack_id=stack_id),
+                data=json.dumps({ 'Version': version, 'Payload': self.__normalize(payload=payload) }, default=str).encode('utf-8')
+            )
+
+        except Exception as e:
+            self.logger.exception('Snapshot Write Error')
+
+    # delete_snapshot: Removes the snapshot of `stack_id`, if any.
+    def delete_snapshot(self, stack_id: str):
+
+        try:
+            self.storage_backend.delete(key=self.__get_snapshot_key(stack_id=stack_id))
+
+        except Exception as e:
+            self.logger.exception('Snapshot Delete Error')
+
+    # is_partial_payload: Returns True if `payload` lacks the results of a collector that ran out of time or failed.
+    def is_partial_payload(self, payload: dict) -> bool:
+        return any(payload.get(key) for key in PARTIAL_PAYLOAD_KEYS)
+
+    # get_full_payload: Returns `payload` marked as the `Full` payload of version `version`.
+    def get_full_payload(self, payload: dict, version: int) -> dict:
+        return { **payload, 'PayloadType': 'Full', 'Version': version }
+
+    # get_delta_payload: Returns the `Delta` payload of version `version` against `snapshot`, holding the DELTA_ENVELOPE_KEYS, the `BaseVersion` it applies to, the `Changes` to deep merge into it and the key paths `Removed` from it.
+    def get_delta_payload(self, snapshot: dict, payload: dict, version: int) -> dict:
+
+        changes, removed = self.__diff(
+            base_payload={ key: value for key, value in snapshot['Payload'].items() if key not in DELTA_ENVELOPE_KEYS },
+            payload={ key: value for key, value in self.__normalize(payload=payload).items() if key not in DELTA_ENVELOPE_KEYS }
+        )
+
+        # The keys of a collector out of time or failed are absent rather than removed, so a partial payload removes nothing.
+        if self.is_partial_payload(payload=payload):
+            self.logger.info('Partial payload, collectors - %s, not removing %d key(s)', [name for key in PARTIAL_PAYLOAD_KEYS for name in payload.get(key, [])], len(removed))
+            removed = []
+
+        self.logger.info('Delta payload against version %d - %d changed and %d removed key(s)', snapshot['Version'], len(changes), len(removed))
+
+        delta_payload = { key: payload[key] for key in DELTA_ENVELOPE_KEYS if key in payload }
+        delta_payload.update({
+            'PayloadType': 'Delta',
+            'BaseVersion': snapshot['Version'],
+            'Version': version,
+            'Changes': changes,
+            'Removed': removed
+        })
+
+        return delta_payload
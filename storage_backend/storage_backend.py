@@ -0,0 +1,219 @@
+import logging
+import os
+import tempfile
+import time
+from boto3 import client
+
+# LocalFileBackend - stores objects as files below a local directory, by default in the Lambda's `/tmp`, which survives warm invocations of the same container
+class LocalFileBackend:
+
+    # LocalFileBackend Constructor
+    # logger: Logger object
+    # base_path: Directory the objects are stored in, created on first write
+    #
+    # Returns: LocalFileBackend object
+    # Raises: None
+    def __init__(self, logger: logging.Logger, base_path: str = '/tmp/aws-python-post-stack-outputs'):
+
+        self.logger = logger
+        self.base_path = base_path
+
+    # __get_path: Returns the file path of `key`. Keys use `/` separated segments, which may not climb out of `base_path`.
+    def __get_path(self, key: str) -> str:
+
+        if '..' in key.split('/'):
+            raise ValueError('Invalid storage key - ' + key)
+
+        return os.path.join(self.base_path, *key.split('/'))
+
+    # get: Returns the object stored under `key` as `bytes`, or None if there is none.
+    def get(self, key: str) -> bytes:
+
+        try:
+            with open(self.__get_path(key=key), 'rb') as stored_file:
+                return stored_file.read()
+
+        except FileNotFoundError:
+            return None
+
+    # put: Stores `data` under `key`. The file is replaced atomically, so concurrent readers never see a partial object.
+    def put(self, key: str, data: bytes):
+
+        path = self.__get_path(key=key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=os.path.dirname(path))
+
+        try:
+            with os.fdopen(file_descriptor, 'wb') as temporary_file:
+                temporary_file.write(data)
+
+            os.replace(temporary_path, path)
+
+        except Exception:
+            os.remove(temporary_path)
+            raise
+
+    # create: Stores `data` under `key` unless an object is already stored there. The file is linked into place, which fails atomically if it exists. Returns True if `data` was stored.
+    def create(self, key: str, data: bytes) -> bool:
+
+        path = self.__get_path(key=key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=os.path.dirname(path))
+
+        try:
+            with os.fdopen(file_descriptor, 'wb') as temporary_file:
+                temporary_file.write(data)
+
+            os.link(temporary_path, path)
+            return True
+
+        except FileExistsError:
+            return False
+
+        finally:
+            os.remove(temporary_path)
+
+    # delete: Removes the object stored under `key`, if any.
+    def delete(self, key: str):
+
+        try:
+            os.remove(self.__get_path(key=key))
+
+        except FileNotFoundError:
+            pass
+
+# S3Backend - stores objects in an S3 bucket, or any S3-compatible store reachable through the client's endpoint
+class S3Backend:
+
+    # S3Backend Constructor
+    # logger: Logger object
+    # s3_client: S3 boto3 client, or any object providing `get_object`, `put_object` and `delete_object`
+    # bucket_name: Bucket the objects are stored in
+    # prefix: Optional key prefix of every object
+    #
+    # Returns: S3Backend object
+    # Raises: None
+    def __init__(self, logger: logging.Logger, s3_client: client, bucket_name: str, prefix: str = ''):
+
+        self.logger = logger
+        self.s3_client = s3_client
+        self.bucket_name = bucket_name
+        self.prefix = prefix.strip('/') + '/' if prefix.strip('/') else ''
+
+    # get: Returns the object stored under `key` as `bytes`, or None if there is none.
+    def get(self, key: str) -> bytes:
+
+        try:
+            get_object_response = self.s3_client.get_object(
+                Bucket=self.bucket_name,
+                Key=self.prefix + key
+            )
+
+            return get_object_response['Body'].read()
+
+        except self.s3_client.exceptions.NoSuchKey:
+            return None
+
+    # put: Stores `data` under `key`.
+    def put(self, key: str, data: bytes):
+
+        self.s3_client.put_object(
+            Bucket=self.bucket_name,
+            Key=self.prefix + key,
+            Body=data
+        )
+
+    # create: Stores `data` under `key` unless an object is already stored there. The pinned botocore has no conditional PutObject, so the check is a read ahead of the write. Returns True if `data` was stored.
+    def create(self, key: str, data: bytes) -> bool:
+
+        if self.get(key=key) is not None:
+            return False
+
+        self.put(key=key, data=data)
+        return True
+
+    # delete: Removes the object stored under `key`, if any.
+    def delete(self, key: str):
+
+        self.s3_client.delete_object(
+            Bucket=self.bucket_name,
+            Key=self.prefix + key
+        )
+
+# DynamoDBBackend - stores objects as items of a DynamoDB table, or any DynamoDB-compatible store reachable through the client's endpoint, with a string partition key `Key`
+class DynamoDBBackend:
+
+    # DynamoDBBackend Constructor
+    # logger: Logger object
+    # dynamodb_client: DynamoDB boto3 client, or any object providing `get_item`, `put_item` and `delete_item`
+    # table_name: Table the objects are stored in
+    # ttl_seconds: Optional lifetime of the items, written to the `ExpiresAt` attribute for DynamoDB TTL. Expired items are ignored until DynamoDB deletes them.
+    #
+    # Returns: DynamoDBBackend object
+    # Raises: None
+    def __init__(self, logger: logging.Logger, dynamodb_client: client, table_name: str, ttl_seconds: int = None):
+
+        self.logger = logger
+        self.dynamodb_client = dynamodb_client
+        self.table_name = table_name
+        self.ttl_seconds = ttl_seconds
+
+    # __get_item: Returns the DynamoDB item storing `data` under `key`.
+    def __get_item(self, key: str, data: bytes) -> dict:
+
+        item = { 'Key': { 'S': key }, 'Data': { 'B': data } }
+
+        if self.ttl_seconds:
+            item.update({ 'ExpiresAt': { 'N': str(int(time.time() + self.ttl_seconds)) } })
+
+        return item
+
+    # get: Returns the object stored under `key` as `bytes`, or None if there is none or it expired.
+    def get(self, key: str) -> bytes:
+
+        get_item_response = self.dynamodb_client.get_item(
+            TableName=self.table_name,
+            Key={ 'Key': { 'S': key } },
+            ConsistentRead=True
+        )
+
+        item = get_item_response.get('Item')
+
+        if not item or 'ExpiresAt' in item and int(item['ExpiresAt']['N']) <= time.time():
+            return None
+
+        return item['Data']['B']
+
+    # put: Stores `data` under `key`.
+    def put(self, key: str, data: bytes):
+
+        self.dynamodb_client.put_item(
+            TableName=self.table_name,
+            Item=self.__get_item(key=key, data=data)
+        )
+
+    # create: Stores `data` under `key` unless an unexpired item is already stored there, with a conditional write. Returns True if `data` was stored.
+    def create(self, key: str, data: bytes) -> bool:
+
+        try:
+            self.dynamodb_client.put_item(
+                TableName=self.table_name,
+                Item=self.__get_item(key=key, data=data),
+                ConditionExpression='attribute_not_exists(#key) OR #expires_at <= :now',
+                ExpressionAttributeNames={ '#key': 'Key', '#expires_at': 'ExpiresAt' },
+                ExpressionAttributeValues={ ':now': { 'N': str(int(time.time())) } }
+            )
+            return True
+
+        except self.dynamodb_client.exceptions.ConditionalCheckFailedException:
+            return False
+
+    # delete: Removes the object stored under `key`, if any.
+    def delete(self, key: str):
+
+        self.dynamodb_client.delete_item(
+            TableName=self.table_name,
+            Key={ 'Key': { 'S': key } }
+        )